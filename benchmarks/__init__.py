@@ -0,0 +1,4 @@
+"""Benchmarks for the Workout Tracker API (not part of the test suite).
+
+Run modules from the repository root, e.g. ``python -m benchmarks.login_storm``.
+"""
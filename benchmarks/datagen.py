@@ -0,0 +1,167 @@
+# benchmarks/datagen.py
+"""
+Synthetic data at a fixed scale, written with bulk INSERTs.
+
+A scale is a number of WorkoutExercise rows; users, workouts and schedules
+are derived from it so every user has roughly the same history (about 200
+workouts of 5 entries over the last year) whatever the scale. Larger
+scales therefore add *other users' rows*, which is what exposes missing
+indexes and per-user scans. Output is deterministic for a given seed.
+Rollups and the personal-record index are rebuilt at the end.
+
+    python -m benchmarks.datagen --scale 100k --database-url sqlite:////tmp/bench.db
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+
+from src import records, rollups
+from src.app import create_app
+from src.model import db, Exercise, ScheduledWorkout, User, Workout, WorkoutExercise
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+ENTRIES_PER_WORKOUT = 5
+ENTRIES_PER_USER = 1_000
+N_EXERCISES = 40
+BATCH = 10_000
+PASSWORD = "bench-pass"
+
+
+def _batched(rows, size=BATCH):
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def _bulk(model, rows):
+    for chunk in _batched(rows):
+        db.session.execute(insert(model), chunk)
+
+
+def _reset_sequences(models):
+    # ids were supplied explicitly; move Postgres sequences past them
+    if db.engine.dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'),"
+                f" COALESCE((SELECT MAX(id) FROM {table}), 0) + 1, false)"
+            )
+        )
+
+
+def generate(scale, seed=0, now=None):
+    """Fill an empty schema; call inside an app context. Returns row counts."""
+    rows = int(SCALES.get(scale, scale))
+    rng = random.Random(seed)
+    now = (now or datetime.utcnow()).replace(microsecond=0)
+    n_users = max(1, rows // ENTRIES_PER_USER)
+    n_workouts = max(1, rows // ENTRIES_PER_WORKOUT)
+
+    _bulk(
+        Exercise,
+        [
+            {
+                "id": i,
+                "name": f"Exercise {i}",
+                "description": "synthetic",
+                "category": rng.choice(["strength", "cardio", "flexibility"]),
+                "muscle_group": rng.choice(["legs", "chest", "back", "core", "arms"]),
+            }
+            for i in range(1, N_EXERCISES + 1)
+        ],
+    )
+
+    # hashing is deliberately slow; every synthetic user shares one hash
+    pw_hash = generate_password_hash(PASSWORD)
+    _bulk(
+        User,
+        [
+            {
+                "id": i,
+                "email": f"user{i}@bench.example",
+                "password_hash": pw_hash,
+                "created_at": now - timedelta(days=400),
+                "timezone": "UTC" if i % 2 else "America/New_York",
+            }
+            for i in range(1, n_users + 1)
+        ],
+    )
+
+    workouts, entries, schedules = [], [], []
+    entry_id = 1
+    for wid in range(1, n_workouts + 1):
+        created = now - timedelta(seconds=rng.randrange(365 * 86400))
+        workouts.append(
+            {
+                "id": wid,
+                "user_id": (wid - 1) % n_users + 1,
+                "title": f"Workout {wid}",
+                "notes": None,
+                "created_at": created,
+                "updated_at": created,
+                "revision": 1,
+            }
+        )
+        for _ in range(ENTRIES_PER_WORKOUT):
+            if entry_id > rows:
+                break
+            entries.append(
+                {
+                    "id": entry_id,
+                    "workout_id": wid,
+                    "exercise_id": rng.randint(1, N_EXERCISES),
+                    "sets": rng.randint(1, 5),
+                    "reps": rng.randint(1, 12),
+                    "weight": float(rng.randrange(20, 200, 5)),
+                }
+            )
+            entry_id += 1
+        if wid % 10 == 0:
+            schedules.append(
+                {
+                    "workout_id": wid,
+                    "user_id": workouts[-1]["user_id"],
+                    "scheduled_at": now + timedelta(hours=rng.randrange(1, 24 * 60)),
+                }
+            )
+
+    _bulk(Workout, workouts)
+    _bulk(WorkoutExercise, entries)
+    _bulk(ScheduledWorkout, schedules)
+    _reset_sequences([Exercise, User, Workout, WorkoutExercise])
+    rollups.rebuild()
+    records.rebuild()
+    db.session.commit()
+    return {
+        "users": n_users,
+        "workouts": len(workouts),
+        "workout_exercises": len(entries),
+        "scheduled_workouts": len(schedules),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", default="1k", help="1k, 100k, 1m or a row count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database-url", required=True)
+    args = parser.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        counts = generate(args.scale, seed=args.seed)
+        print(counts, f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+# benchmarks/endpoints.py
+"""
+Time every auth, workout and report endpoint through the Flask test client.
+
+A fresh database is filled by benchmarks.datagen at the requested scale,
+then each case runs `--repeat` times as a user with a typical history.
+Results (latency percentiles and SQL statements per request) are written
+as JSON so two commits can be compared:
+
+    python -m benchmarks.endpoints --scale 100k --out before.json
+    ... change code ...
+    python -m benchmarks.endpoints --scale 100k --out after.json --compare before.json
+
+Pass --database-url postgresql://... to run against a scratch Postgres
+database instead of a temporary SQLite file (all its tables are dropped).
+The report cache is off and passwords are hashed inline so every request
+does its full work.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import sqlalchemy
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from benchmarks import datagen
+from benchmarks.server import ROOT, percentile
+from src.app import create_app
+from src.model import db, User
+
+BENCH_USER = 1
+
+
+def _workout_body(i=0):
+    return {
+        "title": f"Bench {i}",
+        "exercises": [
+            {"exercise_id": 1 + (i + j) % datagen.N_EXERCISES, "sets": 3, "reps": 5, "weight": 100}
+            for j in range(datagen.ENTRIES_PER_WORKOUT)
+        ],
+    }
+
+
+class Bench:
+    """App, client and helpers shared by the cases."""
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.test_client()
+        with app.app_context():
+            self.email = db.session.get(User, BENCH_USER).email
+            admin = db.session.get(User, 2) or db.session.get(User, BENCH_USER)
+            admin.is_admin = True
+            db.session.commit()
+            self.admin_id = admin.id
+        self.token = self.token_for(BENCH_USER)
+        self.admin_token = self.token_for(self.admin_id)
+        self.counter = 0
+
+    def token_for(self, user_id):
+        with self.app.app_context():
+            return create_access_token(identity=str(user_id))
+
+    def headers(self, token=None):
+        return {"Authorization": f"Bearer {token or self.token}"}
+
+    def next(self):
+        self.counter += 1
+        return self.counter
+
+    def new_workout(self):
+        r = self.client.post("/workouts", json=_workout_body(self.next()), headers=self.headers())
+        return r.get_json()["id"]
+
+    def new_schedule(self, wid):
+        when = (datetime.utcnow() + timedelta(days=3)).isoformat()
+        r = self.client.post(
+            f"/workouts/{wid}/schedule", json={"scheduled_at": when}, headers=self.headers()
+        )
+        return r.get_json()["id"]
+
+
+def _ndjson(n, offset):
+    return "\n".join(json.dumps(_workout_body(offset + i)) for i in range(n))
+
+
+def build_cases(b):
+    """name -> callable returning (method, path, kwargs) for one timed request."""
+    wid = b.new_workout()
+    sid = b.new_schedule(wid)
+    second_page = b.client.get("/workouts?limit=50", headers=b.headers()).get_json()["next_cursor"]
+    feed = b.client.get("/calendar/feed", headers=b.headers()).get_json()["url"]
+    soon = lambda: (datetime.utcnow() + timedelta(days=5)).isoformat()  # noqa: E731
+
+    def prepared(setup, fn):
+        # setup runs untimed right before each timed request
+        return {"setup": setup, "request": fn}
+
+    return {
+        "auth.signup": lambda: (
+            "POST", "/auth/signup",
+            {"json": {"email": f"signup{b.next()}@bench.example", "password": "pw"}},
+        ),
+        "auth.login": lambda: (
+            "POST", "/auth/login", {"json": {"email": b.email, "password": datagen.PASSWORD}},
+        ),
+        "auth.me": lambda: ("GET", "/auth/me", {"headers": b.headers()}),
+        "auth.update_me": lambda: (
+            "PUT", "/auth/me", {"json": {"timezone": "UTC"}, "headers": b.headers()},
+        ),
+        "auth.logout": prepared(
+            lambda: b.token_for(BENCH_USER),
+            lambda token: ("POST", "/auth/logout", {"headers": b.headers(token)}),
+        ),
+        "auth.revoke": lambda: (
+            "POST", "/auth/revoke",
+            {"json": {"jti": f"bench-{b.next()}"}, "headers": b.headers(b.admin_token)},
+        ),
+        "workouts.create": lambda: (
+            "POST", "/workouts", {"json": _workout_body(b.next()), "headers": b.headers()},
+        ),
+        "workouts.list": lambda: ("GET", "/workouts?limit=50", {"headers": b.headers()}),
+        "workouts.list_page2": lambda: (
+            "GET", f"/workouts?limit=50&cursor={second_page}", {"headers": b.headers()},
+        ),
+        "workouts.get": lambda: ("GET", f"/workouts/{wid}", {"headers": b.headers()}),
+        "workouts.update": lambda: (
+            "PUT", f"/workouts/{wid}", {"json": _workout_body(b.next()), "headers": b.headers()},
+        ),
+        "workouts.patch": lambda: (
+            "PATCH", f"/workouts/{wid}",
+            {
+                "json": [{"op": "replace", "path": "/title", "value": f"Bench {b.next()}"}],
+                "headers": b.headers(),
+            },
+        ),
+        "workouts.delete": prepared(
+            b.new_workout,
+            lambda w: ("DELETE", f"/workouts/{w}", {"headers": b.headers()}),
+        ),
+        "workouts.import_ndjson_20": lambda: (
+            "POST", "/workouts/import",
+            {
+                "data": _ndjson(20, b.next() * 20),
+                "content_type": "application/x-ndjson",
+                "headers": b.headers(),
+            },
+        ),
+        "workouts.export_ndjson": lambda: ("GET", "/workouts/export", {"headers": b.headers()}),
+        "workouts.export_csv": lambda: (
+            "GET", "/workouts/export?format=csv", {"headers": b.headers()},
+        ),
+        "workouts.schedule_create": lambda: (
+            "POST", f"/workouts/{wid}/schedule",
+            {"json": {"scheduled_at": soon()}, "headers": b.headers()},
+        ),
+        "workouts.schedule_list": lambda: (
+            "GET", f"/workouts/{wid}/schedule", {"headers": b.headers()},
+        ),
+        "workouts.schedule_update": lambda: (
+            "PUT", f"/workouts/{wid}/schedule/{sid}",
+            {"json": {"scheduled_at": soon()}, "headers": b.headers()},
+        ),
+        "workouts.schedule_delete": prepared(
+            lambda: b.new_schedule(wid),
+            lambda s: ("DELETE", f"/workouts/{wid}/schedule/{s}", {"headers": b.headers()}),
+        ),
+        "reports.overview": lambda: ("GET", "/reports/overview", {"headers": b.headers()}),
+        "reports.records": lambda: ("GET", "/reports/records", {"headers": b.headers()}),
+        "reports.weekly": lambda: ("GET", "/reports/weekly?weeks=12", {"headers": b.headers()}),
+        "reports.progress": lambda: (
+            "GET", "/reports/exercise/1/progress?days=90", {"headers": b.headers()},
+        ),
+        "reports.progress_metrics": lambda: (
+            "GET", "/reports/exercise/1/progress?days=90&metrics=e1rm,rolling,trend,pr",
+            {"headers": b.headers()},
+        ),
+        "reports.upcoming": lambda: ("GET", "/reports/upcoming", {"headers": b.headers()}),
+        "reports.upcoming_page": lambda: (
+            "GET", "/reports/upcoming?limit=10", {"headers": b.headers()},
+        ),
+        "batch.create_schedule_overview": lambda: (
+            "POST", "/batch",
+            {
+                "json": {
+                    "atomic": True,
+                    "requests": [
+                        {"method": "POST", "path": "/workouts", "body": _workout_body(b.next())},
+                        {
+                            "method": "POST",
+                            "path": "/workouts/$0.id/schedule",
+                            "body": {"scheduled_at": soon()},
+                        },
+                        {"path": "/reports/overview"},
+                    ],
+                },
+                "headers": b.headers(),
+            },
+        ),
+        "calendar.feed": lambda: ("GET", feed, {}),
+        "calendar.feed_304": prepared(
+            lambda: b.client.get(feed).headers["ETag"],
+            lambda etag: ("GET", feed, {"headers": {"If-None-Match": etag}}),
+        ),
+    }
+
+
+def run_case(b, case, repeat, warmup):
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    with b.app.app_context():
+        engine = db.engine
+
+    timings, queries, statuses = [], [], set()
+    for i in range(warmup + repeat):
+        if isinstance(case, dict):
+            method, path, kwargs = case["request"](case["setup"]())
+        else:
+            method, path, kwargs = case()
+        statements.clear()
+        event.listen(engine, "before_cursor_execute", count)
+        start = time.perf_counter()
+        try:
+            r = b.client.open(path, method=method, **kwargs)
+            r.get_data()  # drain streamed responses inside the timing
+        finally:
+            elapsed = time.perf_counter() - start
+            event.remove(engine, "before_cursor_execute", count)
+        if i >= warmup:
+            timings.append(elapsed)
+            queries.append(len(statements))
+            statuses.add(r.status_code)
+
+    ms = lambda s: round(s * 1000, 3)  # noqa: E731
+    return {
+        "n": len(timings),
+        "status": sorted(statuses),
+        "p50_ms": ms(percentile(timings, 50)),
+        "p95_ms": ms(percentile(timings, 95)),
+        "max_ms": ms(max(timings)),
+        "queries": int(statistics.median(queries)),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    tmp = None
+    if args.database_url:
+        url = args.database_url
+    else:
+        tmp = tempfile.mkdtemp(prefix="workout-endpoints-")
+        url = f"sqlite:///{tmp}/bench.db"
+    os.environ.update(
+        DATABASE_URL=url,
+        JWT_SECRET="bench-secret-" + "x" * 32,
+        REPORT_CACHE_BACKEND="none",
+        PASSWORD_HASH_WORKERS="0",
+        PASSWORD_HASH_SLOTS="0",
+    )
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        start = time.perf_counter()
+        counts = datagen.generate(args.scale, seed=args.seed)
+        load_seconds = time.perf_counter() - start
+
+    b = Bench(app)
+    cases = build_cases(b)
+    selected = [n for n in cases if not args.only or any(n.startswith(p) for p in args.only)]
+    results = {}
+    for name in selected:
+        results[name] = run_case(b, cases[name], args.repeat, args.warmup)
+        print(f"{name:32} {results[name]['p50_ms']:>9.2f} ms  {results[name]['queries']:>3} queries",
+              file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "scale": args.scale,
+            "rows": counts,
+            "load_seconds": round(load_seconds, 1),
+            "dialect": sqlalchemy.engine.make_url(url).get_backend_name(),
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "started": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+
+def compare(base, current, threshold, min_delta_ms=1.0):
+    """Print per-case changes; return names whose p50 or query count regressed.
+
+    A p50 slowdown counts only when it is both relative (> threshold) and
+    absolute (> min_delta_ms), so sub-millisecond cases do not flap.
+    """
+    if base["meta"]["scale"] != current["meta"]["scale"]:
+        print(f"warning: comparing scale {base['meta']['scale']} with {current['meta']['scale']}")
+    regressed = []
+    for name, cur in current["results"].items():
+        old = base["results"].get(name)
+        if old is None:
+            continue
+        ratio = cur["p50_ms"] / old["p50_ms"] if old["p50_ms"] else 1.0
+        more_queries = cur["queries"] > old["queries"]
+        slower = ratio > 1 + threshold and cur["p50_ms"] - old["p50_ms"] > min_delta_ms
+        flag = slower or more_queries
+        if flag:
+            regressed.append(name)
+        print(
+            f"{'!' if flag else ' '} {name:32} {old['p50_ms']:>9.2f} -> {cur['p50_ms']:>9.2f} ms"
+            f" ({(ratio - 1) * 100:+.0f}%)  queries {old['queries']} -> {cur['queries']}"
+        )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", default="1k", help="1k, 100k, 1m or a row count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--database-url", help="Scratch database to use instead of SQLite")
+    parser.add_argument("--only", action="append", help="Only cases with this name prefix")
+    parser.add_argument("--out", help="Write JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="Earlier results file to diff against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative p50 slowdown flagged as a regression (default 0.2)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore p50 slowdowns smaller than this (default 1.0)")
+    args = parser.parse_args()
+
+    result = run(args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    else:
+        print(json.dumps(result, indent=2))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(json.load(f), result, args.threshold, args.min_delta_ms)
+        if regressed:
+            sys.exit(f"{len(regressed)} cases regressed: {', '.join(regressed)}")
+
+
+if __name__ == "__main__":
+    main()
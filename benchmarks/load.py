@@ -0,0 +1,234 @@
+# benchmarks/load.py
+"""
+Concurrent load test against wsgi:app under gunicorn.
+
+Boots a local gunicorn for each server configuration, then drives it from
+several client *processes* (so the generator is not GIL-bound) replaying a
+weighted traffic mix for a fixed duration. Reports throughput and
+p50/p95/p99 per operation, error counts, and how many requests failed on
+SQLite lock contention ("database is locked" in the server log).
+
+    python -m benchmarks.load                                  # 3 sync workers
+    python -m benchmarks.load --workers 1,3,6 --worker-class sync,gthread
+    python -m benchmarks.load --mix login=1,create=2,list=6,reports=4,schedule=1
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from benchmarks.server import call, gunicorn_server, percentile
+
+DEFAULT_MIX = "login=1,create=3,list=6,reports=4,schedule=1"
+REPORTS = [
+    "/reports/overview",
+    "/reports/weekly",
+    "/reports/records",
+    "/reports/exercise/1/progress?days=90",
+    "/reports/upcoming",
+]
+PASSWORD = "pass123"
+LOCKED = "database is locked"
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(
+                f"unknown operation {name!r} (choose from {', '.join(OPERATIONS)})"
+            )
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _workout(rng):
+    return {
+        "title": "Load",
+        "exercises": [
+            {"exercise_id": rng.randint(1, 4), "sets": 3, "reps": rng.randint(3, 10),
+             "weight": rng.randrange(20, 150, 5)}
+            for _ in range(3)
+        ],
+    }
+
+
+# Each operation takes the client state and returns (label, status, seconds).
+
+
+def op_login(base, state, rng):
+    status, _, t = call(base, "POST", "/auth/login",
+                        {"email": state["email"], "password": PASSWORD})
+    return "login", status, t
+
+
+def op_create(base, state, rng):
+    status, body, t = call(base, "POST", "/workouts", _workout(rng), token=state["token"])
+    if status == 201:
+        state["workouts"].append(body["id"])
+    return "create", status, t
+
+
+def op_list(base, state, rng):
+    status, _, t = call(base, "GET", "/workouts?limit=20", token=state["token"])
+    return "list", status, t
+
+
+def op_reports(base, state, rng):
+    path = rng.choice(REPORTS)
+    status, _, t = call(base, "GET", path, token=state["token"])
+    return "reports." + path.split("/")[2].split("?")[0], status, t
+
+
+def op_schedule(base, state, rng):
+    wid = rng.choice(state["workouts"])
+    when = (datetime.utcnow() + timedelta(hours=rng.randint(1, 500))).isoformat()
+    status, _, t = call(base, "POST", f"/workouts/{wid}/schedule",
+                        {"scheduled_at": when}, token=state["token"])
+    return "schedule", status, t
+
+
+OPERATIONS = {
+    "login": op_login,
+    "create": op_create,
+    "list": op_list,
+    "reports": op_reports,
+    "schedule": op_schedule,
+}
+
+
+def _client(args):
+    """One load-generating process; returns [(label, status, seconds), ...]."""
+    base, state, mix, duration, seed = args
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    samples = []
+    stop = time.monotonic() + duration
+    while time.monotonic() < stop:
+        name = rng.choices(names, weights)[0]
+        try:
+            samples.append(OPERATIONS[name](base, state, rng))
+        except OSError:  # refused / reset / timed out: count as an error
+            samples.append((name, 0, 0.0))
+    return samples
+
+
+def _setup_users(base, n):
+    states = []
+    for i in range(n):
+        email = f"load{i}@example.com"
+        _, body, _ = call(base, "POST", "/auth/signup", {"email": email, "password": PASSWORD})
+        state = {"email": email, "token": body["access_token"], "workouts": []}
+        rng = random.Random(i)
+        for _ in range(5):
+            _, w, _ = call(base, "POST", "/workouts", _workout(rng), token=state["token"])
+            state["workouts"].append(w["id"])
+        states.append(state)
+    return states
+
+
+def _summarize(samples, duration):
+    by_op = defaultdict(list)
+    for label, status, seconds in samples:
+        by_op[label].append((status, seconds))
+
+    ms = lambda s: round(s * 1000, 1) if s is not None else None  # noqa: E731
+    ops = {}
+    for label, rows in sorted(by_op.items()):
+        ok = [s for status, s in rows if status < 400]
+        ops[label] = {
+            "requests": len(rows),
+            "rps": round(len(rows) / duration, 1),
+            "errors": sum(1 for status, _ in rows if status == 0 or status >= 500 and status != 503),
+            "shed_503": sum(1 for status, _ in rows if status == 503),
+            "p50_ms": ms(percentile(ok, 50)),
+            "p95_ms": ms(percentile(ok, 95)),
+            "p99_ms": ms(percentile(ok, 99)),
+        }
+    return ops
+
+
+def run(workers, worker_class, args):
+    # gunicorn silently turns sync workers with threads into gthread ones
+    threads = args.threads if worker_class == "gthread" else 1
+    log = tempfile.NamedTemporaryFile(mode="w+", prefix="workout-load-", suffix=".log")
+    with gunicorn_server(workers=workers, worker_class=worker_class,
+                         threads=threads, log_file=log) as base:
+        states = _setup_users(base, args.clients)
+        jobs = [(base, st, args.mix, args.duration, args.seed + i) for i, st in enumerate(states)]
+        with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+            samples = [s for chunk in pool.map(_client, jobs) for s in chunk]
+    log.seek(0)
+    locked = log.read().count(LOCKED)
+    log.close()
+
+    ops = _summarize(samples, args.duration)
+    return {
+        "workers": workers,
+        "worker_class": worker_class,
+        "threads": threads,
+        "clients": args.clients,
+        "duration_s": args.duration,
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / args.duration, 1),
+        "errors": sum(o["errors"] for o in ops.values()),
+        "shed_503": sum(o["shed_503"] for o in ops.values()),
+        "sqlite_locked_errors": locked,
+        "operations": ops,
+    }
+
+
+def _table(results):
+    lines = [
+        f"{'config':<22}{'rps':>8}{'errors':>8}{'shed':>8}{'locked':>8}"
+        "   p50/p95/p99 ms per operation"
+    ]
+    for r in results:
+        name = f"{r['workers']}x{r['worker_class']}" + (
+            f"/{r['threads']}t" if r["threads"] > 1 else ""
+        )
+        per_op = "  ".join(
+            f"{op}={o['p50_ms']}/{o['p95_ms']}/{o['p99_ms']}" for op, o in r["operations"].items()
+        )
+        lines.append(
+            f"{name:<22}{r['throughput_rps']:>8}{r['errors']:>8}{r['shed_503']:>8}"
+            f"{r['sqlite_locked_errors']:>8}"
+            f"   {per_op}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="3", help="Comma-separated worker counts")
+    parser.add_argument("--worker-class", default="sync", help="Comma-separated worker classes")
+    parser.add_argument("--threads", type=int, default=1, help="Threads per gthread worker")
+    parser.add_argument("--clients", type=int, default=8, help="Load-generating processes")
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Operation weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="Write JSON results here (default: stdout)")
+    args = parser.parse_args()
+
+    results = [
+        run(int(w), k, args)
+        for k in args.worker_class.split(",")
+        for w in args.workers.split(",")
+    ]
+    print(_table(results), file=sys.stderr)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
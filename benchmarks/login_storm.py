@@ -0,0 +1,96 @@
+# benchmarks/login_storm.py
+"""
+Login storm: hammer /auth/login from many threads while one client polls
+GET /workouts, and report logins/sec plus the poller's latency.
+
+    python -m benchmarks.login_storm                 # pooled vs. inline hashing
+    python -m benchmarks.login_storm --duration 20 --login-threads 24
+"""
+import argparse
+import json
+import threading
+import time
+
+from benchmarks.server import call, gunicorn_server, percentile
+
+CONFIGS = {
+    # hashing inline in the request worker, no cross-worker limit (pre-pool behaviour)
+    "inline": {"PASSWORD_HASH_WORKERS": "0", "PASSWORD_HASH_SLOTS": "0"},
+    # defaults: process pool + host-wide slots, shed as soon as no slot is free
+    "pooled": {},
+    # wait up to half a second for a slot before shedding
+    "pooled-slot-wait": {"PASSWORD_HASH_SLOT_WAIT": "0.5"},
+}
+
+
+def run(name, env, args):
+    with gunicorn_server(workers=args.workers, worker_class=args.worker_class,
+                         threads=args.threads, env=env) as base:
+        creds = [(f"storm{i}@example.com", "pass123") for i in range(args.login_threads)]
+        for email, pw in creds:
+            call(base, "POST", "/auth/signup", {"email": email, "password": pw})
+        _, body, _ = call(base, "POST", "/auth/signup",
+                          {"email": "poller@example.com", "password": "pass123"})
+        poll_token = body["access_token"]
+
+        stop = time.monotonic() + args.duration
+        ok, shed, failed = [0], [0], [0]
+        lock = threading.Lock()
+        poll_latency = []
+
+        def login_loop(email, pw):
+            while time.monotonic() < stop:
+                status, _, _ = call(base, "POST", "/auth/login", {"email": email, "password": pw})
+                with lock:
+                    if status == 200:
+                        ok[0] += 1
+                    elif status == 503:
+                        shed[0] += 1
+                    else:
+                        failed[0] += 1
+                if status == 503:
+                    time.sleep(0.05)
+
+        def poll_loop():
+            while time.monotonic() < stop:
+                status, _, elapsed = call(base, "GET", "/workouts?limit=10", token=poll_token)
+                if status == 200:
+                    poll_latency.append(elapsed)
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=login_loop, args=c) for c in creds]
+        threads.append(threading.Thread(target=poll_loop))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    ms = lambda s: round(s * 1000, 1) if s is not None else None  # noqa: E731
+    return {
+        "config": name,
+        "logins_per_sec": round(ok[0] / args.duration, 1),
+        "logins_shed_503": shed[0],
+        "login_errors": failed[0],
+        "other_endpoint_requests": len(poll_latency),
+        "other_endpoint_p50_ms": ms(percentile(poll_latency, 50)),
+        "other_endpoint_p99_ms": ms(percentile(poll_latency, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--login-threads", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--worker-class", default="sync")
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--config", choices=sorted(CONFIGS), action="append",
+                        help="Run only these configs (default: all)")
+    args = parser.parse_args()
+
+    results = [run(name, CONFIGS[name], args) for name in (args.config or CONFIGS)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# benchmarks/server.py
+"""Boot wsgi:app under gunicorn against a throwaway SQLite database."""
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def gunicorn_server(workers=3, worker_class="sync", threads=1, env=None, log_file=None):
+    """Yield the base URL of a freshly migrated and seeded gunicorn instance.
+
+    Server output (including app tracebacks) goes to `log_file` if given.
+    """
+    tmp = tempfile.mkdtemp(prefix="workout-bench-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+        "JWT_SECRET": "bench-secret-" + "x" * 32,
+        "REPORT_CACHE_PATH": os.path.join(tmp, "report_cache.sqlite3"),
+        "FLASK_APP": "src.app:create_app",
+        **(env or {}),
+    }
+    subprocess.run(
+        [sys.executable, "-m", "flask", "db", "upgrade"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+    subprocess.run(
+        [sys.executable, "seeds.py"], cwd=ROOT, env=env, check=True, capture_output=True
+    )
+
+    port = _free_port()
+    cmd = [
+        sys.executable, "-m", "gunicorn",
+        "-w", str(workers), "-k", worker_class, "--threads", str(threads),
+        "-b", f"127.0.0.1:{port}", "--log-level", "warning",
+        "wsgi:app",
+    ]
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log_file, stderr=log_file)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                urllib.request.urlopen(base + "/", timeout=1).read()
+                break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("gunicorn did not start")
+                time.sleep(0.1)
+        yield base
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def call(base, method, path, body=None, token=None, timeout=30):
+    """Return (status, parsed JSON or None, seconds)."""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base + path, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            status, raw = resp.status, resp.read()
+    except urllib.error.HTTPError as e:
+        status, raw = e.code, e.read()
+    elapsed = time.perf_counter() - start
+    try:
+        parsed = json.loads(raw) if raw else None
+    except ValueError:
+        parsed = None
+    return status, parsed, elapsed
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    k = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[k]
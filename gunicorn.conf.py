@@ -0,0 +1,19 @@
+# gunicorn.conf.py — picked up automatically by `gunicorn` run from the repo root
+import glob
+import os
+
+
+def on_starting(server):
+    # stale per-worker files from a previous run would be merged into /metrics
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for f in glob.glob(os.path.join(path, "*.db")):
+            os.remove(f)
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,26 @@
+"""Add users.active
+
+Revision ID: 0b6f2e9d4c71
+Revises: 71f3b0c8d5e2
+Create Date: 2026-10-18 17:34:10.662481
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6f2e9d4c71'
+down_revision = '71f3b0c8d5e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('active', sa.Boolean(), server_default=sa.true(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('active')
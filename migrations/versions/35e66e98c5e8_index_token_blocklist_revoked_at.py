@@ -0,0 +1,26 @@
+"""Index token_blocklist.revoked_at
+
+Revision ID: 35e66e98c5e8
+Revises: f33cd6dc6837
+Create Date: 2026-10-18 04:20:15.497055
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '35e66e98c5e8'
+down_revision = 'f33cd6dc6837'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_token_blocklist_revoked_at'), ['revoked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('token_blocklist', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_token_blocklist_revoked_at'))
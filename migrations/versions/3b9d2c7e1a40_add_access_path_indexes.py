@@ -0,0 +1,34 @@
+"""Add access path indexes
+
+Revision ID: 3b9d2c7e1a40
+Revises: f6cefdb5c24a
+Create Date: 2026-10-18 09:12:31.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2c7e1a40'
+down_revision = 'f6cefdb5c24a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # workouts are always read per user, newest first (list, reports, keyset cursor)
+    op.create_index('ix_workouts_user_id_created_at', 'workouts', ['user_id', 'created_at'], unique=False)
+    # serialize_workout / report joins go workout -> its exercise rows
+    op.create_index('ix_workout_exercises_workout_id', 'workout_exercises', ['workout_id'], unique=False)
+    # exercise progress filters one exercise, then joins back to the user's workouts
+    op.create_index('ix_workout_exercises_exercise_id_workout_id', 'workout_exercises', ['exercise_id', 'workout_id'], unique=False)
+    # per-workout schedules and upcoming (time-range) lookups
+    op.create_index('ix_scheduled_workouts_workout_id_scheduled_at', 'scheduled_workouts', ['workout_id', 'scheduled_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_scheduled_workouts_workout_id_scheduled_at', table_name='scheduled_workouts')
+    op.drop_index('ix_workout_exercises_exercise_id_workout_id', table_name='workout_exercises')
+    op.drop_index('ix_workout_exercises_workout_id', table_name='workout_exercises')
+    op.drop_index('ix_workouts_user_id_created_at', table_name='workouts')
@@ -0,0 +1,30 @@
+"""Add workouts.updated_at and workouts.revision
+
+Revision ID: 5d0e8a6f7c13
+Revises: c57a1d93e0b2
+Create Date: 2026-10-18 12:40:52.118604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d0e8a6f7c13'
+down_revision = 'c57a1d93e0b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('workouts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('revision', sa.Integer(), server_default='1', nullable=False))
+
+    op.execute('UPDATE workouts SET updated_at = created_at')
+
+
+def downgrade():
+    with op.batch_alter_table('workouts', schema=None) as batch_op:
+        batch_op.drop_column('revision')
+        batch_op.drop_column('updated_at')
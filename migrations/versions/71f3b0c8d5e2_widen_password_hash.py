@@ -0,0 +1,34 @@
+"""Widen users.password_hash
+
+scrypt hashes from werkzeug >= 3 are 162 characters long.
+
+Revision ID: 71f3b0c8d5e2
+Revises: e93b7d2a4f16
+Create Date: 2026-10-18 16:21:37.058112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '71f3b0c8d5e2'
+down_revision = 'e93b7d2a4f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=128),
+               type_=sa.String(length=255),
+               existing_nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('password_hash',
+               existing_type=sa.String(length=255),
+               type_=sa.String(length=128),
+               existing_nullable=False)
@@ -0,0 +1,66 @@
+"""Add report rollups
+
+Revision ID: 8e41f0b6c2d9
+Revises: 3b9d2c7e1a40
+Create Date: 2026-10-18 10:03:47.581930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e41f0b6c2d9'
+down_revision = '3b9d2c7e1a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('workouts', sa.Integer(), nullable=False),
+    sa.Column('sets', sa.Integer(), nullable=False),
+    sa.Column('reps', sa.Integer(), nullable=False),
+    sa.Column('volume', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table('user_exercise_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('entries', sa.Integer(), nullable=False),
+    sa.Column('max_weight', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'exercise_id')
+    )
+
+    # backfill from existing history (same as `flask rollups rebuild`)
+    op.execute(
+        """
+        INSERT INTO user_stats (user_id, workouts, sets, reps, volume)
+        SELECT w.user_id,
+               COUNT(DISTINCT w.id),
+               COALESCE(SUM(we.sets), 0),
+               COALESCE(SUM(we.reps), 0),
+               COALESCE(SUM(we.sets * we.reps * COALESCE(we.weight, 0)), 0)
+        FROM workouts w
+        LEFT JOIN workout_exercises we ON we.workout_id = w.id
+        GROUP BY w.user_id
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO user_exercise_stats (user_id, exercise_id, entries, max_weight)
+        SELECT w.user_id, we.exercise_id, COUNT(we.id), COALESCE(MAX(we.weight), 0)
+        FROM workout_exercises we
+        JOIN workouts w ON w.id = we.workout_id
+        GROUP BY w.user_id, we.exercise_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('user_exercise_stats')
+    op.drop_table('user_stats')
@@ -0,0 +1,26 @@
+"""Add users.feed_version
+
+Revision ID: 9717247743bc
+Revises: 35e66e98c5e8
+Create Date: 2026-10-18 04:33:38.175926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9717247743bc'
+down_revision = '35e66e98c5e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('feed_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('feed_version')
@@ -0,0 +1,26 @@
+"""Add users.timezone
+
+Revision ID: a2c4e6f81b37
+Revises: 5d0e8a6f7c13
+Create Date: 2026-10-18 13:55:19.472630
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a2c4e6f81b37'
+down_revision = '5d0e8a6f7c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('timezone', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('timezone')
@@ -0,0 +1,42 @@
+"""Add schedule recurrence and exceptions
+
+Revision ID: c3b1005042fa
+Revises: d4a7c1e9b352
+Create Date: 2026-10-18 03:57:02.460031
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3b1005042fa'
+down_revision = 'd4a7c1e9b352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('schedule_exceptions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('schedule_id', sa.Integer(), nullable=False),
+    sa.Column('occurrence_at', sa.DateTime(), nullable=False),
+    sa.Column('rescheduled_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['schedule_id'], ['scheduled_workouts.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('schedule_id', 'occurrence_at')
+    )
+    with op.batch_alter_table('scheduled_workouts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurrence', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('timezone', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('ends_at', sa.DateTime(), nullable=True))
+
+
+
+def downgrade():
+    with op.batch_alter_table('scheduled_workouts', schema=None) as batch_op:
+        batch_op.drop_column('ends_at')
+        batch_op.drop_column('timezone')
+        batch_op.drop_column('recurrence')
+
+    op.drop_table('schedule_exceptions')
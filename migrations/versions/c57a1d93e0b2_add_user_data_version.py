@@ -0,0 +1,26 @@
+"""Add users.data_version
+
+Revision ID: c57a1d93e0b2
+Revises: 8e41f0b6c2d9
+Create Date: 2026-10-18 11:26:05.339412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c57a1d93e0b2'
+down_revision = '8e41f0b6c2d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
@@ -0,0 +1,54 @@
+"""Add personal_records
+
+Revision ID: e93b7d2a4f16
+Revises: a2c4e6f81b37
+Create Date: 2026-10-18 15:08:44.916273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93b7d2a4f16'
+down_revision = 'a2c4e6f81b37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('personal_records',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('exercise_id', sa.Integer(), nullable=False),
+    sa.Column('reps', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('weight', sa.Float(), nullable=False),
+    sa.Column('workout_id', sa.Integer(), nullable=False),
+    sa.Column('achieved_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['exercise_id'], ['exercises.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['workout_id'], ['workouts.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'exercise_id', 'reps')
+    )
+
+    # backfill from existing history (same as `flask rollups rebuild`)
+    op.execute(
+        """
+        INSERT INTO personal_records (user_id, exercise_id, reps, weight, workout_id, achieved_at)
+        SELECT user_id, exercise_id, reps, weight, workout_id, created_at
+        FROM (
+            SELECT w.user_id, we.exercise_id, we.reps,
+                   COALESCE(we.weight, 0) AS weight, w.id AS workout_id, w.created_at,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY w.user_id, we.exercise_id, we.reps
+                       ORDER BY COALESCE(we.weight, 0) DESC, w.created_at, w.id
+                   ) AS rn
+            FROM workout_exercises we
+            JOIN workouts w ON w.id = we.workout_id
+        ) ranked
+        WHERE rn = 1
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('personal_records')
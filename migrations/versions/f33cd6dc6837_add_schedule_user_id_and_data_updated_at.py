@@ -0,0 +1,44 @@
+"""Add scheduled_workouts.user_id and users.data_updated_at
+
+Revision ID: f33cd6dc6837
+Revises: c3b1005042fa
+Create Date: 2026-10-18 04:02:23.605161
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f33cd6dc6837'
+down_revision = 'c3b1005042fa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('scheduled_workouts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('user_id', sa.Integer(), nullable=True))
+
+    op.execute(
+        'UPDATE scheduled_workouts SET user_id = '
+        '(SELECT workouts.user_id FROM workouts WHERE workouts.id = scheduled_workouts.workout_id)'
+    )
+
+    with op.batch_alter_table('scheduled_workouts', schema=None) as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index('ix_scheduled_workouts_user_id_scheduled_at', ['user_id', 'scheduled_at'], unique=False)
+        batch_op.create_foreign_key('fk_scheduled_workouts_user_id_users', 'users', ['user_id'], ['id'])
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_updated_at')
+
+    with op.batch_alter_table('scheduled_workouts', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_scheduled_workouts_user_id_users', type_='foreignkey')
+        batch_op.drop_index('ix_scheduled_workouts_user_id_scheduled_at')
+        batch_op.drop_column('user_id')
@@ -0,0 +1,138 @@
+# src/analytics.py
+"""
+Vectorized strength analytics for /reports/exercise/<id>/progress.
+
+A user's whole history for one exercise is pulled once as Core rows and
+turned into NumPy arrays; per-set estimated 1RM, per-day aggregates,
+rolling averages, trend and PR flags are then computed in batch. Days are
+local calendar days using the zone's current UTC offset (the same
+approximation the SQLite bucketing in src/timebuckets.py makes).
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import select
+
+from src.model import db, Workout, WorkoutExercise
+
+FORMULAS = ("epley", "brzycki")
+METRICS = ("e1rm", "rolling", "trend", "pr")
+ROLLING_WINDOWS = (7, 28)
+
+
+def load_sets(user_id, exercise_id):
+    """All of the user's entries for one exercise as parallel arrays, oldest first."""
+    rows = db.session.execute(
+        select(
+            Workout.created_at,
+            WorkoutExercise.sets,
+            WorkoutExercise.reps,
+            WorkoutExercise.weight,
+        )
+        .join(Workout, Workout.id == WorkoutExercise.workout_id)
+        .where(Workout.user_id == user_id, WorkoutExercise.exercise_id == exercise_id)
+        .order_by(Workout.created_at)
+    ).all()
+    if not rows:
+        empty = np.array([], dtype=float)
+        return np.array([], dtype="datetime64[us]"), empty, empty, empty
+
+    created_at, sets, reps, weight = zip(*rows)
+    return (
+        np.array(created_at, dtype="datetime64[us]"),
+        np.array(sets, dtype=float),
+        np.array(reps, dtype=float),
+        np.array([w or 0.0 for w in weight], dtype=float),
+    )
+
+
+def estimate_1rm(weight, reps, formula="epley"):
+    """Estimated one-rep max per set; a single rep is the lift itself."""
+    if formula == "brzycki":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            est = np.where(reps < 37, weight * 36.0 / (37.0 - reps), np.nan)
+    else:
+        est = weight * (1.0 + reps / 30.0)
+    return np.where(reps == 1, weight, est)
+
+
+def rolling_mean(day_nums, values, window_days):
+    """Mean of `values` over the trailing `window_days` calendar days ending at each day."""
+    left = np.searchsorted(day_nums, day_nums - window_days + 1, side="left")
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    idx = np.arange(len(values))
+    return (csum[idx + 1] - csum[left]) / (idx + 1 - left)
+
+
+def pr_flags(values):
+    """True where a day beats every earlier day."""
+    if len(values) == 0:
+        return np.array([], dtype=bool)
+    prev_best = np.concatenate(([-np.inf], np.maximum.accumulate(values)[:-1]))
+    return values > prev_best
+
+
+def trend(day_nums, values):
+    """Least-squares slope (per week) and R² of `values` over time."""
+    if len(values) < 2 or np.ptp(day_nums) == 0:
+        return None
+    slope, intercept = np.polyfit(day_nums, values, 1)
+    fitted = slope * day_nums + intercept
+    ss_tot = np.sum((values - values.mean()) ** 2)
+    r2 = 1.0 - np.sum((values - fitted) ** 2) / ss_tot if ss_tot else 1.0
+    return {"slope_per_week": float(slope * 7), "r2": float(r2)}
+
+
+def daily_summary(created_at, sets, reps, weight, offset, formula="epley"):
+    """Collapse per-set arrays into per-local-day arrays."""
+    local_days = (created_at + np.timedelta64(offset, "m")).astype("datetime64[D]")
+    if len(local_days) == 0:
+        empty = np.array([], dtype=float)
+        return local_days, empty, empty, empty
+    # rows are time-ordered, so each day is a contiguous run
+    starts = np.flatnonzero(np.concatenate(([True], local_days[1:] != local_days[:-1])))
+    days = local_days[starts]
+    e1rm = np.nan_to_num(estimate_1rm(weight, reps, formula))
+    return (
+        days,
+        np.maximum.reduceat(weight, starts),
+        np.add.reduceat(sets * reps * weight, starts),
+        np.maximum.reduceat(e1rm, starts),
+    )
+
+
+def progress(user_id, exercise_id, zone, window_days, metrics, formula="epley"):
+    """Per-day series for the last `window_days` local days plus requested metrics.
+
+    PRs, rolling averages and the trend see the full history, so the first
+    days of the window are judged against everything that came before.
+    """
+    offset = int((datetime.now(zone).utcoffset() or timedelta(0)).total_seconds() // 60)
+    days, best_weight, volume, best_e1rm = daily_summary(
+        *load_sets(user_id, exercise_id), offset=offset, formula=formula
+    )
+    day_nums = days.astype("int64")
+
+    today = np.datetime64(datetime.now(zone).date(), "D")
+    in_window = days > today - np.timedelta64(window_days, "D")
+
+    columns = {"best_weight": best_weight, "volume": volume}
+    if "e1rm" in metrics:
+        columns["e1rm"] = best_e1rm
+    if "rolling" in metrics:
+        for w in ROLLING_WINDOWS:
+            columns[f"e1rm_avg_{w}d"] = rolling_mean(day_nums, best_e1rm, w)
+    if "pr" in metrics:
+        columns["pr"] = pr_flags(best_e1rm)
+
+    idx = np.flatnonzero(in_window)
+    names = ["day", *columns]
+    values = [days[idx].astype(str).tolist()] + [
+        (col[idx] if col.dtype == bool else np.round(col[idx], 2)).tolist()
+        for col in columns.values()
+    ]
+    series = [dict(zip(names, row)) for row in zip(*values)]
+    result = {"series": series, "formula": formula}
+    if "trend" in metrics:
+        result["trend"] = trend(day_nums[in_window], best_e1rm[in_window])
+    return result
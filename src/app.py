@@ -40,6 +40,8 @@ def create_app():
         "DATABASE_URL", f"sqlite:///{db_file}"
     )
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    if os.getenv("DATABASE_REPLICA_URL"):
+        app.config["SQLALCHEMY_BINDS"] = {"replica": os.getenv("DATABASE_REPLICA_URL")}
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET", "change-me")
 
     # — Extensions —
@@ -47,7 +49,35 @@ def create_app():
 
     db.init_app(app)
     Migrate(app, db)
-    JWTManager(app)
+    jwt = JWTManager(app)
+
+    from src import (
+        batch,
+        cache,
+        catalog,
+        hashing,
+        identity,
+        metrics,
+        profiling,
+        recurrence,
+        replica,
+        revocation,
+        rollups,
+        sqlite,
+    )
+
+    sqlite.init_app(app)
+    metrics.init_app(app, db)
+    profiling.init_app(app)
+    cache.init_app(app)
+    catalog.init_app(app)
+    recurrence.init_app(app)
+    batch.init_app(app)
+    replica.init_app(app)
+    hashing.init_app(app)
+    identity.init_app(app, jwt)
+    revocation.init_app(app, jwt)
+    rollups.init_app(app)
 
     # — Blueprints —
     from src.auth import auth_bp
@@ -62,10 +92,27 @@ def create_app():
 
     app.register_blueprint(reports_bp)
 
+    from src.ical import calendar_bp
+
+    app.register_blueprint(calendar_bp)
+
+    from src.batch import batch_bp
+
+    app.register_blueprint(batch_bp)
+
     from src.ui import ui_bp
 
     app.register_blueprint(ui_bp)
 
+    # — CLI —
+    from src.rollups import rollups_cli
+
+    app.cli.add_command(rollups_cli)
+
+    from src.revocation import tokens_cli
+
+    app.cli.add_command(tokens_cli)
+
     @app.route("/")
     def home():
         return "🏋️‍♂️ Workout Tracker API is live!"
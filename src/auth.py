@@ -1,9 +1,18 @@
 # src/auth.py
+from datetime import datetime
+
 from flask import Blueprint, request, jsonify
 from src.model import db, User
+from src.cache import bump_data_version
+from src.hashing import HashPoolBusy
+from src.revocation import revoke_token, revoke_user
+from src.sqlite import serialized_write
+from src.timebuckets import InvalidTimezone, get_zone
 from flask_jwt_extended import (
     create_access_token,
+    current_user,
     jwt_required,
+    get_jwt,
     get_jwt_identity,
 )
 
@@ -20,9 +29,26 @@ def signup():
 
     if User.query.filter_by(email=email).first():
         return jsonify(msg="Email already registered"), 409
+    # end the read snapshot: the insert below runs as its own IMMEDIATE
+    # transaction, so the write lock is never held while the KDF runs
+    db.session.rollback()
+
+    tz = data.get("timezone")
+    if tz:
+        try:
+            get_zone(tz)
+        except InvalidTimezone as e:
+            return jsonify(msg=str(e)), 400
 
-    user = User(email=email)
+    user = User(email=email, timezone=tz)
     user.set_password(password)
+    return _create_user(user)
+
+
+@serialized_write
+def _create_user(user):
+    if User.query.filter_by(email=user.email).first():
+        return jsonify(msg="Email already registered"), 409
     db.session.add(user)
     db.session.commit()
 
@@ -57,21 +83,134 @@ def login():
             access_token: {type: string}
       401:
         description: Bad email or password
+      503:
+        description: Too many logins in flight; retry after the Retry-After delay
     """
     data = request.get_json() or {}
     email = data.get("email")
     password = data.get("password")
     user = User.query.filter_by(email=email).first()
-    if not user or not user.check_password(password):
+    if not user or not password or not user.check_password(password):
         return jsonify(msg="Bad email or password"), 401
 
+    # transparently upgrade hashes made with an older method or cost
+    if user.password_needs_rehash():
+        try:
+            user.set_password(password)
+            db.session.commit()
+        except HashPoolBusy:
+            db.session.rollback()
+
     token = create_access_token(identity=str(user.id))
     return jsonify(access_token=token), 200
 
 
+@auth_bp.route("/logout", methods=["POST"])
+@jwt_required()
+@serialized_write
+def logout():
+    """
+    Revoke the presented token (or every token of the user)
+    ---
+    tags: [Auth]
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            all: {type: boolean, description: Also revoke the user's other tokens}
+    responses:
+      200:
+        description: Token revoked
+    """
+    data = request.get_json(silent=True) or {}
+    if data.get("all"):
+        revoke_user(current_user.id)
+    else:
+        claims = get_jwt()
+        revoke_token(
+            claims["jti"],
+            user_id=current_user.id,
+            expires_at=datetime.utcfromtimestamp(claims["exp"]) if "exp" in claims else None,
+        )
+    return jsonify(msg="Logged out"), 200
+
+
+@auth_bp.route("/revoke", methods=["POST"])
+@jwt_required()
+@serialized_write
+def revoke():
+    """
+    Admin: revoke a token by jti, or every current token of a user
+    ---
+    tags: [Auth]
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            jti:     {type: string}
+            user_id: {type: integer}
+    responses:
+      200:
+        description: Revoked
+      400:
+        description: Neither jti nor user_id given, or user_id is not an integer
+      403:
+        description: Caller is not an admin
+      404:
+        description: No such user
+    """
+    if not current_user.is_admin:
+        return jsonify(msg="Admin privileges required"), 403
+    data = request.get_json() or {}
+    if data.get("user_id") is not None:
+        if not isinstance(data["user_id"], int) or isinstance(data["user_id"], bool):
+            return jsonify(msg="user_id must be an integer"), 400
+        user = db.session.get(User, data["user_id"])
+        if user is None:
+            return jsonify(msg="User not found"), 404
+        revoke_user(user.id)
+    elif data.get("jti"):
+        revoke_token(data["jti"])
+    else:
+        return jsonify(msg="jti or user_id required"), 400
+    return jsonify(msg="Revoked"), 200
+
+
 @auth_bp.route("/me", methods=["GET"])
 @jwt_required()
 def me():
-    user_id = get_jwt_identity()
-    user = User.query.get(str(user_id))
-    return jsonify(id=user.id, email=user.email), 200
+    # current_user is the cached Identity resolved by src/identity.py
+    return (
+        jsonify(id=current_user.id, email=current_user.email, timezone=current_user.timezone),
+        200,
+    )
+
+
+@auth_bp.route("/me", methods=["PUT"])
+@jwt_required()
+@serialized_write
+def update_me():
+    """Update profile settings (currently the timezone used by reports)."""
+    user = db.session.get(User, int(get_jwt_identity()))
+    data = request.get_json() or {}
+    if "timezone" in data:
+        tz = data["timezone"] or None
+        if tz:
+            try:
+                get_zone(tz)
+            except InvalidTimezone as e:
+                return jsonify(msg=str(e)), 400
+        user.timezone = tz
+        bump_data_version(user.id)  # cached reports were bucketed in the old zone
+    db.session.commit()
+    return jsonify(id=user.id, email=user.email, timezone=user.timezone), 200
@@ -0,0 +1,253 @@
+# src/batch.py
+"""
+POST /batch: run an ordered list of API calls in one HTTP request.
+
+    {"atomic": true,
+     "requests": [
+        {"method": "POST", "path": "/workouts", "body": {...}},
+        {"method": "POST", "path": "/workouts/$0.id/schedule", "body": {...}},
+        {"method": "GET",  "path": "/reports/overview"}]}
+
+Each item is dispatched in-process to the workouts and reports views in
+its own request context. The batch's JWT is verified once, by POST /batch
+itself, and items run the views below their @jwt_required() against that
+identity. "$<n>.<field>" in a path, or as a whole string value in a body,
+is replaced with that field of item n's response body. An item that
+refers to a failed item is not run (424). An item whose view raises is
+logged and answers 500, with its session rolled back; it does not fail the
+whole POST /batch, since earlier items may already have committed.
+
+By default every item commits on its own, as if sent separately. With
+"atomic": true the whole batch is one database transaction. Items commit
+only to a SAVEPOINT, and the first failing item (status >= 400) rolls
+everything back. The items after it are not run. Report-cache writes are
+off during an atomic batch: a report computed from writes that may still
+roll back must not be cached under a data_version that will be reused.
+"""
+import os
+import re
+
+from flask import Blueprint, current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from werkzeug.exceptions import HTTPException
+
+from src.model import db
+from src.replica import SAFE_METHODS, note_write
+
+batch_bp = Blueprint("batch", __name__)
+
+BATCH_BLUEPRINTS = ("workouts", "reports")
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+
+# every @jwt_required() wrapper shares this code object
+_JWT_WRAPPER = jwt_required()(lambda: None).__code__
+_REFERENCE = re.compile(r"\$(\d+)((?:\.\w+)+)")
+
+
+class BadReference(LookupError):
+    pass
+
+
+def init_app(app):
+    app.config.setdefault("BATCH_MAX_REQUESTS", int(os.getenv("BATCH_MAX_REQUESTS", 20)))
+
+
+# — References to earlier results —
+
+
+def _lookup(results, index, fields):
+    if index >= len(results) or results[index]["status"] >= 400:
+        raise BadReference(f"${index} did not succeed")
+    value = results[index]["body"]
+    for field in fields.split(".")[1:]:
+        try:
+            value = value[int(field) if isinstance(value, list) else field]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise BadReference(f"${index}{fields} not found")
+    return value
+
+
+def _resolve_path(path, results):
+    return _REFERENCE.sub(lambda m: str(_lookup(results, int(m[1]), m[2])), path)
+
+
+def _resolve_body(value, results):
+    if isinstance(value, str):
+        m = _REFERENCE.fullmatch(value)
+        return _lookup(results, int(m[1]), m[2]) if m else value
+    if isinstance(value, list):
+        return [_resolve_body(v, results) for v in value]
+    if isinstance(value, dict):
+        return {k: _resolve_body(v, results) for k, v in value.items()}
+    return value
+
+
+# — Dispatch —
+
+
+def _parse_items(data):
+    items = data.get("requests")
+    if not isinstance(items, list) or not items:
+        raise ValueError("requests must be a non-empty list")
+    limit = current_app.config["BATCH_MAX_REQUESTS"]
+    if len(items) > limit:
+        raise ValueError(f"at most {limit} requests per batch")
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get("path"), str):
+            raise ValueError(f"requests[{i}] needs a path")
+        if not item["path"].startswith("/"):
+            raise ValueError(f"requests[{i}].path must start with /")
+        if item.get("method", "GET").upper() not in METHODS:
+            raise ValueError(f"requests[{i}].method must be one of {', '.join(METHODS)}")
+    return items
+
+
+def _run(method, path, body):
+    """Dispatch one item in its own request context; returns (status, body)."""
+    with current_app.test_request_context(
+        path, method=method, json=body, base_url=request.host_url
+    ):
+        try:
+            if request.routing_exception is not None:
+                raise request.routing_exception
+            blueprint = request.blueprint
+            view = current_app.view_functions[request.endpoint]
+            if blueprint not in BATCH_BLUEPRINTS or view.__code__ is not _JWT_WRAPPER:
+                return 400, {"msg": f"{method} {request.path} cannot be batched"}
+            rv = current_app.ensure_sync(view.__wrapped__)(**request.view_args)
+            resp = current_app.make_response(rv)
+        except HTTPException as e:
+            return e.code, {"msg": e.description}
+        except Exception:
+            current_app.logger.exception("batch item %s %s failed", method, path)
+            db.session.rollback()
+            return 500, {"msg": "Internal Server Error"}
+        content = resp.get_json() if resp.is_json else resp.get_data(as_text=True)
+        return resp.status_code, content
+
+
+def _run_all(items, atomic):
+    results = []
+    for item in items:
+        if atomic and results and results[-1]["status"] >= 400:
+            results.append({"status": 424, "body": {"msg": "not run: the batch was rolled back"}})
+            continue
+        method = item.get("method", "GET").upper()
+        try:
+            path = _resolve_path(item["path"], results)
+            body = _resolve_body(item.get("body"), results)
+        except BadReference as e:
+            results.append({"status": 424, "body": {"msg": str(e)}})
+            continue
+        status, content = _run(method, path, body)
+        if status >= 400:
+            if not atomic:
+                db.session.rollback()  # drop anything the failed item left pending
+        elif method not in SAFE_METHODS:
+            # later items must not read the replica from before this write
+            note_write(get_jwt_identity())
+        results.append({"status": status, "body": content})
+    return results
+
+
+def _run_atomic(items):
+    """Run `items` in one transaction; returns (results, committed)."""
+    writes = any(item.get("method", "GET").upper() not in SAFE_METHODS for item in items)
+    # views commit as usual, which below only releases a SAVEPOINT
+    db.session.remove()
+    with db.engine.connect() as conn:
+        # a file-backed SQLite write transaction has to take the lock up front
+        g._serialized_write = writes
+        try:
+            transaction = conn.begin()
+        finally:
+            g._serialized_write = False
+        if conn.dialect.name == "sqlite" and not conn.connection.dbapi_connection.in_transaction:
+            # pysqlite defers BEGIN (src/sqlite.py emits it only for files), and a
+            # SAVEPOINT outside a transaction would commit on release
+            conn.exec_driver_sql("BEGIN IMMEDIATE" if writes else "BEGIN")
+        db.session.registry.set(
+            db.session.session_factory(bind=conn, join_transaction_mode="create_savepoint")
+        )
+        g._atomic_batch = True
+        try:
+            results = _run_all(items, atomic=True)
+            committed = all(r["status"] < 400 for r in results)
+            if committed:
+                db.session.commit()
+                transaction.commit()
+            else:
+                transaction.rollback()
+        except Exception:
+            transaction.rollback()
+            raise
+        finally:
+            g._atomic_batch = False
+            db.session.remove()
+    return results, committed
+
+
+@batch_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def run_batch():
+    """
+    Run several API calls in one request (optionally all-or-nothing)
+    ---
+    tags: [Batch]
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: body
+        name: batch
+        required: true
+        schema:
+          type: object
+          required: [requests]
+          properties:
+            atomic:
+              type: boolean
+              default: false
+              description: One transaction; the first failure rolls back every item
+            requests:
+              type: array
+              items:
+                type: object
+                required: [path]
+                properties:
+                  method: {type: string, default: GET}
+                  path:
+                    type: string
+                    example: "/workouts/$0.id/schedule"
+                    description: /workouts or /reports path; $<n>.<field> refers to item n
+                  body: {type: object}
+    responses:
+      200:
+        description: Per-item results, in order
+        schema:
+          type: object
+          properties:
+            atomic:    {type: boolean}
+            committed: {type: boolean, description: false if an atomic batch was rolled back}
+            responses:
+              type: array
+              items:
+                type: object
+                properties:
+                  status: {type: integer}
+                  body:   {type: object}
+      400:
+        description: Malformed batch
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        items = _parse_items(data)
+    except ValueError as e:
+        return jsonify(msg=str(e)), 400
+
+    atomic = bool(data.get("atomic", False))
+    if atomic:
+        results, committed = _run_atomic(items)
+    else:
+        results = _run_all(items, atomic=False)
+        committed = True
+    return jsonify(atomic=atomic, committed=committed, responses=results)
@@ -0,0 +1,244 @@
+# src/cache.py
+"""
+Response cache for the /reports endpoints.
+
+Entries are keyed on (user, endpoint, params, user timezone, user data
+version). Every workout write bumps User.data_version in the same
+transaction, so a cached report can never outlive the data it was computed
+from; the TTL only bounds how long time-relative windows ("last 30 days")
+may lag. The timezone is the one the view buckets by, taken from
+`current_user`: another worker's identity cache may still hold the old one
+after a PUT /auth/me, and its report must not be served under the new zone.
+
+Backends:
+  memory  - per-process LRU with TTL (default)
+  sqlite  - a local SQLite file shared by all gunicorn workers on the host
+  none    - caching disabled
+"""
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+
+from flask import current_app, g, request
+from flask_jwt_extended import current_user, get_jwt_identity
+from sqlalchemy import update
+
+from src.metrics import record_cache_lookup
+from src.model import db, User
+
+
+class MemoryBackend:
+    """Thread-safe LRU with per-entry expiry, private to one worker process."""
+
+    name = "memory"
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteBackend:
+    """Cache table in a local SQLite file, visible to every worker process."""
+
+    name = "sqlite"
+    PRUNE_EVERY = 256  # sets between expired/overflow sweeps
+
+    def __init__(self, path, max_entries=10000, ttl=300):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        self._sets = 0
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires ON cache (expires)")
+
+    def _conn(self):
+        # one connection per thread, reopened after a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM cache WHERE key = ? AND expires >= ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl=None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, value, time.time() + (self.ttl if ttl is None else ttl)),
+        )
+        self._sets += 1
+        if self._sets % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def prune(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires < ?", (time.time(),))
+        conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            " SELECT key FROM cache ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache")
+
+
+class ReportCache:
+    """Backend plus per-process hit/miss counters."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        record_cache_lookup("report", value is not None)
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": self.backend.name if self.backend else "none",
+            "pid": os.getpid(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+def init_app(app):
+    app.config.setdefault("REPORT_CACHE_BACKEND", os.getenv("REPORT_CACHE_BACKEND", "memory"))
+    app.config.setdefault("REPORT_CACHE_TTL", int(os.getenv("REPORT_CACHE_TTL", 300)))
+    app.config.setdefault(
+        "REPORT_CACHE_MAX_ENTRIES", int(os.getenv("REPORT_CACHE_MAX_ENTRIES", 1024))
+    )
+    app.config.setdefault(
+        "REPORT_CACHE_PATH",
+        os.getenv(
+            "REPORT_CACHE_PATH", os.path.join(app.instance_path, "report_cache.sqlite3")
+        ),
+    )
+
+    kind = app.config["REPORT_CACHE_BACKEND"]
+    ttl = app.config["REPORT_CACHE_TTL"]
+    max_entries = app.config["REPORT_CACHE_MAX_ENTRIES"]
+    if kind == "memory":
+        backend = MemoryBackend(max_entries=max_entries, ttl=ttl)
+    elif kind == "sqlite":
+        backend = SQLiteBackend(
+            app.config["REPORT_CACHE_PATH"], max_entries=max_entries, ttl=ttl
+        )
+    elif kind == "none":
+        backend = None
+    else:
+        raise ValueError(f"unknown REPORT_CACHE_BACKEND {kind!r}")
+
+    app.extensions["report_cache"] = ReportCache(backend)
+
+
+def get_cache():
+    return current_app.extensions["report_cache"]
+
+
+def bump_data_version(user_id):
+    """Invalidate every cached report for `user_id`; call inside the write's transaction."""
+    db.session.execute(
+        update(User)
+        .where(User.id == int(user_id))
+        .values(data_version=User.data_version + 1, data_updated_at=datetime.utcnow())
+    )
+
+
+def _cache_key(user_id, version):
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True)))
+    path_args = ",".join(f"{k}={v}" for k, v in sorted(request.view_args.items()))
+    zone = current_user.timezone or ""
+    return f"report:{user_id}:{request.endpoint}:{path_args}:{params}:{zone}:v{version}"
+
+
+def cached_report(view):
+    """Serve a JSON report view from the report cache. Apply below @jwt_required()."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = get_cache()
+        if not cache.enabled or g.get("_atomic_batch", False):
+            # inside an atomic POST /batch (src/batch.py) the data may still roll back
+            return view(*args, **kwargs)
+
+        user_id = int(get_jwt_identity())
+        version = (
+            db.session.query(User.data_version).filter(User.id == user_id).scalar()
+        )
+        key = _cache_key(user_id, version)
+        body = cache.get(key)
+        if body is not None:
+            return current_app.response_class(body, mimetype="application/json")
+
+        resp = current_app.make_response(view(*args, **kwargs))
+        if resp.status_code == 200:
+            cache.set(key, resp.get_data())
+        return resp
+
+    return wrapper
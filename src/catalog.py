@@ -0,0 +1,52 @@
+# src/catalog.py
+"""
+Per-process cache of the exercise catalog (id -> name).
+
+Workout writes validate every referenced exercise_id and echo its name in
+the response. The catalog is small and almost never changes, so names are
+kept in a TTL cache (EXERCISE_CATALOG_TTL) and only ids missing from it
+are fetched, all at once with a single `IN` query. Exercises changed
+through the ORM are evicted from this process's cache immediately.
+"""
+import os
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+
+from src.cache import MemoryBackend
+from src.metrics import record_cache_lookup
+from src.model import db, Exercise
+
+
+def init_app(app):
+    app.config.setdefault("EXERCISE_CATALOG_TTL", int(os.getenv("EXERCISE_CATALOG_TTL", 600)))
+    app.extensions["exercise_catalog"] = MemoryBackend(
+        max_entries=10000, ttl=app.config["EXERCISE_CATALOG_TTL"]
+    )
+
+
+def exercise_names(ids):
+    """{exercise_id: name} for the ids that exist; unknown ids are left out."""
+    cache = current_app.extensions["exercise_catalog"]
+    names, missing = {}, []
+    for exercise_id in set(ids):
+        name = cache.get(exercise_id)
+        record_cache_lookup("exercise", name is not None)
+        if name is None:
+            missing.append(exercise_id)
+        else:
+            names[exercise_id] = name
+    if missing:
+        for exercise_id, name in db.session.execute(
+            select(Exercise.id, Exercise.name).where(Exercise.id.in_(missing))
+        ):
+            cache.set(exercise_id, name)
+            names[exercise_id] = name
+    return names
+
+
+@event.listens_for(Exercise, "after_update")
+@event.listens_for(Exercise, "after_delete")
+def _evict(_mapper, _connection, target):
+    if has_app_context():
+        current_app.extensions["exercise_catalog"].delete(target.id)
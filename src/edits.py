@@ -0,0 +1,284 @@
+# src/edits.py
+"""
+Workout writes: creation (POST /workouts) and incremental edits to a
+workout's exercise entries (PUT and PATCH /workouts/<wid>).
+
+create_workout() validates every exercise_id against the cached catalog
+(src/catalog.py), inserts the workout and all its entries with one
+INSERT ... RETURNING each and builds the response from what it wrote, so
+its statement count does not grow with the number of entries.
+
+The edit endpoints reduce the request to an EntryDiff - entries to insert,
+fields to change on existing entries (only values that actually differ)
+and entries to delete - so an edit that touches one set writes one row.
+Existing entries keep their ids. Each kind of change goes out as one
+batched statement (new entries through the same INSERT ... RETURNING as
+creation), and rollups and personal records are adjusted by the rows that
+changed:
+
+    diff = diff_entries(w.exercises, payload["exercises"])   # PUT: full list
+    fields, diff = parse_patch(w, ops)                        # PATCH: ops
+    apply_diff(user_id, w, diff)                              # caller commits
+
+PATCH bodies are JSON-patch style (RFC 6902 operations) but address entries
+by id rather than by array position, so concurrent edits cannot shift the
+target:
+
+    {"op": "replace", "path": "/title", "value": "Leg day"}
+    {"op": "add", "path": "/exercises/-", "value": {"exercise_id": 1, "sets": 3, "reps": 5}}
+    {"op": "replace", "path": "/exercises/17", "value": {"weight": 105}}
+    {"op": "replace", "path": "/exercises/17/reps", "value": 6}
+    {"op": "remove", "path": "/exercises/17"}
+"""
+import math
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src import catalog, records, rollups
+from src.cache import bump_data_version
+from src.model import db, Workout, WorkoutExercise
+
+EntryDiff = namedtuple("EntryDiff", "inserts updates deletes")
+Snapshot = namedtuple("Snapshot", "exercise_id sets reps weight")
+
+ENTRY_FIELDS = ("exercise_id", "sets", "reps", "weight")
+
+
+class InvalidEdit(ValueError):
+    """The edit cannot be applied; the message is safe to return to the client."""
+
+
+# — Parsing —
+
+
+def _parse_field(name, value):
+    if name == "weight":
+        if value is None:
+            return 0
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise InvalidEdit("weight must be a number")
+        # NaN and infinity would poison the rollups and records, and are not JSON
+        if not math.isfinite(value) or value < 0:
+            raise InvalidEdit("weight must be a finite, non-negative number")
+        return value
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise InvalidEdit(f"{name} must be an integer")
+    if name != "exercise_id" and value < 0:
+        raise InvalidEdit(f"{name} must not be negative")
+    return value
+
+
+def _parse_entry(item, partial):
+    """Entry fields from a client dict; unknown keys (id, exercise_name) are ignored."""
+    if not isinstance(item, dict):
+        raise InvalidEdit("exercise entries must be objects")
+    if not partial:
+        missing = [f for f in ("exercise_id", "sets", "reps") if f not in item]
+        if missing:
+            raise InvalidEdit(f"exercise missing {missing[0]}")
+        item = {"weight": 0, **item}
+    return {f: _parse_field(f, item[f]) for f in ENTRY_FIELDS if f in item}
+
+
+def _check_exercises(entries):
+    """Return {exercise_id: name} for `entries`, rejecting unknown ids."""
+    ids = {e["exercise_id"] for e in entries if "exercise_id" in e}
+    names = catalog.exercise_names(ids)
+    unknown = sorted(ids - names.keys())
+    if unknown:
+        raise InvalidEdit(f"unknown exercise_id {unknown[0]}")
+    return names
+
+
+def _changed(entry, fields):
+    return {k: v for k, v in fields.items() if getattr(entry, k) != v}
+
+
+def diff_entries(existing, items):
+    """Diff a full replacement list against `existing` entries.
+
+    Items carrying the `id` of an existing entry update it (omitted fields
+    are kept); items without an id are inserted; existing entries that are
+    not listed are deleted.
+    """
+    if not isinstance(items, list):
+        raise InvalidEdit("exercises must be a list")
+    by_id = {e.id: e for e in existing}
+    inserts, updates, seen = [], [], set()
+    for item in items:
+        entry_id = item.get("id") if isinstance(item, dict) else None
+        if entry_id is None:
+            inserts.append(_parse_entry(item, partial=False))
+            continue
+        entry = by_id.get(entry_id)
+        if entry is None:
+            raise InvalidEdit(f"unknown exercise entry {entry_id}")
+        if entry_id in seen:
+            raise InvalidEdit(f"exercise entry {entry_id} listed twice")
+        seen.add(entry_id)
+        changes = _changed(entry, _parse_entry(item, partial=True))
+        if changes:
+            updates.append((entry, changes))
+    deletes = [e for e in existing if e.id not in seen]
+    _check_exercises(inserts + [c for _, c in updates])
+    return EntryDiff(inserts, updates, deletes)
+
+
+def _entry_ref(path, by_id):
+    # "/exercises/<id>[/<field>]" -> (entry, field or None)
+    parts = path.split("/")[2:]
+    try:
+        entry = by_id[int(parts[0])]
+    except (IndexError, ValueError, KeyError):
+        raise InvalidEdit(f"no exercise entry at {path}")
+    field = parts[1] if len(parts) > 1 else None
+    if len(parts) > 2 or (field is not None and field not in ENTRY_FIELDS):
+        raise InvalidEdit(f"invalid path {path}")
+    return entry, field
+
+
+def parse_patch(w, ops):
+    """Turn a list of patch operations into (workout field changes, EntryDiff)."""
+    if not isinstance(ops, list) or not ops:
+        raise InvalidEdit("body must be a non-empty list of patch operations")
+    by_id = {e.id: e for e in w.exercises}
+    fields, inserts, changes, removed = {}, [], {}, set()
+    for op in ops:
+        if not isinstance(op, dict) or not isinstance(op.get("path"), str):
+            raise InvalidEdit("each operation needs an op and a path")
+        kind, path, value = op.get("op"), op["path"], op.get("value")
+
+        if path in ("/title", "/notes"):
+            name = path[1:]
+            if kind == "remove" and name == "notes":
+                value = None
+            elif kind not in ("add", "replace"):
+                raise InvalidEdit(f"unsupported op {kind!r} for {path}")
+            if name == "title" and (not isinstance(value, str) or not value):
+                raise InvalidEdit("title must be a non-empty string")
+            if name == "notes" and value is not None and not isinstance(value, str):
+                raise InvalidEdit("notes must be a string")
+            fields[name] = value
+        elif path == "/exercises/-":
+            if kind != "add":
+                raise InvalidEdit(f"unsupported op {kind!r} for {path}")
+            inserts.append(_parse_entry(value, partial=False))
+        elif path.startswith("/exercises/"):
+            entry, field = _entry_ref(path, by_id)
+            if entry.id in removed:
+                raise InvalidEdit(f"exercise entry {entry.id} was already removed")
+            if kind == "remove" and field is None:
+                removed.add(entry.id)
+                changes.pop(entry.id, None)
+            elif kind == "replace":
+                value = {field: value} if field else value
+                changes.setdefault(entry.id, {}).update(_parse_entry(value, partial=True))
+            else:
+                raise InvalidEdit(f"unsupported op {kind!r} for {path}")
+        else:
+            raise InvalidEdit(f"invalid path {path}")
+
+    updates = []
+    for entry_id, entry_fields in changes.items():
+        changed = _changed(by_id[entry_id], entry_fields)
+        if changed:
+            updates.append((by_id[entry_id], changed))
+    deletes = [by_id[i] for i in removed]
+    _check_exercises(inserts + [c for _, c in updates])
+    return fields, EntryDiff(inserts, updates, deletes)
+
+
+# — Writing —
+
+
+def _insert_returning_ids(model, rows):
+    """INSERT `rows` and return their new ids in order, batching where the dialect allows."""
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect
+    if len(rows) > 1 and dialect.name == "sqlite":
+        # sort_by_parameter_order would go row by row here; one multi-row INSERT
+        # hands out rowids in VALUES order under the write lock, so sorted ids
+        # line up with `rows`
+        return sorted(db.session.scalars(insert(model).returning(model.id), rows).all())
+    if len(rows) > 1 and dialect.insert_executemany_returning_sort_by_parameter_order:
+        return db.session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True), rows
+        ).all()
+    if dialect.insert_returning:
+        return [db.session.scalar(insert(model).values(**row).returning(model.id)) for row in rows]
+    return [
+        db.session.execute(insert(model).values(**row)).inserted_primary_key[0] for row in rows
+    ]
+
+
+def create_workout(user_id, data):
+    """Insert a workout from a POST body and return its serialized form. Caller commits."""
+    title = data.get("title")
+    items = data.get("exercises")
+    if not title or not items or not isinstance(items, list):
+        raise InvalidEdit("title and exercises required")
+    entries = [_parse_entry(item, partial=False) for item in items]
+    names = _check_exercises(entries)
+
+    user_id = int(user_id)
+    now = datetime.utcnow()
+    workout = dict(
+        user_id=user_id,
+        title=title,
+        notes=data.get("notes"),
+        created_at=now,
+        updated_at=now,
+        revision=1,
+    )
+    [wid] = _insert_returning_ids(Workout, [workout])
+    rows = [dict(workout_id=wid, **e) for e in entries]
+    entry_ids = _insert_returning_ids(WorkoutExercise, rows)
+
+    written = [Snapshot(**e) for e in entries]
+    rollups.add_entries(user_id, written)
+    records.add_entries(user_id, [(wid, now, e) for e in written])
+    bump_data_version(user_id)
+    return {
+        "id": wid,
+        "title": title,
+        "notes": workout["notes"],
+        "created_at": now.isoformat(),
+        "exercises": [
+            {"id": entry_id, "exercise_name": names[e["exercise_id"]], **e}
+            for entry_id, e in zip(entry_ids, entries)
+        ],
+    }
+
+
+def _snapshot(entry):
+    return Snapshot(entry.exercise_id, entry.sets, entry.reps, entry.weight)
+
+
+def apply_diff(user_id, w, diff):
+    """Write `diff` to w's entries and adjust rollups and records. Caller commits."""
+    old = [_snapshot(e) for e in diff.deletes] + [_snapshot(e) for e, _ in diff.updates]
+    released = records.release(user_id, w.id) if old else []
+
+    for entry in diff.deletes:
+        w.exercises.remove(entry)  # delete-orphan: one batched DELETE at flush
+    for entry, changes in diff.updates:
+        for name, value in changes.items():
+            setattr(entry, name, value)
+    db.session.flush()
+    if diff.inserts:
+        _insert_returning_ids(WorkoutExercise, [dict(workout_id=w.id, **f) for f in diff.inserts])
+        db.session.expire(w, ["exercises"])
+
+    added = [e for e, _ in diff.updates] + [Snapshot(**f) for f in diff.inserts]
+    if old:
+        rollups.remove_entries(user_id, old, workouts=0)
+    if added:
+        rollups.add_entries(user_id, added, workouts=0)
+    records.recompute(user_id, released)
+    if added:
+        records.add_entries(user_id, [(w.id, w.created_at, e) for e in added])
@@ -0,0 +1,192 @@
+# src/hashing.py
+"""
+Password hashing off the request thread.
+
+Hashing and verification run in a small process pool so CPU-heavy KDF work
+does not hold the GIL of a threaded worker, and is bounded twice:
+
+  * PASSWORD_HASH_MAX_PENDING caps in-flight jobs per worker process;
+  * PASSWORD_HASH_SLOTS caps concurrent jobs across *all* gunicorn workers
+    on the host (flock'd slot files), so a login storm can never occupy
+    every sync worker and starve the other endpoints.
+
+When a limit is hit (after at most PASSWORD_HASH_SLOT_WAIT seconds for a
+slot) the caller gets HashPoolBusy and the app answers 503 with
+Retry-After instead of queueing.
+
+PASSWORD_HASH_METHOD is any werkzeug method string ("scrypt",
+"pbkdf2:sha256:600000", ...); hashes made with another method are
+upgraded on the next successful login (see needs_rehash()).
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from flask import current_app, jsonify
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+
+class HashPoolBusy(RuntimeError):
+    """Too many password hashes in flight; retry later."""
+
+
+class _HostSlots:
+    """At most `count` holders across processes, via non-blocking flock on slot files."""
+
+    POLL_INTERVAL = 0.01
+
+    def __init__(self, directory, count, wait=0.0):
+        self.paths = [os.path.join(directory, f"hash-slot-{i}.lock") for i in range(count)]
+        self.wait = wait
+        os.makedirs(directory, exist_ok=True)
+
+    def _try_acquire(self):
+        for path in self.paths:
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return fd
+            except BlockingIOError:
+                os.close(fd)
+        return None
+
+    def acquire(self):
+        """Return a held slot fd, waiting up to `wait` seconds, or None."""
+        deadline = time.monotonic() + self.wait
+        while True:
+            fd = self._try_acquire()
+            if fd is not None or time.monotonic() >= deadline:
+                return fd
+            time.sleep(self.POLL_INTERVAL)
+
+    @staticmethod
+    def release(fd):
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class HashPool:
+    def __init__(self, method, workers, max_pending, timeout, slots=None):
+        self.method = method
+        self.workers = workers
+        self.timeout = timeout
+        self.slots = slots
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._method_prefix = None
+
+    def _pool(self):
+        # created lazily so each gunicorn worker (and forked child) gets its own
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, fn, *args):
+        if not self._pending.acquire(blocking=False):
+            raise HashPoolBusy("password hashing queue is full")
+        slot = None
+        try:
+            if self.slots is not None:
+                slot = self.slots.acquire()
+                if slot is None:
+                    raise HashPoolBusy("all password hashing slots are busy")
+            if self.workers <= 0:
+                return fn(*args)
+            return self._pool().submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HashPoolBusy("password hashing timed out")
+        finally:
+            if slot is not None:
+                self.slots.release(slot)
+            self._pending.release()
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self.run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when `pwhash` was not produced with the configured method and cost."""
+        if self._method_prefix is None:
+            # werkzeug expands defaults ("scrypt" -> "scrypt:32768:8:1"); learn the
+            # canonical prefix once from a throwaway hash
+            sample = generate_password_hash("", self.method)
+            self._method_prefix = sample.split("$", 1)[0]
+        return pwhash.split("$", 1)[0] != self._method_prefix
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def init_app(app):
+    app.config.setdefault("PASSWORD_HASH_METHOD", os.getenv("PASSWORD_HASH_METHOD", "scrypt"))
+    app.config.setdefault(
+        "PASSWORD_HASH_WORKERS", int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+    )
+    app.config.setdefault(
+        "PASSWORD_HASH_MAX_PENDING", int(os.getenv("PASSWORD_HASH_MAX_PENDING", 8))
+    )
+    app.config.setdefault(
+        "PASSWORD_HASH_SLOTS", int(os.getenv("PASSWORD_HASH_SLOTS", 2))
+    )
+    app.config.setdefault(
+        "PASSWORD_HASH_SLOT_WAIT", float(os.getenv("PASSWORD_HASH_SLOT_WAIT", 0))
+    )
+    app.config.setdefault(
+        "PASSWORD_HASH_TIMEOUT", float(os.getenv("PASSWORD_HASH_TIMEOUT", 10))
+    )
+
+    slots = None
+    if app.config["PASSWORD_HASH_SLOTS"] > 0 and fcntl is not None:
+        slots = _HostSlots(
+            os.path.join(app.instance_path, "hash-slots"),
+            app.config["PASSWORD_HASH_SLOTS"],
+            wait=app.config["PASSWORD_HASH_SLOT_WAIT"],
+        )
+    app.extensions["hash_pool"] = HashPool(
+        method=app.config["PASSWORD_HASH_METHOD"],
+        workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+        timeout=app.config["PASSWORD_HASH_TIMEOUT"],
+        slots=slots,
+    )
+
+    @app.errorhandler(HashPoolBusy)
+    def _busy(e):
+        resp = jsonify(msg="Authentication is busy, retry shortly")
+        resp.status_code = 503
+        resp.headers["Retry-After"] = "1"
+        return resp
+
+
+def get_pool():
+    return current_app.extensions["hash_pool"]
+
+
+def hash_password(password):
+    return get_pool().hash(password)
+
+
+def verify_password(pwhash, password):
+    return get_pool().verify(pwhash, password)
+
+
+def needs_rehash(pwhash):
+    return get_pool().needs_rehash(pwhash)
@@ -0,0 +1,255 @@
+# src/ical.py
+"""
+Per-user iCalendar (.ics) feed of scheduled workouts.
+
+Calendar apps cannot send a JWT, so GET /calendar/feed hands an
+authenticated user a URL carrying their id and User.feed_version signed
+with itsdangerous, and GET /calendar/<token>.ics serves it to anyone
+holding that URL. POST /calendar/feed/rotate bumps feed_version, which
+revokes every URL handed out so far.
+
+The feed is streamed in server-side batches. A one-off session is one
+VEVENT; a series is one VEVENT with its RRULE in the series' timezone,
+EXDATEs for cancelled occurrences and a RECURRENCE-ID override per moved
+one. Series are never expanded, so the body depends only on stored data and
+not on the current time, which makes the user's data_version a complete
+validator: polls that send If-None-Match or If-Modified-Since get a 304
+after a single primary-key lookup.
+
+Last-Modified only has whole seconds, so it names the end of the second of
+the last write, and only once that second is over: until then another
+write could still land in it, and a client that had seen the feed would
+get a 304 for data it has not seen.
+"""
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    jsonify,
+    request,
+    stream_with_context,
+    url_for,
+)
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import select
+from werkzeug.http import http_date, is_resource_modified
+
+from src.model import db, ScheduleException, ScheduledWorkout, User, Workout
+from src.recurrence import occurrences, parse_rule
+from src.sqlite import serialized_write
+from src.timebuckets import get_zone
+
+calendar_bp = Blueprint("calendar", __name__, url_prefix="/calendar")
+
+FEED_BATCH_SIZE = 500
+EVENT_DURATION = "PT1H"  # schedules carry no end time
+
+
+def _signer():
+    return URLSafeSerializer(current_app.config["JWT_SECRET_KEY"], salt="calendar-feed")
+
+
+def feed_token(user_id, feed_version):
+    return _signer().dumps([int(user_id), feed_version])
+
+
+def _feed_user(token):
+    try:
+        claims = _signer().loads(token)
+    except BadSignature:
+        return None
+    # URLs from before feed_version carry the bare id and count as version 0
+    user_id, version = claims if isinstance(claims, list) else (claims, 0)
+    user = db.session.get(User, user_id)
+    if user is None or not user.active or user.feed_version != version:
+        return None
+    return user
+
+
+# — iCalendar text —
+
+
+def _escape(text):
+    return (
+        text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+    )
+
+
+def _fold(line):
+    """Split `line` into CRLF-terminated chunks of at most 75 octets (RFC 5545 3.1)."""
+    out, size, chunk = [], 0, []
+    for ch in line:
+        n = len(ch.encode())
+        if size + n > 75:
+            out.append("".join(chunk))
+            chunk, size = [" "], 1
+        chunk.append(ch)
+        size += n
+    out.append("".join(chunk))
+    return "\r\n".join(out) + "\r\n"
+
+
+def _utc(dt):
+    return f"{dt:%Y%m%dT%H%M%S}Z"
+
+
+def _local(dt, zone):
+    return f"{dt.replace(tzinfo=timezone.utc).astimezone(zone):%Y%m%dT%H%M%S}"
+
+
+def _events(s, exceptions, stamp, host):
+    """iCalendar lines for one schedule (a one-off session or a whole series)."""
+    head = [
+        "BEGIN:VEVENT",
+        f"UID:schedule-{s.id}@{host}",
+        f"DTSTAMP:{_utc(stamp)}",
+    ]
+    tail = [f"DURATION:{EVENT_DURATION}", f"SUMMARY:{_escape(s.title)}", "END:VEVENT"]
+    if not s.recurrence:
+        return head + [f"DTSTART:{_utc(s.scheduled_at)}"] + tail
+
+    zone = get_zone(s.timezone)
+    tzid = f"TZID={zone.key}"
+    rule = parse_rule(s.recurrence)
+    # RFC 5545 always counts DTSTART as an occurrence; ours must match the rule
+    first = next(occurrences(rule, s.scheduled_at, zone), None)
+    if first is None:
+        return []
+    lines = head + [f"DTSTART;{tzid}:{_local(first, zone)}", f"RRULE:{s.recurrence}"]
+    lines += [
+        f"EXDATE;{tzid}:{_local(original, zone)}"
+        for original, moved in exceptions
+        if moved is None
+    ]
+    lines += tail
+    for original, moved in exceptions:
+        if moved is not None:
+            lines += head + [
+                f"RECURRENCE-ID;{tzid}:{_local(original, zone)}",
+                f"DTSTART:{_utc(moved)}",
+            ] + tail
+    return lines
+
+
+def _feed(user_id, stamp, host):
+    rows = db.session.execute(
+        select(
+            ScheduledWorkout.id,
+            ScheduledWorkout.scheduled_at,
+            ScheduledWorkout.recurrence,
+            ScheduledWorkout.timezone,
+            Workout.title,
+            ScheduleException.occurrence_at,
+            ScheduleException.rescheduled_at,
+        )
+        .join(Workout, Workout.id == ScheduledWorkout.workout_id)
+        .outerjoin(ScheduleException, ScheduleException.schedule_id == ScheduledWorkout.id)
+        .where(ScheduledWorkout.user_id == user_id)
+        .order_by(ScheduledWorkout.id, ScheduleException.occurrence_at)
+        .execution_options(yield_per=FEED_BATCH_SIZE)
+    )
+    yield _fold("BEGIN:VCALENDAR")
+    yield _fold("VERSION:2.0")
+    yield _fold("PRODID:-//Workout Tracker API//Schedule//EN")
+    yield _fold("CALSCALE:GREGORIAN")
+    yield _fold("X-WR-CALNAME:Workouts")
+    # rows arrive grouped by schedule, one per exception (or one bare row)
+    for _, group in groupby(rows, key=lambda r: r.id):
+        group = list(group)
+        exceptions = [(r.occurrence_at, r.rescheduled_at) for r in group if r.occurrence_at]
+        yield "".join(_fold(line) for line in _events(group[0], exceptions, stamp, host))
+    yield _fold("END:VCALENDAR")
+
+
+@calendar_bp.route("/feed", methods=["GET"])
+@jwt_required()
+def feed_url():
+    """
+    URL of the user's calendar feed, for subscribing from a calendar app
+    ---
+    tags: [Calendar]
+    security:
+      - BearerAuth: []
+    responses:
+      200:
+        description: Anyone holding the URL can read the feed
+        schema:
+          type: object
+          properties:
+            url: {type: string}
+    """
+    user = db.session.get(User, int(get_jwt_identity()))
+    token = feed_token(user.id, user.feed_version)
+    return jsonify(url=url_for(".feed", token=token, _external=True))
+
+
+@calendar_bp.route("/feed/rotate", methods=["POST"])
+@jwt_required()
+@serialized_write
+def rotate_feed_url():
+    """
+    Revoke the user's calendar feed URLs and return a new one
+    ---
+    tags: [Calendar]
+    security:
+      - BearerAuth: []
+    responses:
+      200:
+        description: The new URL; every earlier one now returns 404
+        schema:
+          type: object
+          properties:
+            url: {type: string}
+    """
+    user = db.session.get(User, int(get_jwt_identity()))
+    user.feed_version = User.feed_version + 1
+    db.session.commit()
+    token = feed_token(user.id, user.feed_version)
+    return jsonify(url=url_for(".feed", token=token, _external=True))
+
+
+@calendar_bp.route("/<token>.ics", methods=["GET"])
+def feed(token):
+    """
+    Scheduled workouts as an iCalendar feed (no JWT; the URL is the credential)
+    ---
+    tags: [Calendar]
+    produces:
+      - text/calendar
+    parameters:
+      - in: path
+        name: token
+        type: string
+        required: true
+    responses:
+      200:
+        description: The whole calendar, streamed
+      304:
+        description: Unchanged since If-None-Match / If-Modified-Since
+      404:
+        description: Unknown or invalid feed URL
+    """
+    user = _feed_user(token)
+    if user is None:
+        abort(404)
+    etag = f"cal{user.id}.{user.data_version}"
+    stamp = (user.data_updated_at or user.created_at).replace(microsecond=0)
+    last_modified = stamp + timedelta(seconds=1)
+    headers = {"ETag": f'"{etag}"'}
+    if last_modified <= datetime.utcnow():
+        headers["Last-Modified"] = http_date(last_modified)
+    else:
+        last_modified = None
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        return Response(status=304, headers=headers)
+
+    return Response(
+        stream_with_context(_feed(user.id, stamp, request.host)),
+        mimetype="text/calendar",
+        headers={**headers, "Content-Disposition": "inline; filename=workouts.ics"},
+    )
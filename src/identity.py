@@ -0,0 +1,99 @@
+# src/identity.py
+"""
+JWT identity resolution with caching.
+
+`init_app` registers a user_lookup_loader on the JWTManager, so every
+@jwt_required() request resolves `current_user` to a small Identity
+record. Lookups go request cache (flask.g) -> per-process TTL cache ->
+one primary-key SELECT. Inactive or deleted users resolve to None, which
+flask-jwt-extended turns into a 401.
+
+Committed changes to a User evict it from this process's cache right
+away; other workers see the change once their entry's TTL
+(IDENTITY_CACHE_TTL) runs out.
+"""
+import os
+from collections import namedtuple
+
+from flask import current_app, g, has_app_context, jsonify
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from src.cache import MemoryBackend
+from src.metrics import record_cache_lookup
+from src.model import db, User
+
+Identity = namedtuple("Identity", "id email active is_admin timezone")
+
+_MISSING = object()
+
+
+def init_app(app, jwt):
+    app.config.setdefault("IDENTITY_CACHE_TTL", int(os.getenv("IDENTITY_CACHE_TTL", 60)))
+    app.config.setdefault(
+        "IDENTITY_CACHE_MAX_ENTRIES", int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", 10000))
+    )
+    app.extensions["identity_cache"] = MemoryBackend(
+        max_entries=app.config["IDENTITY_CACHE_MAX_ENTRIES"],
+        ttl=app.config["IDENTITY_CACHE_TTL"],
+    )
+
+    @jwt.user_lookup_loader
+    def _lookup(_jwt_header, jwt_data):
+        ident = load_identity(int(jwt_data[app.config["JWT_IDENTITY_CLAIM"]]))
+        return ident if ident is not None and ident.active else None
+
+    @jwt.user_lookup_error_loader
+    def _lookup_error(_jwt_header, _jwt_data):
+        return jsonify(msg="User not found or inactive"), 401
+
+
+def load_identity(user_id):
+    """Identity for `user_id` (or None), consulting the request and process caches."""
+    per_request = g.setdefault("_identities", {})
+    ident = per_request.get(user_id, _MISSING)
+    if ident is not _MISSING:
+        return ident
+
+    cache = current_app.extensions["identity_cache"]
+    ident = cache.get(user_id)
+    record_cache_lookup("identity", ident is not None)
+    if ident is None:
+        row = db.session.execute(
+            select(User.id, User.email, User.active, User.is_admin, User.timezone)
+            .where(User.id == user_id)
+        ).first()
+        ident = Identity(*row) if row else None
+        if ident is not None:
+            cache.set(user_id, ident)
+
+    per_request[user_id] = ident
+    return ident
+
+
+def invalidate(user_id):
+    if has_app_context():
+        current_app.extensions["identity_cache"].delete(user_id)
+        g.get("_identities", {}).pop(user_id, None)
+
+
+# — Invalidation: evict users changed through the ORM once their change commits —
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _mark_dirty(_mapper, connection, target):
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault("dirty_identities", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_dirty(session):
+    for user_id in session.info.pop("dirty_identities", ()):
+        invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_dirty(session):
+    session.info.pop("dirty_identities", None)
@@ -0,0 +1,213 @@
+# src/importer.py
+"""
+Bulk workout import for POST /workouts/import.
+
+The request body is parsed as a stream (NDJSON: one workout per line, CSV:
+one exercise entry per line in the /workouts/export column layout) and
+written in chunks: one multi-row INSERT ... RETURNING for the chunk's
+workouts, one executemany for their exercise rows, one rollup update and a
+commit. Each chunk's transaction starts as BEGIN IMMEDIATE on file-backed
+SQLite and is retried if the database is locked (src/sqlite.py).
+
+A bad line only costs its own workout. That includes lines that are not
+valid UTF-8 (decode the body with errors="surrogateescape") and CSV rows
+the csv module cannot read, since by then earlier chunks have committed.
+"""
+import csv
+import json
+import math
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from src.model import db, Exercise, Workout, WorkoutExercise
+from src import records, rollups
+from src.cache import bump_data_version
+from src.edits import _insert_returning_ids
+from src.sqlite import run_serialized
+from src.timebuckets import parse_utc
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+
+Entry = namedtuple("Entry", "exercise_id sets reps weight")
+
+
+class InvalidWorkout(ValueError):
+    """A single workout in the upload is invalid."""
+
+
+# — Parsing —
+
+
+def _check_text(value):
+    """Reject text holding bytes that were not valid UTF-8 (see the module docstring)."""
+    try:
+        value.encode("utf-8")
+    except UnicodeEncodeError:
+        raise InvalidWorkout("invalid UTF-8")
+
+
+def _parse_datetime(value):
+    if value in (None, ""):
+        return None
+    try:
+        return parse_utc(value, "created_at")
+    except ValueError:
+        raise InvalidWorkout(f"invalid created_at {value!r}")
+
+
+def _parse_entry(ex, known_ids):
+    try:
+        exercise_id = int(ex["exercise_id"])
+        sets = int(ex["sets"])
+        reps = int(ex["reps"])
+        weight = ex.get("weight")
+        weight = float(weight) if weight not in (None, "") else 0
+    except KeyError as e:
+        raise InvalidWorkout(f"exercise missing {e.args[0]}")
+    except (TypeError, ValueError):
+        raise InvalidWorkout("exercise_id, sets, reps and weight must be numbers")
+    if not math.isfinite(weight) or min(sets, reps, weight) < 0:
+        raise InvalidWorkout("sets, reps and weight must be finite and non-negative")
+    if exercise_id not in known_ids:
+        raise InvalidWorkout(f"unknown exercise_id {exercise_id}")
+    return Entry(exercise_id, sets, reps, weight)
+
+
+def _build_workout(data, entries):
+    title = data.get("title")
+    if not title:
+        raise InvalidWorkout("title required")
+    limit = Workout.title.type.length
+    if not isinstance(title, str) or len(title) > limit:
+        raise InvalidWorkout(f"title must be a string of at most {limit} characters")
+    notes = data.get("notes") or None
+    if notes is not None and not isinstance(notes, str):
+        raise InvalidWorkout("notes must be a string")
+    if not entries:
+        raise InvalidWorkout("exercises required")
+    return (
+        {
+            "title": title,
+            "notes": notes,
+            "created_at": _parse_datetime(data.get("created_at")) or datetime.utcnow(),
+        },
+        entries,
+    )
+
+
+def parse_ndjson(lines, known_ids):
+    """Yield (line_no, workout_or_None, error_or_None) for each NDJSON line."""
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            _check_text(line)
+            try:
+                data = json.loads(line)
+            except ValueError:
+                raise InvalidWorkout("invalid JSON")
+            if not isinstance(data, dict) or not isinstance(
+                data.get("exercises", []), list
+            ):
+                raise InvalidWorkout("expected a workout object")
+            entries = [_parse_entry(ex, known_ids) for ex in data.get("exercises", [])]
+            yield line_no, _build_workout(data, entries), None
+        except InvalidWorkout as e:
+            yield line_no, None, str(e)
+
+
+def parse_csv(lines, known_ids):
+    """Yield (line_no, workout_or_None, error_or_None) per group of CSV rows.
+
+    Consecutive rows sharing a workout_id form one workout; the reported
+    line is the group's first data line (the header is line 1).
+    """
+    reader = csv.DictReader(lines)
+    group_key, group_line, group_rows = None, None, []
+
+    def flush():
+        try:
+            for r in group_rows:
+                for value in r.values():
+                    if isinstance(value, str):
+                        _check_text(value)
+            entries = [_parse_entry(r, known_ids) for r in group_rows]
+            return group_line, _build_workout(group_rows[0], entries), None
+        except InvalidWorkout as e:
+            return group_line, None, str(e)
+
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            # the reader resumes at the next line; DictReader.line_num lags on errors
+            yield reader.reader.line_num, None, f"unreadable CSV: {e}"
+            continue
+        line_no = reader.line_num
+        key = row.get("workout_id") or f"line-{line_no}"
+        if group_rows and key != group_key:
+            yield flush()
+            group_rows = []
+        if not group_rows:
+            group_key, group_line = key, line_no
+        group_rows.append(row)
+    if group_rows:
+        yield flush()
+
+
+# — Writing —
+
+
+def _write_chunk(user_id, chunk):
+    ids = _insert_returning_ids(Workout, [dict(user_id=user_id, **w) for w, _ in chunk])
+
+    rows, all_entries, record_items = [], [], []
+    for wid, (workout, entries) in zip(ids, chunk):
+        all_entries.extend(entries)
+        rows.extend(dict(workout_id=wid, **e._asdict()) for e in entries)
+        record_items.extend((wid, workout["created_at"], e) for e in entries)
+    db.session.execute(insert(WorkoutExercise), rows)
+
+    rollups.add_entries(user_id, all_entries, workouts=len(chunk))
+    records.add_entries(user_id, record_items)
+    bump_data_version(user_id)
+    db.session.commit()
+    return len(ids), len(rows)
+
+
+def import_workouts(user_id, lines, fmt, chunk_size=CHUNK_SIZE):
+    """Import workouts for `user_id` from an iterable of text lines."""
+    known_ids = set(db.session.scalars(select(Exercise.id)))
+    # end the read snapshot: each chunk is its own IMMEDIATE transaction, so
+    # the write lock is never held while the body is still being read
+    db.session.rollback()
+    parse = parse_csv if fmt == "csv" else parse_ndjson
+
+    summary = {"workouts_created": 0, "exercises_created": 0, "errors": []}
+    error_count = 0
+    chunk = []
+    for line_no, workout, error in parse(lines, known_ids):
+        if error:
+            error_count += 1
+            if len(summary["errors"]) < MAX_REPORTED_ERRORS:
+                summary["errors"].append({"line": line_no, "error": error})
+            continue
+        chunk.append(workout)
+        if len(chunk) >= chunk_size:
+            w, e = run_serialized(_write_chunk, user_id, chunk)
+            summary["workouts_created"] += w
+            summary["exercises_created"] += e
+            chunk = []
+    if chunk:
+        w, e = run_serialized(_write_chunk, user_id, chunk)
+        summary["workouts_created"] += w
+        summary["exercises_created"] += e
+
+    summary["error_count"] = error_count
+    return summary
@@ -0,0 +1,107 @@
+# src/metrics.py
+"""
+Prometheus metrics served at GET /metrics.
+
+  http_requests_total{blueprint,endpoint,method,status}
+  http_request_duration_seconds{blueprint,endpoint,method}   (histogram)
+  db_pool_checkout_wait_seconds                               (histogram)
+  cache_lookups_total{cache,result}                           (hit/miss)
+
+Under gunicorn each worker is its own process, so set
+PROMETHEUS_MULTIPROC_DIR (an empty, writable directory) before the
+workers start: prometheus_client then keeps every worker's samples in
+mmap'd files there and /metrics merges them, whichever worker answers
+the scrape. gunicorn.conf.py empties the directory on startup and marks
+exited workers dead. Without the variable metrics are per process,
+which is what tests and `flask run` want.
+"""
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+    # unlabelled metrics open their sample file as soon as they are defined
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status.",
+    ["blueprint", "endpoint", "method", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time from request start to response, by route.",
+    ["blueprint", "endpoint", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+POOL_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ["cache", "result"],
+)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def _instrument_pool(engine):
+    # the pool has no "waiting for checkout" event, so time connect() itself
+    pool = engine.pool
+    connect = pool.connect
+
+    def timed_connect():
+        start = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            POOL_WAIT.observe(time.perf_counter() - start)
+
+    pool.connect = timed_connect
+
+
+def _registry():
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def init_app(app, db):
+    with app.app_context():
+        for engine in db.engines.values():
+            _instrument_pool(engine)
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return response
+        labels = (request.blueprint or "", request.endpoint or "<unmatched>", request.method)
+        LATENCY.labels(*labels).observe(time.perf_counter() - start)
+        REQUESTS.labels(*labels, str(response.status_code)).inc()
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
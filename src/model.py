@@ -1,23 +1,74 @@
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from src import hashing
 
-db = SQLAlchemy()
+
+class RoutingSession(Session):
+    """Runs SELECTs on the "replica" bind while a view has opted in (see src/replica.py)."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.bind is not None:
+            # a session joined to an outer transaction (src/batch.py atomic batches)
+            return self.bind
+        if (
+            bind is None
+            and not self._flushing
+            and clause is not None
+            and clause.is_select
+            and has_app_context()
+            and g.get("_use_replica", False)
+        ):
+            replica = self._db.engines.get("replica")
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+# INSERT ... ON CONFLICT DO UPDATE, for the rollup and record upserts
+UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert(model):
+    """A dialect INSERT for `model` that supports .on_conflict_do_update()."""
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    try:
+        return UPSERT_DIALECTS[dialect](model)
+    except KeyError:
+        raise NotImplementedError(f"no INSERT ... ON CONFLICT support for {dialect}")
 
 
 class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    timezone = db.Column(db.String(64))  # IANA name used for report buckets
+    active = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    is_admin = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # bumped by every workout write; part of the report cache key (src/cache.py)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # when data_version last changed; Last-Modified of the calendar feed (src/ical.py)
+    data_updated_at = db.Column(db.DateTime)
+    # signed into calendar feed URLs; bumping it revokes them (src/ical.py)
+    feed_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     workouts = db.relationship("Workout", backref="user", lazy=True)
 
+    # Both run in the bounded hashing pool (src/hashing.py) and may raise
+    # hashing.HashPoolBusy under load.
     def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hashing.hash_password(password)
 
     def check_password(self, password: str) -> bool:
-        return check_password_hash(self.password_hash, password)
+        return hashing.verify_password(self.password_hash, password)
+
+    def password_needs_rehash(self) -> bool:
+        return hashing.needs_rehash(self.password_hash)
 
 
 class Exercise(db.Model):
@@ -31,11 +82,15 @@ class Exercise(db.Model):
 
 class Workout(db.Model):
     __tablename__ = "workouts"
+    __table_args__ = (db.Index("ix_workouts_user_id_created_at", "user_id", "created_at"),)
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     title = db.Column(db.String(100), nullable=False)
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # bumped on every edit; the workout's ETag is derived from (id, revision)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    revision = db.Column(db.Integer, nullable=False, default=1, server_default="1")
     exercises = db.relationship(
         "WorkoutExercise",
         backref="workout",
@@ -53,6 +108,10 @@ class Workout(db.Model):
 
 class WorkoutExercise(db.Model):
     __tablename__ = "workout_exercises"
+    __table_args__ = (
+        db.Index("ix_workout_exercises_workout_id", "workout_id"),
+        db.Index("ix_workout_exercises_exercise_id_workout_id", "exercise_id", "workout_id"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     workout_id = db.Column(db.Integer, db.ForeignKey("workouts.id"), nullable=False)
     exercise_id = db.Column(db.Integer, db.ForeignKey("exercises.id"), nullable=False)
@@ -63,7 +122,98 @@ class WorkoutExercise(db.Model):
 
 
 class ScheduledWorkout(db.Model):
+    """A one-off session, or a series when `recurrence` holds an RRULE (see src/recurrence.py).
+
+    For a series `scheduled_at` is the first occurrence, `timezone` the zone
+    whose wall clock the rule follows and `ends_at` the latest occurrence
+    (NULL while the series is unbounded). `user_id` copies the workout's
+    owner so a user's schedule is one range of the (user_id, scheduled_at)
+    index.
+    """
+
     __tablename__ = "scheduled_workouts"
+    __table_args__ = (
+        db.Index(
+            "ix_scheduled_workouts_workout_id_scheduled_at", "workout_id", "scheduled_at"
+        ),
+        db.Index("ix_scheduled_workouts_user_id_scheduled_at", "user_id", "scheduled_at"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     workout_id = db.Column(db.Integer, db.ForeignKey("workouts.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     scheduled_at = db.Column(db.DateTime, nullable=False)
+    recurrence = db.Column(db.String(255))
+    timezone = db.Column(db.String(64))
+    ends_at = db.Column(db.DateTime)
+    exceptions = db.relationship(
+        "ScheduleException",
+        backref="schedule",
+        cascade="all, delete-orphan",
+        lazy=True,
+    )
+
+
+class ScheduleException(db.Model):
+    """One occurrence of a series moved to `rescheduled_at`, or cancelled (NULL)."""
+
+    __tablename__ = "schedule_exceptions"
+    __table_args__ = (db.UniqueConstraint("schedule_id", "occurrence_at"),)
+    id = db.Column(db.Integer, primary_key=True)
+    schedule_id = db.Column(
+        db.Integer, db.ForeignKey("scheduled_workouts.id"), nullable=False
+    )
+    occurrence_at = db.Column(db.DateTime, nullable=False)
+    rescheduled_at = db.Column(db.DateTime)
+
+
+class UserStats(db.Model):
+    """Running all-time totals per user, maintained by src/rollups.py."""
+
+    __tablename__ = "user_stats"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    workouts = db.Column(db.Integer, nullable=False, default=0)
+    sets = db.Column(db.Integer, nullable=False, default=0)
+    reps = db.Column(db.Integer, nullable=False, default=0)
+    volume = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class UserExerciseStats(db.Model):
+    """Per user/exercise entry count and heaviest weight, maintained by src/rollups.py."""
+
+    __tablename__ = "user_exercise_stats"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    exercise_id = db.Column(
+        db.Integer, db.ForeignKey("exercises.id"), primary_key=True
+    )
+    entries = db.Column(db.Integer, nullable=False, default=0)
+    max_weight = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class PersonalRecord(db.Model):
+    """Heaviest weight per user/exercise/rep count, maintained by src/records.py."""
+
+    __tablename__ = "personal_records"
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    exercise_id = db.Column(
+        db.Integer, db.ForeignKey("exercises.id"), primary_key=True
+    )
+    reps = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    weight = db.Column(db.Float, nullable=False)
+    workout_id = db.Column(db.Integer, db.ForeignKey("workouts.id"), nullable=False)
+    achieved_at = db.Column(db.DateTime, nullable=False)
+
+
+class TokenBlocklist(db.Model):
+    """Revoked access tokens, mirrored in memory by src/revocation.py.
+
+    A row revokes either one token (`jti`) or every token of `user_id`
+    issued before `revoked_at` (jti NULL). Rows past `expires_at`
+    no longer matter and are removed by `flask tokens prune`.
+    """
+
+    __tablename__ = "token_blocklist"
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    expires_at = db.Column(db.DateTime, index=True)
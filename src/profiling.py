@@ -0,0 +1,124 @@
+# src/profiling.py
+"""
+Opt-in per-request SQL profiling.
+
+With SQL_PROFILING enabled every request records its query count, total
+DB time, slowest and most repeated statement and overall handler time.
+The numbers go out as a `Server-Timing` header (visible in browser dev
+tools) and requests over SQL_PROFILING_SLOW_MS or
+SQL_PROFILING_MAX_QUERIES are logged as warnings, which is usually
+enough to spot an N+1 (one statement repeated once per row).
+
+Statements are timed by engine-wide cursor events; queries a streamed
+response runs after the view returns are not attributed to the request.
+"""
+import os
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = (0.0, None)
+        self.statements = Counter()
+
+    def record(self, statement, elapsed):
+        self.queries += 1
+        self.db_time += elapsed
+        self.statements[statement] += 1
+        if elapsed > self.slowest[0]:
+            self.slowest = (elapsed, statement)
+
+    def most_repeated(self):
+        if not self.statements:
+            return 0, None
+        statement, count = self.statements.most_common(1)[0]
+        return count, statement
+
+    def server_timing(self, total):
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries"',
+                f"db-slowest;dur={self.slowest[0] * 1000:.1f}",
+                f"app;dur={max(total - self.db_time, 0.0) * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+
+def _current_profile():
+    return g.get("_sql_profile") if has_request_context() else None
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the execution context, which a failing statement takes with it
+    if context is not None and _current_profile() is not None:
+        context._profile_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    started = getattr(context, "_profile_start", None)
+    if profile is not None and started is not None:
+        profile.record(statement, time.perf_counter() - started)
+
+
+def _shorten(statement, limit=200):
+    statement = " ".join((statement or "").split())
+    return statement if len(statement) <= limit else statement[: limit - 3] + "..."
+
+
+def init_app(app):
+    app.config.setdefault(
+        "SQL_PROFILING", os.getenv("SQL_PROFILING", "0").lower() in ("1", "true", "yes")
+    )
+    app.config.setdefault(
+        "SQL_PROFILING_SLOW_MS", float(os.getenv("SQL_PROFILING_SLOW_MS", 500))
+    )
+    app.config.setdefault(
+        "SQL_PROFILING_MAX_QUERIES", int(os.getenv("SQL_PROFILING_MAX_QUERIES", 20))
+    )
+
+    @app.before_request
+    def _start_profile():
+        if current_app.config["SQL_PROFILING"]:
+            g._sql_profile = RequestProfile()
+
+    @app.after_request
+    def _finish_profile(response):
+        profile = g.pop("_sql_profile", None)
+        if profile is None:
+            return response
+        total = time.perf_counter() - profile.started
+        response.headers["Server-Timing"] = profile.server_timing(total)
+
+        config = current_app.config
+        if (
+            total * 1000 >= config["SQL_PROFILING_SLOW_MS"]
+            or profile.queries > config["SQL_PROFILING_MAX_QUERIES"]
+        ):
+            repeats, repeated = profile.most_repeated()
+            current_app.logger.warning(
+                "slow request %s %s -> %s: %.1fms total, %d queries in %.1fms; "
+                "slowest %.1fms: %s; most repeated %dx: %s",
+                request.method,
+                request.full_path.rstrip("?"),
+                response.status_code,
+                total * 1000,
+                profile.queries,
+                profile.db_time * 1000,
+                profile.slowest[0] * 1000,
+                _shorten(profile.slowest[1]),
+                repeats,
+                _shorten(repeated),
+            )
+        return response
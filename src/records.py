@@ -0,0 +1,184 @@
+# src/records.py
+"""
+Personal-record index behind /reports/records.
+
+One PersonalRecord row per (user, exercise, rep count) holds the heaviest
+weight lifted for that many reps and the workout that first achieved it.
+Workout writes keep it current in their own transaction:
+
+    keys = release(user_id, workout_id)   # before the workout's rows go away
+    ... delete / replace WorkoutExercise rows, flush ...
+    recompute(user_id, keys)              # refill from the remaining rows
+    add_entries(user_id, [(workout_id, created_at, entry), ...])
+"""
+from collections import namedtuple
+
+from sqlalchemy import and_, delete, func, or_, select
+
+from src.model import db, upsert, PersonalRecord, Workout, WorkoutExercise
+
+_Entry = namedtuple("_Entry", "exercise_id reps weight")
+
+
+def _weight(entry):
+    return float(entry.weight or 0)
+
+
+def add_entries(user_id, items):
+    """Fold new (workout_id, achieved_at, entry) rows into the index."""
+    user_id = int(user_id)
+    best = {}
+    for workout_id, achieved_at, e in items:
+        key = (e.exercise_id, e.reps)
+        cand = (_weight(e), achieved_at, workout_id)
+        cur = best.get(key)
+        if cur is None or cand[0] > cur[0] or (cand[0] == cur[0] and cand[1] < cur[1]):
+            best[key] = cand
+    if not best:
+        return
+
+    # one executemany upsert, so concurrent first lifts cannot collide on the key
+    db.session.flush()  # Core statements below bypass autoflush
+    stmt = upsert(PersonalRecord)
+    new = stmt.excluded
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[
+                PersonalRecord.user_id,
+                PersonalRecord.exercise_id,
+                PersonalRecord.reps,
+            ],
+            set_={
+                "weight": new.weight,
+                "workout_id": new.workout_id,
+                "achieved_at": new.achieved_at,
+            },
+            # heavier wins; on a tie the earlier lift keeps the record
+            where=or_(
+                new.weight > PersonalRecord.weight,
+                and_(
+                    new.weight == PersonalRecord.weight,
+                    new.achieved_at < PersonalRecord.achieved_at,
+                ),
+            ),
+        ),
+        [
+            dict(
+                user_id=user_id,
+                exercise_id=exercise_id,
+                reps=reps,
+                weight=weight,
+                workout_id=workout_id,
+                achieved_at=achieved_at,
+            )
+            for (exercise_id, reps), (weight, achieved_at, workout_id) in best.items()
+        ],
+    )
+    for exercise_id, reps in best:
+        loaded = db.session.identity_map.get(
+            db.session.identity_key(PersonalRecord, (user_id, exercise_id, reps))
+        )
+        if loaded is not None:
+            db.session.expire(loaded)
+
+
+def release(user_id, workout_id):
+    """Drop records held by `workout_id`; return their keys for recompute()."""
+    keys = db.session.execute(
+        select(PersonalRecord.exercise_id, PersonalRecord.reps).where(
+            PersonalRecord.user_id == int(user_id),
+            PersonalRecord.workout_id == workout_id,
+        )
+    ).all()
+    if keys:
+        db.session.execute(
+            delete(PersonalRecord).where(
+                PersonalRecord.user_id == int(user_id),
+                PersonalRecord.workout_id == workout_id,
+            )
+        )
+    return [tuple(k) for k in keys]
+
+
+def recompute(user_id, keys):
+    """Refill released keys from the user's remaining WorkoutExercise rows."""
+    user_id = int(user_id)
+    keys = set(keys)
+    if not keys:
+        return
+    # one ranked query over the released exercises and rep counts
+    rows = db.session.execute(
+        _live_records(user_id, {ex for ex, _ in keys}, {reps for _, reps in keys})
+    )
+    add_entries(
+        user_id,
+        [
+            (r.workout_id, r.achieved_at, _Entry(r.exercise_id, r.reps, r.weight))
+            for r in rows
+            if (r.exercise_id, r.reps) in keys
+        ],
+    )
+
+
+def _live_records(user_id=None, exercise_ids=None, reps=None):
+    weight = func.coalesce(WorkoutExercise.weight, 0.0)
+    ranked = select(
+        Workout.user_id,
+        WorkoutExercise.exercise_id,
+        WorkoutExercise.reps,
+        weight.label("weight"),
+        Workout.id.label("workout_id"),
+        Workout.created_at.label("achieved_at"),
+        func.row_number()
+        .over(
+            partition_by=(Workout.user_id, WorkoutExercise.exercise_id, WorkoutExercise.reps),
+            order_by=(weight.desc(), Workout.created_at, Workout.id),
+        )
+        .label("rn"),
+    ).join(Workout, Workout.id == WorkoutExercise.workout_id)
+    if user_id is not None:
+        ranked = ranked.where(Workout.user_id == user_id)
+    if exercise_ids is not None:
+        ranked = ranked.where(WorkoutExercise.exercise_id.in_(exercise_ids))
+    if reps is not None:
+        ranked = ranked.where(WorkoutExercise.reps.in_(reps))
+    ranked = ranked.subquery()
+    return select(
+        ranked.c.user_id,
+        ranked.c.exercise_id,
+        ranked.c.reps,
+        ranked.c.weight,
+        ranked.c.workout_id,
+        ranked.c.achieved_at,
+    ).where(ranked.c.rn == 1)
+
+
+def rebuild(user_id=None):
+    """Replace the index with one computed from workout rows. Caller commits."""
+    stmt = delete(PersonalRecord)
+    if user_id is not None:
+        stmt = stmt.where(PersonalRecord.user_id == user_id)
+    db.session.execute(stmt)
+    rows = [r._asdict() for r in db.session.execute(_live_records(user_id))]
+    if rows:
+        db.session.execute(PersonalRecord.__table__.insert(), rows)
+    return len(rows)
+
+
+def check(user_id=None):
+    """Return human-readable mismatches between the index and workout rows."""
+    stored = db.session.query(PersonalRecord)
+    if user_id is not None:
+        stored = stored.filter(PersonalRecord.user_id == user_id)
+    stored = {
+        (r.user_id, r.exercise_id, r.reps): (r.weight, r.workout_id) for r in stored
+    }
+    live = {
+        (r.user_id, r.exercise_id, r.reps): (float(r.weight), r.workout_id)
+        for r in db.session.execute(_live_records(user_id))
+    }
+    return [
+        f"user {k[0]} exercise {k[1]} x{k[2]}: record stored={stored.get(k)} live={live.get(k)}"
+        for k in sorted(set(stored) | set(live))
+        if stored.get(k) != live.get(k)
+    ]
@@ -0,0 +1,373 @@
+# src/recurrence.py
+"""
+Recurring schedules: an RRULE subset, expanded lazily per requested window.
+
+A series is one ScheduledWorkout row whose `recurrence` holds a rule such as
+
+    FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=156
+    FREQ=DAILY;INTERVAL=2;UNTIL=20271231T000000Z
+
+Supported parts are FREQ (DAILY or WEEKLY), INTERVAL, BYDAY (weekly only;
+defaults to the weekday of the first occurrence), COUNT and UNTIL. As in
+python-dateutil, only days matching the rule are occurrences, so the first
+one is the first matching day on or after `scheduled_at`. Occurrences keep
+the first one's wall-clock time in the series' timezone across DST changes;
+everything stored and returned is naive UTC.
+
+Single occurrences are moved or cancelled with ScheduleException rows keyed
+by the occurrence's original time. Nothing is materialized: occurrences()
+jumps straight to the requested window, and list_occurrences() reads one
+range of the (user_id, scheduled_at) index - one-off sessions already sorted
+and cut at the page size, plus the series overlapping the window - then
+merges the series' occurrences in lazily, so expansion stops once the page
+is full. Exceptions are a second query, only when a series is involved.
+"""
+import heapq
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from flask import current_app
+from sqlalchemy import or_, select, union_all
+
+from src.model import db, ScheduleException, ScheduledWorkout, Workout
+from src.timebuckets import InvalidTimezone, get_zone
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+FREQS = ("DAILY", "WEEKLY")
+MAX_COUNT = 10000
+MAX_INTERVAL = 1000
+MAX_UNTIL = datetime(3000, 1, 1)  # leaves room to step past UNTIL without overflowing
+
+Rule = namedtuple("Rule", "freq interval byday count until")
+Occurrence = namedtuple(
+    "Occurrence", "schedule_id workout_id title scheduled_at occurrence_at recurrence"
+)
+
+
+class InvalidRule(ValueError):
+    pass
+
+
+def init_app(app):
+    app.config.setdefault(
+        "SCHEDULE_HORIZON_DAYS", int(os.getenv("SCHEDULE_HORIZON_DAYS", 90))
+    )
+
+
+# — Rules —
+
+
+def _positive_int(value, name):
+    try:
+        n = int(value)
+    except ValueError:
+        raise InvalidRule(f"{name} must be a positive integer")
+    if n < 1:
+        raise InvalidRule(f"{name} must be a positive integer")
+    return n
+
+
+def _parse_until(value):
+    for fmt in ("%Y%m%dT%H%M%SZ", "%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if until >= MAX_UNTIL:
+            raise InvalidRule(f"UNTIL must be before {MAX_UNTIL.year}")
+        # a bare date includes the whole day
+        return until.replace(hour=23, minute=59, second=59) if fmt == "%Y%m%d" else until
+    raise InvalidRule("UNTIL must look like 20271231 or 20271231T090000Z")
+
+
+def parse_rule(text):
+    """Parse an RRULE string (with or without the "RRULE:" prefix) into a Rule."""
+    if not isinstance(text, str) or not text.strip():
+        raise InvalidRule("recurrence must be an RRULE string")
+    text = text.strip()
+    if text.upper().startswith("RRULE:"):
+        text = text[6:]
+
+    parts = {}
+    for part in text.split(";"):
+        key, sep, value = part.partition("=")
+        key, value = key.strip().upper(), value.strip().upper()
+        if not sep or not value:
+            raise InvalidRule(f"malformed rule part {part!r}")
+        if key in parts:
+            raise InvalidRule(f"{key} given twice")
+        parts[key] = value
+    unknown = sorted(parts.keys() - {"FREQ", "INTERVAL", "BYDAY", "COUNT", "UNTIL"})
+    if unknown:
+        raise InvalidRule(f"unsupported rule part {unknown[0]}")
+
+    freq = parts.get("FREQ")
+    if freq not in FREQS:
+        raise InvalidRule("FREQ must be DAILY or WEEKLY")
+    interval = _positive_int(parts.get("INTERVAL", "1"), "INTERVAL")
+    if interval > MAX_INTERVAL:
+        raise InvalidRule(f"INTERVAL may be at most {MAX_INTERVAL}")
+
+    byday = ()
+    if "BYDAY" in parts:
+        if freq != "WEEKLY":
+            raise InvalidRule("BYDAY is only supported with FREQ=WEEKLY")
+        days = parts["BYDAY"].split(",")
+        if any(d not in WEEKDAYS for d in days):
+            raise InvalidRule(f"BYDAY takes weekdays from {','.join(WEEKDAYS)}")
+        byday = tuple(sorted({WEEKDAYS.index(d) for d in days}))
+
+    count = until = None
+    if "COUNT" in parts:
+        count = _positive_int(parts["COUNT"], "COUNT")
+        if count > MAX_COUNT:
+            raise InvalidRule(f"COUNT may be at most {MAX_COUNT}")
+    if "UNTIL" in parts:
+        if count is not None:
+            raise InvalidRule("COUNT and UNTIL cannot be combined")
+        until = _parse_until(parts["UNTIL"])
+    return Rule(freq, interval, byday, count, until)
+
+
+def format_rule(rule):
+    """Canonical RRULE text for `rule` (what gets stored and returned)."""
+    parts = [f"FREQ={rule.freq}"]
+    if rule.interval != 1:
+        parts.append(f"INTERVAL={rule.interval}")
+    if rule.byday:
+        parts.append("BYDAY=" + ",".join(WEEKDAYS[d] for d in rule.byday))
+    if rule.count is not None:
+        parts.append(f"COUNT={rule.count}")
+    if rule.until is not None:
+        parts.append(f"UNTIL={rule.until:%Y%m%dT%H%M%SZ}")
+    return ";".join(parts)
+
+
+# — Expansion —
+
+
+def _local(utc, zone):
+    return utc.replace(tzinfo=timezone.utc).astimezone(zone)
+
+
+def _utc(day, at, zone):
+    return datetime.combine(day, at, zone).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _days(rule, first, skip_to):
+    """Yield (index, local date) of candidate days, starting at or before `skip_to`."""
+    if rule.freq == "DAILY":
+        k = max(0, (skip_to - first).days // rule.interval)
+        while True:
+            yield k, first + timedelta(days=k * rule.interval)
+            k += 1
+    else:
+        days = rule.byday or (first.weekday(),)
+        monday = first - timedelta(days=first.weekday())
+        in_first_week = sum(1 for d in days if d >= first.weekday())
+        period = max(0, (skip_to - monday).days // (7 * rule.interval))
+        index = 0 if period == 0 else in_first_week + (period - 1) * len(days)
+        while True:
+            week = monday + timedelta(weeks=period * rule.interval)
+            for d in days:
+                day = week + timedelta(days=d)
+                if day >= first:
+                    yield index, day
+                    index += 1
+            period += 1
+
+
+def occurrences(rule, dtstart, zone, start=None, end=None):
+    """Yield the rule's occurrences (naive UTC) in [start, end), oldest first.
+
+    Unbounded rules need an `end`. Iteration starts at the window, not at
+    `dtstart`, so far-future windows cost the same as near ones. The series
+    ends where datetime does.
+    """
+    try:
+        local = _local(dtstart, zone)
+        first, at = local.date(), local.time()
+        skip_to = _local(start, zone).date() - timedelta(days=1) if start else first
+        for index, day in _days(rule, first, skip_to):
+            if rule.count is not None and index >= rule.count:
+                return
+            when = _utc(day, at, zone)
+            if rule.until is not None and when > rule.until:
+                return
+            if end is not None and when >= end:
+                return
+            if start is None or when >= start:
+                yield when
+    except OverflowError:
+        return
+
+
+def last_occurrence(rule, dtstart, zone):
+    """The final occurrence, None for an unbounded rule; InvalidRule if there is none."""
+    if rule.count is None and rule.until is None:
+        return None
+    start = None
+    if rule.until is not None:
+        # consecutive occurrences are at most `interval` weeks apart
+        start = max(dtstart, rule.until - timedelta(weeks=rule.interval + 1))
+    last = None
+    for last in occurrences(rule, dtstart, zone, start):
+        pass
+    if last is None:
+        raise InvalidRule("the rule has no occurrences")
+    return last
+
+
+def is_occurrence(rule, dtstart, zone, when):
+    window = occurrences(rule, dtstart, zone, when, when + timedelta(seconds=1))
+    return next(window, None) == when
+
+
+def set_rule(schedule, text, tz_name):
+    """Turn `schedule` into a series; raises InvalidRule or InvalidTimezone."""
+    if tz_name is not None and not isinstance(tz_name, str):
+        raise InvalidTimezone("timezone must be a zone name such as Europe/Berlin")
+    rule = parse_rule(text)
+    zone = get_zone(tz_name)
+    schedule.recurrence = format_rule(rule)
+    schedule.timezone = zone.key
+    schedule.ends_at = last_occurrence(rule, schedule.scheduled_at, zone)
+
+
+def expand(rule, dtstart, zone, exceptions, start, end):
+    """Yield (occurrence_at, scheduled_at) in [start, end) after applying exceptions.
+
+    `exceptions` maps an occurrence's original time to its new time, or to
+    None when it was cancelled. Results are ordered by scheduled_at.
+    """
+    kept = ((when, when) for when in occurrences(rule, dtstart, zone, start, end)
+            if when not in exceptions)
+    moved = sorted(
+        (when, original)
+        for original, when in exceptions.items()
+        if when is not None and (start is None or when >= start) and (end is None or when < end)
+    )
+    for when, original in heapq.merge(kept, moved):
+        yield original, when
+
+
+# — Queries —
+
+
+def sort_key(o):
+    """Total order of listed occurrences; list_occurrences(after=...) resumes past one."""
+    return o.scheduled_at, o.schedule_id, o.occurrence_at or o.scheduled_at
+
+
+def _series_occurrences(r, exceptions, start, end):
+    rule = parse_rule(r.recurrence)
+    for original, when in expand(
+        rule, r.scheduled_at, get_zone(r.timezone), exceptions, start, end
+    ):
+        yield Occurrence(r.id, r.workout_id, r.title, when, original, r.recurrence)
+
+
+def list_occurrences(user_id, start=None, end=None, workout_id=None, limit=None, after=None):
+    """The user's scheduled sessions in [start, end), in sort_key() order.
+
+    One-off schedules come back as they are and series are expanded. Both
+    ends are optional; without `end`, the window closes
+    SCHEDULE_HORIZON_DAYS after `start` (or now) for both. `after` (a
+    sort_key) skips to the next page and `limit` caps its length.
+    """
+    try:
+        horizon = (start or datetime.utcnow()) + timedelta(
+            days=current_app.config["SCHEDULE_HORIZON_DAYS"]
+        )
+    except OverflowError:
+        horizon = datetime.max
+    if after is not None and (start is None or after[0] > start):
+        start = after[0]
+    columns = (
+        ScheduledWorkout.id,
+        ScheduledWorkout.workout_id,
+        Workout.title,
+        ScheduledWorkout.scheduled_at,
+        ScheduledWorkout.recurrence,
+        ScheduledWorkout.timezone,
+    )
+    owned = [ScheduledWorkout.user_id == user_id]
+    if workout_id is not None:
+        owned.append(ScheduledWorkout.workout_id == workout_id)
+
+    one_off = [ScheduledWorkout.recurrence.is_(None)]
+    if start is not None:
+        one_off.append(ScheduledWorkout.scheduled_at >= start)
+    if after is not None:
+        one_off.append(
+            or_(
+                ScheduledWorkout.scheduled_at > after[0],
+                ScheduledWorkout.id > after[1],
+            )
+        )
+    one_off.append(ScheduledWorkout.scheduled_at < (end or horizon))
+    one_offs = (
+        select(*columns)
+        .join(Workout, Workout.id == ScheduledWorkout.workout_id)
+        .where(*owned, *one_off)
+        .order_by(ScheduledWorkout.scheduled_at, ScheduledWorkout.id)
+        .limit(limit)
+        .subquery()
+    )
+
+    series = [
+        ScheduledWorkout.recurrence.is_not(None),
+        ScheduledWorkout.scheduled_at < (end or horizon),
+    ]
+    if start is not None:
+        series.append(or_(ScheduledWorkout.ends_at.is_(None), ScheduledWorkout.ends_at >= start))
+    rows = db.session.execute(
+        union_all(
+            select(one_offs),
+            select(*columns)
+            .join(Workout, Workout.id == ScheduledWorkout.workout_id)
+            .where(*owned, *series),
+        )
+    ).all()
+
+    singles = [
+        Occurrence(r.id, r.workout_id, r.title, r.scheduled_at, None, None)
+        for r in rows
+        if not r.recurrence
+    ]
+    series_rows = [r for r in rows if r.recurrence]
+    exceptions = {r.id: {} for r in series_rows}
+    if series_rows:
+        for e in db.session.execute(
+            select(
+                ScheduleException.schedule_id,
+                ScheduleException.occurrence_at,
+                ScheduleException.rescheduled_at,
+            ).where(ScheduleException.schedule_id.in_(exceptions))
+        ):
+            exceptions[e.schedule_id][e.occurrence_at] = e.rescheduled_at
+
+    merged = heapq.merge(
+        singles,
+        *(_series_occurrences(r, exceptions[r.id], start, end or horizon) for r in series_rows),
+        key=sort_key,
+    )
+    if after is not None:
+        merged = (o for o in merged if sort_key(o) > after)
+    return list(islice(merged, limit))
+
+
+def serialize(o, title=False):
+    item = {
+        "id": o.schedule_id,
+        "workout_id": o.workout_id,
+        "scheduled_at": o.scheduled_at.isoformat(),
+    }
+    if title:
+        item["title"] = o.title
+    if o.recurrence:
+        item["recurrence"] = o.recurrence
+        item["occurrence"] = o.occurrence_at.isoformat()
+    return item
@@ -0,0 +1,98 @@
+# src/replica.py
+"""
+Optional read replica for read-only views.
+
+When DATABASE_REPLICA_URL is set it becomes the "replica" bind, and views
+decorated with @replica_read run their SELECTs there (RoutingSession in
+src/model.py); flushes, INSERT/UPDATE/DELETE and everything outside those
+views keep using the primary (DATABASE_URL). JWT identity lookups happen
+before the view runs, so they are always answered by the primary.
+
+Read-your-writes: any successful non-GET request by an authenticated user
+marks that user for REPLICA_READ_YOUR_WRITES_SECONDS, and while the mark is
+live their reads stay on the primary so replication lag cannot hide their
+own changes. Marks live next to the report cache: in a SQLite file beside
+it when REPORT_CACHE_BACKEND=sqlite (shared by all workers on the host),
+otherwise per process - size the window above the replica's usual lag. A window of
+0 turns the protection off.
+
+Without DATABASE_REPLICA_URL nothing is routed and no marks are kept.
+"""
+import os
+from functools import wraps
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity
+
+from src.cache import MemoryBackend, SQLiteBackend
+from src.model import db
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def init_app(app):
+    app.config.setdefault(
+        "REPLICA_READ_YOUR_WRITES_SECONDS",
+        float(os.getenv("REPLICA_READ_YOUR_WRITES_SECONDS", 5)),
+    )
+    with app.app_context():
+        enabled = "replica" in db.engines
+    app.extensions["replica_writes"] = _marks(app) if enabled else None
+
+    @app.after_request
+    def _mark_writer(resp):
+        marks = app.extensions["replica_writes"]
+        if marks is None or request.method in SAFE_METHODS or resp.status_code >= 400:
+            return resp
+        try:
+            user_id = get_jwt_identity()
+        except RuntimeError:  # no JWT verified on this request
+            return resp
+        if user_id is not None:
+            note_write(user_id)
+        return resp
+
+
+def _marks(app):
+    ttl = app.config["REPLICA_READ_YOUR_WRITES_SECONDS"]
+    if app.config.get("REPORT_CACHE_BACKEND") == "sqlite":
+        # own file next to the report cache, so neither prunes the other's rows
+        path = os.path.join(
+            os.path.dirname(app.config["REPORT_CACHE_PATH"]), "replica_writes.sqlite3"
+        )
+        return SQLiteBackend(path, max_entries=100_000, ttl=ttl)
+    return MemoryBackend(max_entries=100_000, ttl=ttl)
+
+
+def _key(user_id):
+    return f"replica:wrote:{int(user_id)}"
+
+
+def note_write(user_id):
+    """Pin `user_id`'s reads to the primary for the read-your-writes window."""
+    marks = current_app.extensions.get("replica_writes")
+    if marks is not None and current_app.config["REPLICA_READ_YOUR_WRITES_SECONDS"] > 0:
+        marks.set(_key(user_id), b"1")
+
+
+def recently_wrote(user_id):
+    marks = current_app.extensions.get("replica_writes")
+    return marks is not None and marks.get(_key(user_id)) is not None
+
+
+def replica_read(view):
+    """Run a read-only view's SELECTs on the replica. Apply below @jwt_required()."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if current_app.extensions.get("replica_writes") is None or recently_wrote(
+            get_jwt_identity()
+        ):
+            return view(*args, **kwargs)
+        g._use_replica = True
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g._use_replica = False
+
+    return wrapper
@@ -1,11 +1,43 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import base64
+import json
+from flask import Blueprint, request, jsonify, url_for
+from flask_jwt_extended import current_user, jwt_required, get_jwt_identity
 from sqlalchemy import func
 from datetime import datetime, timedelta
-from src.model import db, Workout, WorkoutExercise, Exercise, ScheduledWorkout
+from src import analytics, recurrence
+from src.cache import cached_report, get_cache
+from src.model import (
+    db,
+    Workout,
+    WorkoutExercise,
+    Exercise,
+    PersonalRecord,
+    UserStats,
+    UserExerciseStats,
+)
+from src.replica import replica_read
+from src.timebuckets import (
+    InvalidTimezone,
+    as_date,
+    day_start,
+    get_zone,
+    local_today,
+    monday_of,
+    parse_utc,
+    utc_start_of,
+    week_start,
+)
 
 reports_bp = Blueprint("reports", __name__, url_prefix="/reports")
 
+UPCOMING_PAGE_SIZE = 50
+UPCOMING_MAX_PAGE_SIZE = 500
+
+
+# Helper: timezone for bucketing — ?tz= wins over the user's saved timezone
+def _resolve_zone():
+    return get_zone(request.args.get("tz") or current_user.timezone)
+
 
 # Helper: window parser
 def _parse_window_days(default=30):
@@ -18,45 +50,23 @@ def _parse_window_days(default=30):
 
 @reports_bp.route("/overview", methods=["GET"])
 @jwt_required()
+@replica_read
+@cached_report
 def overview():
     user_id = int(get_jwt_identity())
 
-    # total workouts
-    total = (
-        db.session.query(func.count(Workout.id))
-        .filter(Workout.user_id == user_id)
-        .scalar()
-    )
-
-    # total sets/reps/volume across all time
-    agg = (
-        db.session.query(
-            func.coalesce(func.sum(WorkoutExercise.sets), 0),
-            func.coalesce(func.sum(WorkoutExercise.reps), 0),
-            func.coalesce(
-                func.sum(
-                    WorkoutExercise.sets
-                    * WorkoutExercise.reps
-                    * func.coalesce(WorkoutExercise.weight, 0)
-                ),
-                0.0,
-            ),
-        )
-        .join(Workout, Workout.id == WorkoutExercise.workout_id)
-        .filter(Workout.user_id == user_id)
-        .one()
-    )
-    total_sets, total_reps, total_volume = agg
+    # all-time totals, kept current by src/rollups.py on every workout write
+    stats = db.session.get(UserStats, user_id)
+    total = stats.workouts if stats else 0
+    total_sets = stats.sets if stats else 0
+    total_reps = stats.reps if stats else 0
+    total_volume = stats.volume if stats else 0.0
 
     # top weight by exercise
     top_by_ex = (
-        db.session.query(
-            Exercise.name, func.coalesce(func.max(WorkoutExercise.weight), 0.0)
-        )
-        .join(WorkoutExercise, Exercise.id == WorkoutExercise.exercise_id)
-        .join(Workout, Workout.id == WorkoutExercise.workout_id)
-        .filter(Workout.user_id == user_id)
-        .group_by(Exercise.name)
+        db.session.query(Exercise.name, UserExerciseStats.max_weight)
+        .join(UserExerciseStats, Exercise.id == UserExerciseStats.exercise_id)
+        .filter(UserExerciseStats.user_id == user_id)
         .order_by(Exercise.name)
         .all()
     )
@@ -76,41 +86,115 @@ def overview():
     )
 
 
+@reports_bp.route("/records", methods=["GET"])
+@jwt_required()
+@replica_read
+def personal_records():
+    """Personal records (heaviest weight per exercise and rep count), optionally for one exercise."""
+    user_id = int(get_jwt_identity())
+    q = (
+        db.session.query(PersonalRecord, Exercise.name)
+        .join(Exercise, Exercise.id == PersonalRecord.exercise_id)
+        .filter(PersonalRecord.user_id == user_id)
+    )
+    exercise_id = request.args.get("exercise_id", type=int)
+    if exercise_id is not None:
+        q = q.filter(PersonalRecord.exercise_id == exercise_id)
+    rows = q.order_by(Exercise.name, PersonalRecord.reps).all()
+
+    return jsonify(
+        [
+            {
+                "exercise_id": pr.exercise_id,
+                "exercise": name,
+                "reps": pr.reps,
+                "weight": pr.weight,
+                "workout_id": pr.workout_id,
+                "achieved_at": pr.achieved_at.isoformat(),
+            }
+            for (pr, name) in rows
+        ]
+    )
+
+
 @reports_bp.route("/weekly", methods=["GET"])
 @jwt_required()
+@replica_read
+@cached_report
 def weekly():
-    """Workouts per week for the last N weeks (default 8)."""
+    """Workouts per week for the last N weeks (default 8), zero-filled, in the user's timezone."""
     user_id = int(get_jwt_identity())
     weeks = int(request.args.get("weeks", 8))
     weeks = max(1, min(weeks, 52))
+    try:
+        zone = _resolve_zone()
+    except InvalidTimezone as e:
+        return jsonify(msg=str(e)), 400
 
-    # SQLite-friendly week key
+    first_week = monday_of(local_today(zone)) - timedelta(weeks=weeks - 1)
+    week = week_start(Workout.created_at, zone).label("week")
     week_rows = (
-        db.session.query(
-            func.strftime("%Y-%W", Workout.created_at).label("week"),
-            func.count(Workout.id).label("count"),
+        db.session.query(week, func.count(Workout.id).label("count"))
+        .filter(
+            Workout.user_id == user_id,
+            Workout.created_at >= utc_start_of(first_week, zone),
         )
-        .filter(Workout.user_id == user_id)
         .group_by("week")
-        .order_by("week")
         .all()
     )
+    counts = {as_date(w): c for (w, c) in week_rows}
 
-    return jsonify([{"week": w, "count": c} for (w, c) in week_rows][-weeks:])
+    series = []
+    for i in range(weeks):
+        start = first_week + timedelta(weeks=i)
+        series.append(
+            {
+                "week": start.strftime("%Y-%W"),
+                "week_start": start.isoformat(),
+                "count": counts.get(start, 0),
+            }
+        )
+    return jsonify(series)
 
 
 @reports_bp.route("/exercise/<int:exercise_id>/progress", methods=["GET"])
 @jwt_required()
+@replica_read
+@cached_report
 def exercise_progress(exercise_id):
     """Time series of best weight and total volume per day for one exercise over a window."""
     user_id = int(get_jwt_identity())
     days = _parse_window_days(30)
-    since = datetime.utcnow() - timedelta(days=days)
+    try:
+        zone = _resolve_zone()
+    except InvalidTimezone as e:
+        return jsonify(msg=str(e)), 400
+    since = utc_start_of(local_today(zone) - timedelta(days=days - 1), zone)
+
+    # ?metrics=e1rm,rolling,trend,pr switches to the NumPy engine
+    metrics = [m for m in request.args.get("metrics", "").split(",") if m]
+    formula = request.args.get("formula", "epley")
+    if any(m not in analytics.METRICS for m in metrics):
+        return jsonify(msg=f"metrics must be among {', '.join(analytics.METRICS)}"), 400
+    if formula not in analytics.FORMULAS:
+        return jsonify(msg=f"formula must be one of {', '.join(analytics.FORMULAS)}"), 400
+    if metrics:
+        ex = db.session.get(Exercise, exercise_id)
+        result = analytics.progress(user_id, exercise_id, zone, days, metrics, formula)
+        return jsonify(
+            {
+                "exercise_id": exercise_id,
+                "exercise_name": ex.name if ex else None,
+                "window_days": days,
+                "timezone": zone.key,
+                **result,
+            }
+        )
 
     # per-day best weight & volume (sets*reps*weight)
     rows = (
         db.session.query(
-            func.strftime("%Y-%m-%d", Workout.created_at).label("day"),
+            day_start(Workout.created_at, zone).label("day"),
             func.coalesce(func.max(WorkoutExercise.weight), 0.0).label("best_weight"),
             func.coalesce(
                 func.sum(
@@ -133,48 +217,114 @@ def exercise_progress(exercise_id):
     )
 
     # exercise name (if exists)
-    ex = Exercise.query.get(exercise_id)
+    ex = db.session.get(Exercise, exercise_id)
     return jsonify(
         {
             "exercise_id": exercise_id,
             "exercise_name": ex.name if ex else None,
             "window_days": days,
+            "timezone": zone.key,
             "series": [
-                {"day": d, "best_weight": float(bw), "volume": float(v)}
+                {"day": as_date(d).isoformat(), "best_weight": float(bw), "volume": float(v)}
                 for (d, bw, v) in rows
             ],
         }
     )
 
 
+# Helpers: ?from=/?to= (ISO; offsets are converted, naive means UTC)
+def _time_arg(name):
+    value = request.args.get(name)
+    return None if value is None else parse_utc(value, name)
+
+
+# Helpers: opaque keyset cursor over recurrence.sort_key()
+def _encode_cursor(o):
+    at, sid, occurrence = recurrence.sort_key(o)
+    raw = json.dumps([at.isoformat(), sid, occurrence.isoformat()]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        at, sid, occurrence = json.loads(raw)
+        return datetime.fromisoformat(at), int(sid), datetime.fromisoformat(occurrence)
+    except (ValueError, TypeError):
+        return None
+
+
 @reports_bp.route("/upcoming", methods=["GET"])
 @jwt_required()
+@replica_read
 def upcoming():
-    """Upcoming scheduled workouts sorted by time."""
+    """
+    Upcoming scheduled workouts sorted by time, with recurring series expanded
+    ---
+    tags: [Reports]
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: query
+        name: from
+        type: string
+        description: Start of the window (ISO datetime, default now)
+      - in: query
+        name: to
+        type: string
+        description: End of the window, exclusive (default SCHEDULE_HORIZON_DAYS after from)
+      - in: query
+        name: limit
+        type: integer
+        default: 50
+        description: Page size (1-500)
+      - in: query
+        name: cursor
+        type: string
+        description: From the rel="next" Link header of the previous page
+    responses:
+      200:
+        description: >
+          One page of sessions; a Link header with rel="next" points to the
+          following page when there is one
+      400:
+        description: Invalid window or cursor
+    """
     user_id = int(get_jwt_identity())
-    rows = (
-        db.session.query(
-            ScheduledWorkout.id,
-            ScheduledWorkout.workout_id,
-            ScheduledWorkout.scheduled_at,
-            Workout.title,
-        )
-        .join(Workout, Workout.id == ScheduledWorkout.workout_id)
-        .filter(
-            Workout.user_id == user_id,
-            ScheduledWorkout.scheduled_at >= datetime.utcnow(),
-        )
-        .order_by(ScheduledWorkout.scheduled_at.asc())
-        .all()
-    )
-    return jsonify(
-        [
-            {
-                "id": sid,
-                "workout_id": wid,
-                "title": title,
-                "scheduled_at": dt.isoformat(),
-            }
-            for (sid, wid, dt, title) in rows
-        ]
-    )
+    try:
+        start = _time_arg("from") or datetime.utcnow()
+        end = _time_arg("to")
+    except ValueError as e:
+        return jsonify(msg=str(e)), 400
+    if end is not None and end <= start:
+        return jsonify(msg="to must be after from"), 400
+    try:
+        limit = int(request.args.get("limit", UPCOMING_PAGE_SIZE))
+    except ValueError:
+        limit = UPCOMING_PAGE_SIZE
+    limit = max(1, min(limit, UPCOMING_MAX_PAGE_SIZE))
+
+    after = None
+    if request.args.get("cursor"):
+        after = _decode_cursor(request.args["cursor"])
+        if after is None:
+            return jsonify(msg="invalid cursor"), 400
+
+    # one extra occurrence tells whether another page exists
+    items = recurrence.list_occurrences(user_id, start, end, limit=limit + 1, after=after)
+    resp = jsonify([recurrence.serialize(o, title=True) for o in items[:limit]])
+    if len(items) > limit:
+        args = {**request.args.to_dict(), "cursor": _encode_cursor(items[limit - 1])}
+        # pin the window so later pages do not drift with "now"
+        args.setdefault("from", start.isoformat())
+        resp.headers["Link"] = f'<{url_for(".upcoming", **args)}>; rel="next"'
+    return resp
+
+
+@reports_bp.route("/cache/stats", methods=["GET"])
+@jwt_required()
+def cache_stats():
+    """Report cache hit/miss counters for the worker process that answers (admins only)."""
+    if not current_user.is_admin:
+        return jsonify(msg="Admin privileges required"), 403
+    return jsonify(get_cache().stats())
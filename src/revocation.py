@@ -0,0 +1,189 @@
+# src/revocation.py
+"""
+Access-token revocation without a per-request database query.
+
+Revocations are persisted in TokenBlocklist and mirrored in each worker
+process as the revoked jtis plus a per-user "issued before" cutoff. The
+token_in_blocklist_loader only consults that in-memory copy; at most once
+every TOKEN_BLOCKLIST_REFRESH seconds a request first pulls the rows
+revoked since its previous refresh, so a revocation made by another
+gunicorn worker takes effect here within that interval. Revocations made
+by this worker apply immediately.
+
+Rows are read by `revoked_at`, not by id: ids are assigned at INSERT, and
+on Postgres a row can commit after one with a higher id is already
+visible. Each refresh therefore re-reads a trailing REFRESH_OVERLAP
+before the previous one, which also covers the gap between a row's
+`revoked_at` stamp and its commit. Applying a row twice is harmless.
+
+Cutoffs keep sub-second precision and tokens carry a fractional `iat`
+(RFC 7519 NumericDates may), so logging out everywhere and signing in
+again within the same second does not revoke the new token.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from src.model import db, TokenBlocklist
+
+
+# re-read on every refresh: covers commits that land out of revoked_at order
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def _epoch(dt):
+    return dt.replace(tzinfo=timezone.utc).timestamp()
+
+
+class Blocklist:
+    """In-memory mirror of TokenBlocklist for one worker process."""
+
+    def __init__(self, refresh_interval=5.0):
+        self.refresh_interval = refresh_interval
+        self._jtis = {}  # jti -> expiry (epoch seconds) or None
+        self._cutoffs = {}  # user_id -> (cutoff, expiry); tokens with iat < cutoff are revoked
+        self._since = None  # start of the previous refresh (naive UTC)
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def _apply(self, jti, user_id, revoked_at, expires_at=None):
+        expires = _epoch(expires_at) if expires_at is not None else None
+        if expires is not None and expires <= time.time():
+            return  # every token it covers has expired anyway
+        if jti is not None:
+            self._jtis[jti] = expires
+        else:
+            cutoff = _epoch(revoked_at)
+            if cutoff >= self._cutoffs.get(user_id, (cutoff, None))[0]:
+                self._cutoffs[user_id] = (cutoff, expires)
+
+    def _sweep(self):
+        now = time.time()
+        self._jtis = {j: e for j, e in self._jtis.items() if e is None or e > now}
+        self._cutoffs = {
+            u: (c, e) for u, (c, e) in self._cutoffs.items() if e is None or e > now
+        }
+
+    def refresh(self, force=False):
+        """Load rows revoked since the last refresh, if the interval has elapsed.
+
+        The first refresh loads every row that still matters.
+        """
+        if not force and time.monotonic() < self._next_refresh:
+            return
+        # one thread refreshes; the others keep answering from the current copy
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            started = datetime.utcnow()
+            query = select(
+                TokenBlocklist.jti,
+                TokenBlocklist.user_id,
+                TokenBlocklist.revoked_at,
+                TokenBlocklist.expires_at,
+            )
+            if self._since is None:
+                query = query.where(
+                    or_(TokenBlocklist.expires_at.is_(None), TokenBlocklist.expires_at > started)
+                )
+            else:
+                query = query.where(TokenBlocklist.revoked_at >= self._since - REFRESH_OVERLAP)
+            for jti, user_id, revoked_at, expires_at in db.session.execute(query):
+                self._apply(jti, user_id, revoked_at, expires_at)
+            self._since = started
+            self._sweep()
+            self._next_refresh = time.monotonic() + self.refresh_interval
+        finally:
+            self._lock.release()
+
+    def is_revoked(self, jwt_payload):
+        self.refresh()
+        if jwt_payload.get("jti") in self._jtis:
+            return True
+        cutoff = self._cutoffs.get(int(jwt_payload["sub"]))
+        return cutoff is not None and jwt_payload.get("iat", 0) < cutoff[0]
+
+
+def init_app(app, jwt):
+    app.config.setdefault(
+        "TOKEN_BLOCKLIST_REFRESH", float(os.getenv("TOKEN_BLOCKLIST_REFRESH", 5))
+    )
+    blocklist = Blocklist(app.config["TOKEN_BLOCKLIST_REFRESH"])
+    app.extensions["token_blocklist"] = blocklist
+
+    @jwt.additional_claims_loader
+    def _precise_iat(_identity):
+        # a whole-second iat would fall before a revoke-all made earlier in that second
+        return {"iat": time.time()}
+
+    @jwt.token_in_blocklist_loader
+    def _is_revoked(_jwt_header, jwt_payload):
+        return blocklist.is_revoked(jwt_payload)
+
+
+def get_blocklist():
+    return current_app.extensions["token_blocklist"]
+
+
+def _token_lifetime():
+    expires = current_app.config.get("JWT_ACCESS_TOKEN_EXPIRES", timedelta(minutes=15))
+    if expires is False:
+        return None
+    return expires if isinstance(expires, timedelta) else timedelta(seconds=expires)
+
+
+def revoke_token(jti, user_id=None, expires_at=None):
+    """Revoke one token by jti. Commits.
+
+    Without `expires_at` the row is kept for one full token lifetime, the
+    longest the token can still be valid.
+    """
+    now = datetime.utcnow()
+    if expires_at is None and (lifetime := _token_lifetime()):
+        expires_at = now + lifetime
+    db.session.add(
+        TokenBlocklist(jti=jti, user_id=user_id, revoked_at=now, expires_at=expires_at)
+    )
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # already revoked
+    get_blocklist()._apply(jti, user_id, now, expires_at)
+
+
+def revoke_user(user_id):
+    """Revoke every token issued to `user_id` so far. Commits."""
+    user_id = int(user_id)
+    now = datetime.utcnow()
+    lifetime = _token_lifetime()
+    expires_at = now + lifetime if lifetime else None
+    db.session.add(TokenBlocklist(user_id=user_id, revoked_at=now, expires_at=expires_at))
+    db.session.commit()
+    get_blocklist()._apply(None, user_id, now, expires_at)
+
+
+def prune():
+    """Delete rows whose tokens have all expired. Caller commits."""
+    return db.session.execute(
+        delete(TokenBlocklist).where(TokenBlocklist.expires_at <= datetime.utcnow())
+    ).rowcount
+
+
+# — CLI —
+
+tokens_cli = AppGroup("tokens", help="Maintain the access-token blocklist.")
+
+
+@tokens_cli.command("prune")
+def prune_command():
+    """Remove blocklist rows for tokens that have expired."""
+    removed = prune()
+    db.session.commit()
+    click.echo(f"Removed {removed} expired blocklist rows.")
@@ -0,0 +1,297 @@
+# src/rollups.py
+"""
+Per-user rollups behind /reports/overview.
+
+Workout writes call add_entries()/remove_entries() inside their own
+transaction, so UserStats and UserExerciseStats always commit (or roll back)
+together with the rows they summarize. `flask rollups rebuild` recomputes
+them from scratch and `flask rollups check` diffs them against the live
+aggregate.
+"""
+import math
+
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, delete, func, select
+
+from src import records
+from src.model import (
+    db,
+    upsert,
+    UPSERT_DIALECTS,
+    Workout,
+    WorkoutExercise,
+    UserStats,
+    UserExerciseStats,
+)
+
+
+def init_app(app):
+    # the rollup writes are upserts; refuse to start where they cannot run
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    if dialect not in UPSERT_DIALECTS:
+        raise RuntimeError(
+            f"rollups need INSERT ... ON CONFLICT, which is not supported on {dialect}; "
+            f"use one of {', '.join(sorted(UPSERT_DIALECTS))}"
+        )
+
+
+def _weight(entry):
+    return float(entry.weight or 0)
+
+
+def _summarize(entries):
+    """Collapse entries into totals and {exercise_id: (count, max_weight)}."""
+    sets = reps = 0
+    volume = 0.0
+    by_ex = {}
+    for e in entries:
+        sets += e.sets
+        reps += e.reps
+        volume += e.sets * e.reps * _weight(e)
+        count, top = by_ex.get(e.exercise_id, (0, 0.0))
+        by_ex[e.exercise_id] = (count + 1, max(top, _weight(e)))
+    return sets, reps, volume, by_ex
+
+
+def _bump_totals(user_id, workouts, sets, reps, volume):
+    # one statement, so two first writes for a user cannot both insert
+    stmt = upsert(UserStats).values(
+        user_id=user_id, workouts=workouts, sets=sets, reps=reps, volume=volume
+    )
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserStats.user_id],
+            set_={
+                "workouts": UserStats.workouts + stmt.excluded.workouts,
+                "sets": UserStats.sets + stmt.excluded.sets,
+                "reps": UserStats.reps + stmt.excluded.reps,
+                "volume": UserStats.volume + stmt.excluded.volume,
+            },
+        )
+    )
+
+
+def add_entries(user_id, entries, workouts=1):
+    """Fold newly written WorkoutExercise-like rows into the user's rollups.
+
+    `entries` only needs exercise_id/sets/reps/weight attributes. Pass
+    workouts=0 when the rows belong to an existing workout.
+    """
+    user_id = int(user_id)
+    sets, reps, volume, by_ex = _summarize(entries)
+    _bump_totals(user_id, workouts, sets, reps, volume)
+
+    if not by_ex:
+        return
+    # one executemany upsert, so first-seen exercises cannot collide either
+    db.session.flush()  # Core statements below bypass autoflush
+    stmt = upsert(UserExerciseStats)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserExerciseStats.user_id, UserExerciseStats.exercise_id],
+            set_={
+                "entries": UserExerciseStats.entries + stmt.excluded.entries,
+                "max_weight": case(
+                    (
+                        UserExerciseStats.max_weight < stmt.excluded.max_weight,
+                        stmt.excluded.max_weight,
+                    ),
+                    else_=UserExerciseStats.max_weight,
+                ),
+            },
+        ),
+        [
+            dict(user_id=user_id, exercise_id=ex, entries=count, max_weight=weight)
+            for ex, (count, weight) in by_ex.items()
+        ],
+    )
+    # rows loaded earlier in this session (e.g. by remove_entries) are now stale
+    for ex in by_ex:
+        loaded = db.session.identity_map.get(
+            db.session.identity_key(UserExerciseStats, (user_id, ex))
+        )
+        if loaded is not None:
+            db.session.expire(loaded)
+
+
+def remove_entries(user_id, entries, workouts=1):
+    """Subtract deleted rows from the user's rollups.
+
+    Must run after the deletion has been flushed: when a removed row held
+    the max weight, the max is recomputed from the remaining live rows.
+    """
+    user_id = int(user_id)
+    sets, reps, volume, by_ex = _summarize(entries)
+    _bump_totals(user_id, -workouts, -sets, -reps, -volume)
+
+    if not by_ex:
+        return
+    # one SELECT for the stats rows and, if needed, one grouped max over live rows
+    stale = []
+    for row in db.session.scalars(
+        select(UserExerciseStats).where(
+            UserExerciseStats.user_id == user_id,
+            UserExerciseStats.exercise_id.in_(by_ex),
+        )
+    ):
+        count, top = by_ex[row.exercise_id]
+        row.entries -= count
+        if row.entries <= 0:
+            db.session.delete(row)
+        elif top >= row.max_weight:
+            stale.append(row)
+    if stale:
+        live = _live_max_weights(user_id, [row.exercise_id for row in stale])
+        for row in stale:
+            row.max_weight = live.get(row.exercise_id, 0.0)
+
+
+def _live_max_weights(user_id, exercise_ids):
+    """{exercise_id: heaviest remaining weight} for the user's live rows."""
+    rows = db.session.execute(
+        select(
+            WorkoutExercise.exercise_id,
+            func.coalesce(func.max(WorkoutExercise.weight), 0.0),
+        )
+        .join(Workout, Workout.id == WorkoutExercise.workout_id)
+        .where(Workout.user_id == user_id, WorkoutExercise.exercise_id.in_(exercise_ids))
+        .group_by(WorkoutExercise.exercise_id)
+    )
+    return {exercise_id: float(weight) for exercise_id, weight in rows}
+
+
+# — Live aggregates (source of truth for rebuild/check) —
+
+
+def live_totals(user_id=None):
+    """{user_id: (workouts, sets, reps, volume)} computed from workout rows."""
+    counts = select(Workout.user_id, func.count(Workout.id)).group_by(Workout.user_id)
+    sums = (
+        select(
+            Workout.user_id,
+            func.sum(WorkoutExercise.sets),
+            func.sum(WorkoutExercise.reps),
+            func.sum(
+                WorkoutExercise.sets
+                * WorkoutExercise.reps
+                * func.coalesce(WorkoutExercise.weight, 0)
+            ),
+        )
+        .join(WorkoutExercise, Workout.id == WorkoutExercise.workout_id)
+        .group_by(Workout.user_id)
+    )
+    if user_id is not None:
+        counts = counts.where(Workout.user_id == user_id)
+        sums = sums.where(Workout.user_id == user_id)
+
+    totals = {uid: (n, 0, 0, 0.0) for uid, n in db.session.execute(counts)}
+    for uid, s, r, v in db.session.execute(sums):
+        totals[uid] = (totals[uid][0], int(s or 0), int(r or 0), float(v or 0.0))
+    return totals
+
+
+def live_exercise_stats(user_id=None):
+    """{(user_id, exercise_id): (entries, max_weight)} computed from workout rows."""
+    q = (
+        select(
+            Workout.user_id,
+            WorkoutExercise.exercise_id,
+            func.count(WorkoutExercise.id),
+            func.coalesce(func.max(WorkoutExercise.weight), 0.0),
+        )
+        .join(WorkoutExercise, Workout.id == WorkoutExercise.workout_id)
+        .group_by(Workout.user_id, WorkoutExercise.exercise_id)
+    )
+    if user_id is not None:
+        q = q.where(Workout.user_id == user_id)
+    return {(uid, ex): (n, float(m)) for uid, ex, n, m in db.session.execute(q)}
+
+
+def rebuild(user_id=None):
+    """Replace stored rollups with freshly computed ones. Caller commits."""
+    del_totals = delete(UserStats)
+    del_ex = delete(UserExerciseStats)
+    if user_id is not None:
+        del_totals = del_totals.where(UserStats.user_id == user_id)
+        del_ex = del_ex.where(UserExerciseStats.user_id == user_id)
+    db.session.execute(del_totals)
+    db.session.execute(del_ex)
+
+    totals = [
+        dict(user_id=uid, workouts=w, sets=s, reps=r, volume=v)
+        for uid, (w, s, r, v) in live_totals(user_id).items()
+    ]
+    ex_stats = [
+        dict(user_id=uid, exercise_id=ex, entries=n, max_weight=m)
+        for (uid, ex), (n, m) in live_exercise_stats(user_id).items()
+    ]
+    if totals:
+        db.session.execute(UserStats.__table__.insert(), totals)
+    if ex_stats:
+        db.session.execute(UserExerciseStats.__table__.insert(), ex_stats)
+    return len(totals), len(ex_stats)
+
+
+def _close(a, b):
+    # volume is a running float sum, so allow for accumulated rounding
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+
+
+def check(user_id=None):
+    """Return a list of human-readable mismatches between stored and live rollups."""
+    problems = []
+
+    stored = db.session.query(UserStats)
+    if user_id is not None:
+        stored = stored.filter(UserStats.user_id == user_id)
+    stored = {
+        s.user_id: (s.workouts, s.sets, s.reps, s.volume)
+        for s in stored
+        if (s.workouts, s.sets, s.reps) != (0, 0, 0)
+    }
+    live = live_totals(user_id)
+    for uid in sorted(set(stored) | set(live)):
+        got, want = stored.get(uid), live.get(uid)
+        if got is None or want is None or got[:3] != want[:3] or not _close(got[3], want[3]):
+            problems.append(f"user {uid}: totals stored={got} live={want}")
+
+    stored_ex = db.session.query(UserExerciseStats)
+    if user_id is not None:
+        stored_ex = stored_ex.filter(UserExerciseStats.user_id == user_id)
+    stored_ex = {(s.user_id, s.exercise_id): (s.entries, s.max_weight) for s in stored_ex}
+    live_ex = live_exercise_stats(user_id)
+    for key in sorted(set(stored_ex) | set(live_ex)):
+        got, want = stored_ex.get(key), live_ex.get(key)
+        if got is None or want is None or got[0] != want[0] or not _close(got[1], want[1]):
+            problems.append(f"user {key[0]} exercise {key[1]}: stored={got} live={want}")
+
+    return problems
+
+
+rollups_cli = AppGroup("rollups", help="Maintain the per-user report rollups.")
+
+
+@rollups_cli.command("rebuild")
+@click.option("--user-id", type=int, default=None, help="Only rebuild this user.")
+def rebuild_command(user_id):
+    """Recompute rollups and personal records from workout rows."""
+    users, exercises = rebuild(user_id)
+    prs = records.rebuild(user_id)
+    db.session.commit()
+    click.echo(
+        f"Rebuilt rollups for {users} users ({exercises} exercise rows, {prs} records)."
+    )
+
+
+@rollups_cli.command("check")
+@click.option("--user-id", type=int, default=None, help="Only check this user.")
+def check_command(user_id):
+    """Compare stored rollups and records with the live aggregate; exit 1 on drift."""
+    problems = check(user_id) + records.check(user_id)
+    for p in problems:
+        click.echo(p)
+    if problems:
+        raise click.ClickException(f"{len(problems)} rollup mismatches")
+    click.echo("Rollups are consistent.")
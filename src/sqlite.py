@@ -0,0 +1,132 @@
+# src/sqlite.py
+"""
+Production settings for a file-backed SQLite database.
+
+Every new connection gets WAL journaling (readers never block the writer
+and vice versa), synchronous=NORMAL (fsync at checkpoints, not on every
+commit), a busy timeout, a memory-mapped read window and a larger page
+cache (SQLITE_* settings below).
+
+Writers are serialized explicitly: views decorated with
+@serialized_write open their transaction with BEGIN IMMEDIATE, so they
+queue for the write lock up front (bounded by the busy timeout) instead
+of reading under a snapshot that is stale by the time they write, which
+fails at once with "database is locked". A read transaction that is
+already open when the write starts (the JWT lookups run first) is rolled
+back beforehand, except inside an atomic batch (src/batch.py), which takes
+the lock itself. If a writer still loses the race, it is rolled back and
+re-run with jittered exponential backoff, up to SQLITE_WRITE_RETRIES
+times. Writers that commit more than once, like the bulk import, wrap
+each transaction in run_serialized() instead.
+
+Nothing here applies to other databases or to in-memory SQLite.
+"""
+import os
+import random
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from src.model import db
+
+
+def _is_file_sqlite(engine):
+    database = engine.url.database
+    return engine.dialect.name == "sqlite" and database not in (None, "", ":memory:")
+
+
+def _is_locked(exc):
+    message = str(getattr(exc, "orig", exc)).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def configure_engine(engine, busy_timeout_ms, mmap_size, cache_size_kib):
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, _record):
+        # take over transaction control from the sqlite3 module (see _on_begin)
+        dbapi_conn.isolation_level = None
+        cursor = dbapi_conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(cache_size_kib)}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _on_begin(conn):
+        writing = has_app_context() and g.get("_serialized_write", False)
+        conn.exec_driver_sql("BEGIN IMMEDIATE" if writing else "BEGIN")
+
+
+def init_app(app):
+    app.config.setdefault("SQLITE_TUNING", os.getenv("SQLITE_TUNING", "1") != "0")
+    app.config.setdefault(
+        "SQLITE_BUSY_TIMEOUT_MS", int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    )
+    app.config.setdefault(
+        "SQLITE_MMAP_SIZE", int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    )
+    app.config.setdefault(
+        "SQLITE_CACHE_SIZE_KIB", int(os.getenv("SQLITE_CACHE_SIZE_KIB", 65536))
+    )
+    app.config.setdefault(
+        "SQLITE_WRITE_RETRIES", int(os.getenv("SQLITE_WRITE_RETRIES", 3))
+    )
+    if not app.config["SQLITE_TUNING"]:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if _is_file_sqlite(engine):
+                configure_engine(
+                    engine,
+                    app.config["SQLITE_BUSY_TIMEOUT_MS"],
+                    app.config["SQLITE_MMAP_SIZE"],
+                    app.config["SQLITE_CACHE_SIZE_KIB"],
+                )
+
+
+def run_serialized(fn, *args, **kwargs):
+    """Call `fn` with its transaction opened as BEGIN IMMEDIATE, retrying on lock errors.
+
+    `fn` must commit its own transaction and be safe to re-run after a rollback.
+    """
+    if (
+        _is_file_sqlite(db.engine)
+        and not g.get("_atomic_batch", False)
+        and db.session().in_transaction()
+    ):
+        # e.g. the JWT blocklist and identity lookups already began a deferred
+        # read; end it so the write's own transaction starts IMMEDIATE
+        db.session.rollback()
+    g._serialized_write = True
+    retries = current_app.config.get("SQLITE_WRITE_RETRIES", 0)
+    try:
+        for attempt in range(retries + 1):
+            try:
+                return fn(*args, **kwargs)
+            except OperationalError as e:
+                db.session.rollback()
+                if attempt == retries or not _is_locked(e):
+                    raise
+                current_app.logger.info("database locked, retrying %s", request.endpoint)
+                time.sleep(0.05 * 2**attempt * (0.5 + random.random()))
+    finally:
+        g._serialized_write = False
+
+
+def serialized_write(view):
+    """Run a single-commit write view as an IMMEDIATE transaction, retrying on lock errors.
+
+    The view must be safe to re-run after a rollback. Apply below @jwt_required().
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return run_serialized(view, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,132 @@
+# src/timebuckets.py
+"""
+Dialect-portable day/week bucketing of naive-UTC timestamps.
+
+`day_start(col, tz)` and `week_start(col, tz)` compile to
+`date_trunc(...)` over `timezone(tz, ...)` on Postgres and to SQLite's
+`date(col, '<offset>', ...)` elsewhere. SQLite has no zone database, so
+the zone's current UTC offset is applied; buckets right next to a DST
+change can land on the neighbouring day there. Weeks start on Monday.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import Date, bindparam
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+class InvalidTimezone(ValueError):
+    pass
+
+
+def get_zone(name):
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        raise InvalidTimezone(f"unknown timezone {name!r}")
+
+
+def _offset_modifier(zone):
+    offset = datetime.now(zone).utcoffset() or timedelta(0)
+    return f"{int(offset.total_seconds() // 60):+d} minutes"
+
+
+class _bucket_start(FunctionElement):
+    type = Date()
+    inherit_cache = True
+
+    def __init__(self, column, zone):
+        super().__init__(
+            column,
+            bindparam(None, zone.key, unique=True),
+            bindparam(None, _offset_modifier(zone), unique=True),
+        )
+
+
+class day_start(_bucket_start):
+    """Local calendar date of a naive-UTC timestamp."""
+
+    name = "day_start"
+    inherit_cache = True
+
+
+class week_start(_bucket_start):
+    """Local date of the Monday starting the week of a naive-UTC timestamp."""
+
+    name = "week_start"
+    inherit_cache = True
+
+
+@compiles(day_start)
+def _day_start_sqlite(element, compiler, **kw):
+    col, _, offset = element.clauses
+    return f"date({compiler.process(col, **kw)}, {compiler.process(offset, **kw)})"
+
+
+@compiles(week_start)
+def _week_start_sqlite(element, compiler, **kw):
+    col, _, offset = element.clauses
+    # 'weekday 0' rolls forward to Sunday (or stays), -6 days lands on Monday
+    return (
+        f"date({compiler.process(col, **kw)}, {compiler.process(offset, **kw)},"
+        " 'weekday 0', '-6 days')"
+    )
+
+
+def _pg_trunc(unit, element, compiler, **kw):
+    col, tz, _ = element.clauses
+    return (
+        f"CAST(date_trunc('{unit}', timezone({compiler.process(tz, **kw)},"
+        f" timezone('UTC', {compiler.process(col, **kw)}))) AS DATE)"
+    )
+
+
+@compiles(day_start, "postgresql")
+def _day_start_pg(element, compiler, **kw):
+    return _pg_trunc("day", element, compiler, **kw)
+
+
+@compiles(week_start, "postgresql")
+def _week_start_pg(element, compiler, **kw):
+    return _pg_trunc("week", element, compiler, **kw)
+
+
+# — Python-side helpers —
+
+
+def as_date(value):
+    """Normalize a bucket value (str on SQLite, date on Postgres) to a date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+def local_today(zone):
+    return datetime.now(zone).date()
+
+
+def monday_of(day):
+    return day - timedelta(days=day.weekday())
+
+
+def parse_utc(value, name):
+    """Naive UTC from an ISO datetime string; offsets are converted, naive means UTC."""
+    try:
+        when = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid {name}")
+    if when.tzinfo is not None:
+        try:
+            when = when.astimezone(timezone.utc).replace(tzinfo=None)
+        except OverflowError:
+            raise ValueError(f"invalid {name}")
+    return when
+
+
+def utc_start_of(day, zone):
+    """Naive-UTC instant of local midnight at the start of `day`."""
+    local = datetime.combine(day, time.min, tzinfo=zone)
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
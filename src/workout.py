@@ -1,12 +1,52 @@
 # src/workouts.py
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import base64
+import csv
+import hashlib
+import io
+import json
+from flask import Blueprint, Response, abort, request, jsonify, stream_with_context
+from flask_jwt_extended import current_user, jwt_required, get_jwt_identity
 from datetime import datetime
-from src.model import db, Workout, WorkoutExercise, ScheduledWorkout
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import selectinload
+from src.model import (
+    db,
+    Exercise,
+    Workout,
+    WorkoutExercise,
+    ScheduledWorkout,
+    ScheduleException,
+)
+from src import edits, recurrence, records, rollups
+from src.cache import bump_data_version
+from src.importer import import_workouts
+from src.replica import replica_read
+from src.sqlite import serialized_write
+from src.timebuckets import get_zone, parse_utc
 
 workouts_bp = Blueprint("workouts", __name__, url_prefix="/workouts")
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = [
+    "workout_id",
+    "title",
+    "notes",
+    "created_at",
+    "entry_id",
+    "exercise_id",
+    "exercise_name",
+    "sets",
+    "reps",
+    "weight",
+]
+
+# Loader options that fetch a workout's exercises (and each exercise's name)
+# in one extra SELECT per batch of workouts instead of one per row.
+_WITH_EXERCISES = selectinload(Workout.exercises).joinedload(WorkoutExercise.exercise)
+
 
 # Helper: serialize a Workout (including its exercises)
 def serialize_workout(w):
@@ -31,6 +71,7 @@ def serialize_workout(w):
 
 @workouts_bp.route("", methods=["POST"])
 @jwt_required()
+@serialized_write
 def create_workout():
     """
     Create workout
@@ -81,165 +122,632 @@ def create_workout():
                   reps:         {type: integer}
                   weight:       {type: number}
       400:
-        description: Validation error
+        description: Validation error (missing fields or unknown exercise_id)
     """
-    user_id = get_jwt_identity()
-    data = request.get_json() or {}
-    title = data.get("title")
-    exercises = data.get("exercises", [])  # list of {exercise_id, sets, reps, weight}
-    if not title or not exercises:
-        return jsonify(msg="title and exercises required"), 400
-
-    # Create workout
-    w = Workout(user_id=user_id, title=title, notes=data.get("notes"))
-    db.session.add(w)
-    db.session.flush()  # get w.id
-
-    # Link exercises
-    for ex in exercises:
-        # Optionally validate ex['exercise_id'] exists
-        we = WorkoutExercise(
-            workout_id=w.id,
-            exercise_id=ex["exercise_id"],
-            sets=ex["sets"],
-            reps=ex["reps"],
-            weight=ex.get("weight", 0),
-        )
-        db.session.add(we)
-
+    try:
+        body = edits.create_workout(get_jwt_identity(), request.get_json() or {})
+    except edits.InvalidEdit as e:
+        return jsonify(msg=str(e)), 400
     db.session.commit()
-    return jsonify(serialize_workout(w)), 201
+    return jsonify(body), 201
+
+
+# Helper: opaque keyset cursor over (created_at, id)
+def _encode_cursor(w):
+    raw = json.dumps([w.created_at.isoformat(), w.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, wid = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(wid)
+    except (ValueError, TypeError):
+        return None
+
+
+# Helpers: strong validators for conditional GETs
+def _workout_etag(wid, revision):
+    return f"w{wid}.{revision}"
+
+
+def _list_etag(user_id):
+    """Validator for the user's workout list: changes on any create, edit or delete."""
+    count, last_update = (
+        db.session.query(func.count(Workout.id), func.max(Workout.updated_at))
+        .filter(Workout.user_id == user_id)
+        .one()
+    )
+    raw = "|".join(
+        [
+            str(count),
+            last_update.isoformat() if last_update else "",
+            request.args.get("limit", ""),
+            request.args.get("cursor", ""),
+        ]
+    )
+    return "l" + hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def _not_modified(etag):
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    return resp
 
 
 @workouts_bp.route("", methods=["GET"])
 @jwt_required()
+@replica_read
 def list_workouts():
+    """
+    List workouts (newest first, keyset-paginated)
+    ---
+    tags: [Workouts]
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        default: 50
+        description: Page size (1-200)
+      - in: query
+        name: cursor
+        type: string
+        description: next_cursor from the previous page
+    responses:
+      200:
+        description: One page of workouts
+        schema:
+          type: object
+          properties:
+            workouts:    {type: array, items: {type: object}}
+            next_cursor: {type: string, description: "null on the last page"}
+      304:
+        description: Unchanged since the ETag sent in If-None-Match
+      400:
+        description: Invalid cursor
+    """
     user_id = get_jwt_identity()
-    ws = Workout.query.filter_by(user_id=user_id).order_by(Workout.created_at.desc())
-    return jsonify([serialize_workout(w) for w in ws])
+    etag = _list_etag(user_id)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+
+    try:
+        limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    q = Workout.query.options(_WITH_EXERCISES).filter(Workout.user_id == user_id)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        decoded = _decode_cursor(cursor)
+        if decoded is None:
+            return jsonify(msg="invalid cursor"), 400
+        created_at, last_id = decoded
+        q = q.filter(
+            or_(
+                Workout.created_at < created_at,
+                and_(Workout.created_at == created_at, Workout.id < last_id),
+            )
+        )
+
+    # fetch one extra row to know whether another page exists
+    ws = q.order_by(Workout.created_at.desc(), Workout.id.desc()).limit(limit + 1).all()
+    next_cursor = _encode_cursor(ws[limit - 1]) if len(ws) > limit else None
+    resp = jsonify(
+        workouts=[serialize_workout(w) for w in ws[:limit]],
+        next_cursor=next_cursor,
+    )
+    resp.set_etag(etag)
+    return resp
+
+
+@workouts_bp.route("/import", methods=["POST"])
+@jwt_required()
+def import_workouts_route():
+    """
+    Bulk import workouts (streamed NDJSON or CSV body)
+    ---
+    tags: [Workouts]
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/x-ndjson
+      - text/csv
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [ndjson, csv]
+        description: Defaults from Content-Type (text/csv => csv, else ndjson)
+    responses:
+      201:
+        description: Summary of created rows and per-line errors
+        schema:
+          type: object
+          properties:
+            workouts_created:  {type: integer}
+            exercises_created: {type: integer}
+            error_count:       {type: integer}
+            errors:
+              type: array
+              items:
+                type: object
+                properties:
+                  line:  {type: integer}
+                  error: {type: string}
+      400:
+        description: Nothing imported
+    """
+    user_id = int(get_jwt_identity())
+    fmt = request.args.get("format")
+    if fmt is None:
+        fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+    if fmt not in ("ndjson", "csv"):
+        return jsonify(msg="format must be ndjson or csv"), 400
+
+    lines = io.TextIOWrapper(
+        request.stream, encoding="utf-8", errors="surrogateescape", newline=""
+    )
+    summary = import_workouts(user_id, lines, fmt)
+    status = 201 if summary["workouts_created"] else 400
+    return jsonify(summary), status
+
+
+def _export_rows(user_id):
+    """Yield flat (workout, entry) Core rows oldest-first in server-side batches."""
+    stmt = (
+        select(
+            Workout.id,
+            Workout.title,
+            Workout.notes,
+            Workout.created_at,
+            WorkoutExercise.id,
+            WorkoutExercise.exercise_id,
+            Exercise.name,
+            WorkoutExercise.sets,
+            WorkoutExercise.reps,
+            WorkoutExercise.weight,
+        )
+        .outerjoin(WorkoutExercise, WorkoutExercise.workout_id == Workout.id)
+        .outerjoin(Exercise, Exercise.id == WorkoutExercise.exercise_id)
+        .where(Workout.user_id == user_id)
+        .order_by(Workout.created_at, Workout.id, WorkoutExercise.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    yield from db.session.execute(stmt)
+
+
+def _export_ndjson(rows):
+    # one line per workout; rows arrive grouped by workout id
+    current = None
+    for wid, title, notes, created_at, eid, ex_id, ex_name, sets, reps, weight in rows:
+        if current is None or current["id"] != wid:
+            if current is not None:
+                yield json.dumps(current) + "\n"
+            current = {
+                "id": wid,
+                "title": title,
+                "notes": notes,
+                "created_at": created_at.isoformat() if created_at else None,
+                "exercises": [],
+            }
+        if eid is not None:
+            current["exercises"].append(
+                {
+                    "id": eid,
+                    "exercise_id": ex_id,
+                    "exercise_name": ex_name,
+                    "sets": sets,
+                    "reps": reps,
+                    "weight": weight,
+                }
+            )
+    if current is not None:
+        yield json.dumps(current) + "\n"
+
+
+def _export_csv(rows):
+    # one line per exercise entry; the buffer is drained after every row
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        row = list(row)
+        row[3] = row[3].isoformat() if row[3] else ""
+        writer.writerow(row)
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    yield buf.getvalue()
+
+
+@workouts_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_workouts():
+    """
+    Export full workout history (streamed)
+    ---
+    tags: [Workouts]
+    security:
+      - BearerAuth: []
+    produces:
+      - application/x-ndjson
+      - text/csv
+    parameters:
+      - in: query
+        name: format
+        type: string
+        enum: [ndjson, csv]
+        default: ndjson
+        description: ndjson = one workout per line; csv = one exercise entry per line
+    responses:
+      200:
+        description: Streamed history, oldest first
+      400:
+        description: Unknown format
+    """
+    user_id = int(get_jwt_identity())
+    fmt = request.args.get("format", "ndjson").lower()
+    if fmt == "ndjson":
+        body, mimetype = _export_ndjson(_export_rows(user_id)), "application/x-ndjson"
+    elif fmt == "csv":
+        body, mimetype = _export_csv(_export_rows(user_id)), "text/csv"
+    else:
+        return jsonify(msg="format must be ndjson or csv"), 400
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment; filename=workouts.{fmt}",
+        },
+    )
 
 
 @workouts_bp.route("/<int:wid>", methods=["GET"])
 @jwt_required()
+@replica_read
 def get_workout(wid):
     user_id = get_jwt_identity()
-    w = Workout.query.filter_by(id=wid, user_id=user_id).first_or_404()
-    return jsonify(serialize_workout(w))
+    if request.if_none_match:
+        # cheap revision probe so unchanged workouts are never loaded or serialized
+        revision = (
+            db.session.query(Workout.revision)
+            .filter_by(id=wid, user_id=user_id)
+            .first_or_404()[0]
+        )
+        etag = _workout_etag(wid, revision)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+
+    w = (
+        Workout.query.options(_WITH_EXERCISES)
+        .filter_by(id=wid, user_id=user_id)
+        .first_or_404()
+    )
+    resp = jsonify(serialize_workout(w))
+    resp.set_etag(_workout_etag(w.id, w.revision))
+    return resp
 
 
 @workouts_bp.route("/<int:wid>", methods=["PUT"])
 @jwt_required()
+@serialized_write
 def update_workout(wid):
     user_id = get_jwt_identity()
     w = Workout.query.filter_by(id=wid, user_id=user_id).first_or_404()
     data = request.get_json() or {}
+    diff = None
+    if "exercises" in data:
+        # entries sent back with their id are kept (and updated in place)
+        try:
+            diff = edits.diff_entries(w.exercises, data["exercises"])
+        except edits.InvalidEdit as e:
+            return jsonify(msg=str(e)), 400
+
     w.title = data.get("title", w.title)
     w.notes = data.get("notes", w.notes)
+    return _save_edit(user_id, w, diff)
 
-    # Optional: clear & re-add exercises
-    if "exercises" in data:
-        WorkoutExercise.query.filter_by(workout_id=w.id).delete()
-        for ex in data["exercises"]:
-            we = WorkoutExercise(
-                workout_id=w.id,
-                exercise_id=ex["exercise_id"],
-                sets=ex["sets"],
-                reps=ex["reps"],
-                weight=ex.get("weight", 0),
-            )
-            db.session.add(we)
 
+@workouts_bp.route("/<int:wid>", methods=["PATCH"])
+@jwt_required()
+@serialized_write
+def patch_workout(wid):
+    """
+    Edit part of a workout
+    ---
+    tags: [Workouts]
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/json-patch+json
+      - application/json
+    parameters:
+      - in: path
+        name: wid
+        type: integer
+        required: true
+      - in: body
+        name: operations
+        required: true
+        description: >
+          JSON-patch style operations applied in order. Paths are /title,
+          /notes, /exercises/- (add an entry) and /exercises/{entry_id}[/field]
+          (replace or remove an entry by its id, not its position).
+        schema:
+          type: array
+          items:
+            type: object
+            required: [op, path]
+            properties:
+              op:    {type: string, enum: [add, replace, remove]}
+              path:  {type: string, example: "/exercises/17/weight"}
+              value: {example: 105}
+    responses:
+      200:
+        description: The updated workout
+      400:
+        description: Invalid operation
+      404:
+        description: Not found
+    """
+    user_id = get_jwt_identity()
+    w = Workout.query.filter_by(id=wid, user_id=user_id).first_or_404()
+    try:
+        fields, diff = edits.parse_patch(w, request.get_json(silent=True))
+    except edits.InvalidEdit as e:
+        return jsonify(msg=str(e)), 400
+
+    for name, value in fields.items():
+        setattr(w, name, value)
+    return _save_edit(user_id, w, diff)
+
+
+def _save_edit(user_id, w, diff):
+    w.revision = Workout.revision + 1
+    w.updated_at = datetime.utcnow()
+    if diff is not None:
+        edits.apply_diff(user_id, w, diff)
+    bump_data_version(user_id)
+    wid = w.id
     db.session.commit()
+    # the commit expired `w`; reload it with its entries' exercises in two queries
+    w = Workout.query.options(_WITH_EXERCISES).filter_by(id=wid).one()
     return jsonify(serialize_workout(w))
 
 
 @workouts_bp.route("/<int:wid>", methods=["DELETE"])
 @jwt_required()
+@serialized_write
 def delete_workout(wid):
     user_id = get_jwt_identity()
     w = Workout.query.filter_by(id=wid, user_id=user_id).first_or_404()
+    entries = list(w.exercises)
+    released = records.release(user_id, w.id)
     db.session.delete(w)
+    db.session.flush()
+    rollups.remove_entries(user_id, entries)
+    records.recompute(user_id, released)
+    bump_data_version(user_id)
     db.session.commit()
     return jsonify(msg="deleted"), 200
 
 
+# Helpers: schedules belonging to the current user
+def _owned_schedule(user_id, wid, sid):
+    return (
+        ScheduledWorkout.query.join(Workout)
+        .filter(
+            Workout.user_id == user_id,
+            ScheduledWorkout.id == sid,
+            ScheduledWorkout.workout_id == wid,
+        )
+        .first_or_404()
+    )
+
+
+def _schedule_json(s):
+    body = {"id": s.id, "scheduled_at": s.scheduled_at.isoformat()}
+    if s.recurrence:
+        body.update(
+            recurrence=s.recurrence,
+            timezone=s.timezone,
+            ends_at=s.ends_at.isoformat() if s.ends_at else None,
+        )
+    return body
+
+
+def _parse_when(value, name):
+    if not value:
+        raise ValueError(f"{name} (ISO datetime) required")
+    return parse_utc(value, name)
+
+
 @workouts_bp.route("/<int:wid>/schedule", methods=["POST"])
 @jwt_required()
+@serialized_write
 def schedule_workout(wid):
+    """
+    Schedule a workout once, or as a recurring series
+    ---
+    tags: [Workouts]
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: path
+        name: wid
+        type: integer
+        required: true
+      - in: body
+        name: schedule
+        required: true
+        schema:
+          type: object
+          required: [scheduled_at]
+          properties:
+            scheduled_at:
+              type: string
+              example: "2026-11-02T07:00:00"
+              description: UTC unless it has an offset; the first occurrence of a series
+            recurrence:
+              type: string
+              example: "FREQ=WEEKLY;BYDAY=MO,WE,FR;COUNT=156"
+              description: RRULE subset (FREQ=DAILY or WEEKLY, INTERVAL, BYDAY, COUNT, UNTIL)
+            timezone:
+              type: string
+              example: "Europe/Berlin"
+              description: Zone whose wall-clock time the series keeps (default the user's)
+    responses:
+      201:
+        description: Scheduled
+      400:
+        description: Invalid datetime, rule or timezone
+    """
     user_id = int(get_jwt_identity())
     w = Workout.query.filter_by(id=wid, user_id=user_id).first_or_404()
 
     data = request.get_json() or {}
-    dt_str = data.get("scheduled_at")
-    if not dt_str:
-        return jsonify(msg="scheduled_at (ISO datetime) required"), 400
-
-    # parse & validate
     try:
-        scheduled = datetime.fromisoformat(dt_str)
-    except ValueError:
-        return jsonify(msg="invalid datetime format"), 400
+        sw = ScheduledWorkout(
+            workout_id=w.id,
+            user_id=user_id,
+            scheduled_at=_parse_when(data.get("scheduled_at"), "scheduled_at"),
+        )
+        if data.get("recurrence") is not None:
+            recurrence.set_rule(
+                sw, data["recurrence"], data.get("timezone") or current_user.timezone
+            )
+    except ValueError as e:
+        return jsonify(msg=str(e)), 400
 
-    sw = ScheduledWorkout(workout_id=w.id, scheduled_at=scheduled)
     db.session.add(sw)
+    bump_data_version(user_id)
     db.session.commit()
-    return jsonify(id=sw.id, scheduled_at=sw.scheduled_at.isoformat()), 201
+    return jsonify(_schedule_json(sw)), 201
 
 
 @workouts_bp.route("/<int:wid>/schedule", methods=["GET"])
 @jwt_required()
 def list_workout_schedules(wid):
+    """Scheduled sessions of one workout within ?from=&to= (ISO; naive is UTC).
+
+    `to` defaults to SCHEDULE_HORIZON_DAYS after `from` (or now).
+    """
     user_id = int(get_jwt_identity())
-    w = Workout.query.filter_by(id=wid, user_id=user_id).first_or_404()
+    Workout.query.filter_by(id=wid, user_id=user_id).first_or_404()
+    try:
+        start = _parse_when(request.args["from"], "from") if "from" in request.args else None
+        end = _parse_when(request.args["to"], "to") if "to" in request.args else None
+    except ValueError as e:
+        return jsonify(msg=str(e)), 400
 
     return jsonify(
-        [
-            {"id": s.id, "scheduled_at": s.scheduled_at.isoformat()}
-            for s in w.scheduled_workouts
-        ]
+        [recurrence.serialize(o) for o in recurrence.list_occurrences(user_id, start, end, wid)]
     )
 
 
 @workouts_bp.route("/<int:wid>/schedule/<int:sid>", methods=["PUT"])
 @jwt_required()
+@serialized_write
 def reschedule_workout(wid, sid):
+    """Move a schedule; for a series also change or drop (null) its recurrence.
+
+    Editing a series discards its per-occurrence exceptions.
+    """
     user_id = int(get_jwt_identity())
-    s = (
-        ScheduledWorkout.query.join(Workout)
-        .filter(
-            Workout.user_id == user_id,
-            ScheduledWorkout.id == sid,
-            ScheduledWorkout.workout_id == wid,
-        )
-        .first_or_404()
-    )
+    s = _owned_schedule(user_id, wid, sid)
 
     data = request.get_json() or {}
-    when = data.get("scheduled_at")
-    if not when:
-        return jsonify(msg="scheduled_at (ISO datetime) required"), 400
     try:
-        s.scheduled_at = datetime.fromisoformat(when)
-    except ValueError:
-        return jsonify(msg="invalid datetime format"), 400
+        s.scheduled_at = _parse_when(data.get("scheduled_at"), "scheduled_at")
+        text = data.get("recurrence", s.recurrence)
+        if s.recurrence or text is not None:
+            s.exceptions.clear()
+        if text is None:
+            s.recurrence = s.timezone = s.ends_at = None
+        else:
+            recurrence.set_rule(
+                s, text, data.get("timezone") or s.timezone or current_user.timezone
+            )
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify(msg=str(e)), 400
 
+    bump_data_version(user_id)
     db.session.commit()
-    return jsonify(id=s.id, scheduled_at=s.scheduled_at.isoformat())
+    return jsonify(_schedule_json(s))
 
 
 @workouts_bp.route("/<int:wid>/schedule/<int:sid>", methods=["DELETE"])
 @jwt_required()
+@serialized_write
 def cancel_workout_schedule(wid, sid):
     user_id = int(get_jwt_identity())
-    s = (
-        ScheduledWorkout.query.join(Workout)
-        .filter(
-            Workout.user_id == user_id,
-            ScheduledWorkout.id == sid,
-            ScheduledWorkout.workout_id == wid,
-        )
-        .first_or_404()
-    )
+    s = _owned_schedule(user_id, wid, sid)
     db.session.delete(s)
+    bump_data_version(user_id)
     db.session.commit()
     return jsonify(msg="schedule canceled"), 200
+
+
+def _owned_occurrence(user_id, wid, sid, occurrence):
+    """(series, occurrence time, its exception or None); ValueError for a bad request."""
+    s = _owned_schedule(user_id, wid, sid)
+    when = _parse_when(occurrence, "occurrence")
+    if not s.recurrence:
+        raise ValueError("not a recurring schedule; edit it directly")
+    rule = recurrence.parse_rule(s.recurrence)
+    if not recurrence.is_occurrence(rule, s.scheduled_at, get_zone(s.timezone), when):
+        abort(404)
+    exception = ScheduleException.query.filter_by(schedule_id=s.id, occurrence_at=when).first()
+    return s, when, exception
+
+
+@workouts_bp.route("/<int:wid>/schedule/<int:sid>/occurrences/<occurrence>", methods=["PUT"])
+@jwt_required()
+@serialized_write
+def reschedule_occurrence(wid, sid, occurrence):
+    """Move one occurrence of a series (addressed by its original ISO time) to scheduled_at."""
+    user_id = int(get_jwt_identity())
+    try:
+        s, when, exception = _owned_occurrence(user_id, wid, sid, occurrence)
+        moved = _parse_when((request.get_json() or {}).get("scheduled_at"), "scheduled_at")
+    except ValueError as e:
+        return jsonify(msg=str(e)), 400
+    if moved < s.scheduled_at:
+        return jsonify(msg="cannot move an occurrence before the series starts"), 400
+
+    if exception is None:
+        exception = ScheduleException(schedule_id=s.id, occurrence_at=when)
+        db.session.add(exception)
+    exception.rescheduled_at = moved
+    if s.ends_at is not None and moved > s.ends_at:
+        s.ends_at = moved  # keep the series visible to windows containing the move
+    bump_data_version(user_id)
+    db.session.commit()
+    return jsonify(id=s.id, occurrence=when.isoformat(), scheduled_at=moved.isoformat())
+
+
+@workouts_bp.route("/<int:wid>/schedule/<int:sid>/occurrences/<occurrence>", methods=["DELETE"])
+@jwt_required()
+@serialized_write
+def cancel_occurrence(wid, sid, occurrence):
+    """Cancel one occurrence of a series, keeping the rest."""
+    user_id = int(get_jwt_identity())
+    try:
+        s, when, exception = _owned_occurrence(user_id, wid, sid, occurrence)
+    except ValueError as e:
+        return jsonify(msg=str(e)), 400
+    if exception is None:
+        db.session.add(ScheduleException(schedule_id=s.id, occurrence_at=when))
+    else:
+        exception.rescheduled_at = None
+    bump_data_version(user_id)
+    db.session.commit()
+    return jsonify(msg="occurrence canceled"), 200
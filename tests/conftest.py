@@ -1,6 +1,10 @@
 # tests/conftest.py
 import os
+from contextlib import contextmanager
+
 import pytest
+from sqlalchemy import event
+
 from src.app import create_app
 from src.model import db, Exercise
 
@@ -10,6 +14,8 @@ def app():
     # Use in-memory DB for tests; set a test JWT secret
     os.environ["DATABASE_URL"] = "sqlite://"
     os.environ["JWT_SECRET"] = "test-secret"
+    # tests refresh the token blocklist explicitly, keeping query counts stable
+    os.environ["TOKEN_BLOCKLIST_REFRESH"] = "3600"
 
     app = create_app()
     app.config.update(TESTING=True)
@@ -50,3 +56,38 @@ def token(client):
 
     assert r.status_code in (200, 201), r.get_data(as_text=True)
     return r.get_json()["access_token"]
+
+
+@pytest.fixture()
+def login_as(client):
+    """Return a helper that signs up (or logs in) `email` and returns its JWT."""
+
+    def _login_as(email, password="pass123"):
+        r = client.post("/auth/signup", json={"email": email, "password": password})
+        if r.status_code == 409:
+            r = client.post("/auth/login", json={"email": email, "password": password})
+        assert r.status_code in (200, 201), r.get_data(as_text=True)
+        return r.get_json()["access_token"]
+
+    return _login_as
+
+
+@pytest.fixture()
+def capture_sql(app):
+    """Context manager collecting the (statement, parameters) run inside it."""
+
+    @contextmanager
+    def _capture():
+        statements = []
+
+        def before(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", before)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", before)
+
+    return _capture
@@ -0,0 +1,60 @@
+# tests/test_analytics.py
+import numpy as np
+
+from src import analytics
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_estimate_1rm_formulas():
+    weight = np.array([100.0, 100.0, 100.0])
+    reps = np.array([1.0, 10.0, 40.0])
+    np.testing.assert_allclose(
+        analytics.estimate_1rm(weight, reps, "epley")[:2], [100.0, 100.0 * (1 + 10 / 30)]
+    )
+    brzycki = analytics.estimate_1rm(weight, reps, "brzycki")
+    assert brzycki[0] == 100.0
+    assert np.isclose(brzycki[1], 100.0 * 36 / 27)
+    assert np.isnan(brzycki[2])
+
+
+def test_rolling_mean_pr_flags_and_trend():
+    days = np.array([0, 1, 5, 10, 30])
+    values = np.array([100.0, 110.0, 105.0, 120.0, 90.0])
+    np.testing.assert_allclose(
+        analytics.rolling_mean(days, values, 7), [100.0, 105.0, 105.0, 112.5, 90.0]
+    )
+    assert analytics.pr_flags(values).tolist() == [True, True, False, True, False]
+
+    t = analytics.trend(np.array([0, 7, 14]), np.array([100.0, 105.0, 110.0]))
+    assert np.isclose(t["slope_per_week"], 5.0)
+    assert np.isclose(t["r2"], 1.0)
+
+
+def test_progress_endpoint_metrics(client, login_as):
+    token = login_as("analytics@example.com")
+    h = auth_header(token)
+    for weight in (100, 120, 110):
+        client.post(
+            "/workouts",
+            json={"title": "S", "exercises": [{"exercise_id": 1, "sets": 3, "reps": 5, "weight": weight}]},
+            headers=h,
+        )
+
+    r = client.get(
+        "/reports/exercise/1/progress?metrics=e1rm,rolling,trend,pr&tz=UTC", headers=h
+    )
+    assert r.status_code == 200, r.get_data(as_text=True)
+    body = r.get_json()
+    assert len(body["series"]) == 1  # all logged today
+    day = body["series"][0]
+    assert day["best_weight"] == 120.0
+    assert day["e1rm"] == 140.0
+    assert day["e1rm_avg_7d"] == 140.0
+    assert day["pr"] is True
+    assert body["trend"] is None  # a single day has no slope
+
+    r = client.get("/reports/exercise/1/progress?metrics=bogus", headers=h)
+    assert r.status_code == 400
@@ -0,0 +1,138 @@
+# tests/test_auth.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from src.hashing import HashPool, HashPoolBusy, _HostSlots
+from src.model import db, TokenBlocklist, User
+from src.revocation import get_blocklist
+
+
+def test_login_rehashes_legacy_hash(app, client):
+    with app.app_context():
+        user = User(
+            email="legacy@example.com",
+            password_hash=generate_password_hash("pass123", "pbkdf2:sha256:1000"),
+        )
+        db.session.add(user)
+        db.session.commit()
+
+    r = client.post("/auth/login", json={"email": "legacy@example.com", "password": "pass123"})
+    assert r.status_code == 200
+
+    with app.app_context():
+        user = User.query.filter_by(email="legacy@example.com").one()
+        assert user.password_hash.startswith("scrypt:")
+        assert not user.password_needs_rehash()
+
+    r = client.post("/auth/login", json={"email": "legacy@example.com", "password": "nope"})
+    assert r.status_code == 401
+
+
+def test_hash_pool_sheds_load_when_slots_are_taken(tmp_path):
+    slots = _HostSlots(str(tmp_path), 1)
+    held = slots.acquire()
+    pool = HashPool("pbkdf2:sha256:1000", workers=0, max_pending=4, timeout=5, slots=slots)
+    with pytest.raises(HashPoolBusy):
+        pool.hash("pw")
+
+    _HostSlots.release(held)
+    assert pool.verify(pool.hash("pw"), "pw")
+
+
+def test_login_returns_503_when_hashing_is_saturated(app, client, login_as, monkeypatch):
+    login_as("storm@example.com")
+    pool = app.extensions["hash_pool"]
+
+    def busy(*args):
+        raise HashPoolBusy("full")
+
+    monkeypatch.setattr(pool, "run", busy)
+    r = client.post("/auth/login", json={"email": "storm@example.com", "password": "pass123"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_identity_is_cached_and_invalidated_on_change(app, client, login_as):
+    token = login_as("identity@example.com")
+    h = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/me", headers=h).status_code == 200
+
+    statements = []
+    with app.app_context():
+        engine = db.engine
+
+    def count(*args):
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        assert client.get("/auth/me", headers=h).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+    assert statements == []
+
+    client.put("/auth/me", json={"timezone": "Asia/Tokyo"}, headers=h)
+    assert client.get("/auth/me", headers=h).get_json()["timezone"] == "Asia/Tokyo"
+    assert client.put("/auth/me", json={"timezone": 123}, headers=h).status_code == 400
+    signup = {"email": "numeric-tz@example.com", "password": "pass123", "timezone": 123}
+    assert client.post("/auth/signup", json=signup).status_code == 400
+
+    # pytest-flask keeps one app context (and `g`) alive across the test's
+    # requests, so deactivate through it rather than a nested context
+    user = User.query.filter_by(email="identity@example.com").one()
+    user.active = False
+    db.session.commit()
+    assert client.get("/auth/me", headers=h).status_code == 401
+
+
+def test_logout_revokes_only_that_token(client, login_as):
+    first = {"Authorization": f"Bearer {login_as('logout@example.com')}"}
+    second = {"Authorization": f"Bearer {login_as('logout@example.com')}"}
+
+    assert client.post("/auth/logout", headers=first).status_code == 200
+    assert client.get("/auth/me", headers=first).status_code == 401
+    assert client.get("/auth/me", headers=second).status_code == 200
+
+    assert client.post("/auth/logout", json={"all": True}, headers=second).status_code == 200
+    assert client.get("/auth/me", headers=second).status_code == 401
+    # signing in again within the same second is not caught by the cutoff
+    third = {"Authorization": f"Bearer {login_as('logout@example.com')}"}
+    assert client.get("/auth/me", headers=third).status_code == 200
+
+
+def test_admin_revocation_reaches_other_workers_on_refresh(app, client, login_as):
+    admin = {"Authorization": f"Bearer {login_as('admin@example.com')}"}
+    victim = {"Authorization": f"Bearer {login_as('victim@example.com')}"}
+    assert client.post("/auth/revoke", json={"user_id": 1}, headers=admin).status_code == 403
+
+    User.query.filter_by(email="admin@example.com").one().is_admin = True
+    db.session.commit()
+    victim_id = client.get("/auth/me", headers=victim).get_json()["id"]
+    for bad in ("1", "abc", 1.5, True, [1]):
+        r = client.post("/auth/revoke", json={"user_id": bad}, headers=admin)
+        assert r.status_code == 400, bad
+    assert client.post("/auth/revoke", json={"user_id": victim_id}, headers=admin).status_code == 200
+    assert client.get("/auth/me", headers=victim).status_code == 401
+
+    # a row written by another worker is only seen after this worker's next refresh
+    blocklist = get_blocklist()
+    other = {"Authorization": f"Bearer {login_as('other@example.com')}"}
+    other_id = client.get("/auth/me", headers=other).get_json()["id"]
+    db.session.add(TokenBlocklist(user_id=other_id, revoked_at=datetime.utcnow()))
+    db.session.commit()
+    assert client.get("/auth/me", headers=other).status_code == 200
+    blocklist.refresh(force=True)
+    assert client.get("/auth/me", headers=other).status_code == 401
+
+    # on Postgres a lower id can commit after a higher one was already read
+    now = datetime.utcnow()
+    db.session.add(TokenBlocklist(id=1000, jti="first", revoked_at=now))
+    db.session.commit()
+    blocklist.refresh(force=True)
+    db.session.add(TokenBlocklist(id=999, jti="late", revoked_at=now - timedelta(seconds=1)))
+    db.session.commit()
+    blocklist.refresh(force=True)
+    assert {"first", "late"} <= set(blocklist._jtis)
@@ -0,0 +1,147 @@
+# tests/test_batch.py
+import flask_jwt_extended.view_decorators as jwt_views
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _workout(title):
+    return {"title": title, "exercises": [{"exercise_id": 1, "sets": 3, "reps": 5, "weight": 50}]}
+
+
+def _count(client, h):
+    return len(client.get("/workouts", headers=h).get_json()["workouts"])
+
+
+def test_batch_runs_items_in_order_with_one_verification(client, login_as, monkeypatch):
+    h = auth_header(login_as("batch@example.com"))
+    decoded = []
+    decode = jwt_views.decode_token
+    monkeypatch.setattr(jwt_views, "decode_token", lambda *a: decoded.append(1) or decode(*a))
+
+    r = client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"method": "POST", "path": "/workouts", "body": _workout("Batched")},
+                {
+                    "method": "POST",
+                    "path": "/workouts/$0.id/schedule",
+                    "body": {"scheduled_at": "2099-01-01T09:00:00"},
+                },
+                {"path": "/reports/overview"},
+                {"path": "/workouts/$9.id"},
+                {"path": "/auth/me"},
+                {"path": "/nowhere"},
+            ]
+        },
+        headers=h,
+    )
+    assert r.status_code == 200
+    assert len(decoded) == 1
+    body = r.get_json()
+    assert body["committed"] is True
+    assert [i["status"] for i in body["responses"]] == [201, 201, 200, 424, 400, 404]
+    wid = body["responses"][0]["body"]["id"]
+    window = {"to": "2100-01-01T00:00:00"}
+    scheduled = client.get(f"/workouts/{wid}/schedule", query_string=window, headers=h).get_json()
+    assert [s["id"] for s in scheduled] == [body["responses"][1]["body"]["id"]]
+    assert body["responses"][2]["body"]["totals"]["workouts"] == 1
+
+
+def test_atomic_batch_is_all_or_nothing(client, login_as):
+    h = auth_header(login_as("atomic@example.com"))
+    client.post("/workouts", json=_workout("Before"), headers=h)
+    client.get("/reports/overview", headers=h)  # cache the current version
+
+    r = client.post(
+        "/batch",
+        json={
+            "atomic": True,
+            "requests": [
+                {"method": "POST", "path": "/workouts", "body": _workout("Rolled back")},
+                {"path": "/reports/overview"},
+                {"method": "PATCH", "path": "/workouts/$0.id", "body": [{"op": "bogus"}]},
+                {"path": "/reports/overview"},
+            ],
+        },
+        headers=h,
+    )
+    body = r.get_json()
+    assert body["committed"] is False
+    assert [i["status"] for i in body["responses"]] == [201, 200, 400, 424]
+    assert body["responses"][1]["body"]["totals"]["workouts"] == 2  # saw its own write
+    assert _count(client, h) == 1
+
+    # the next write reuses the rolled-back data_version; no report was cached for it
+    client.post("/workouts", json=_workout("After"), headers=h)
+    totals = client.get("/reports/overview", headers=h).get_json()["totals"]
+    assert totals["workouts"] == 2 and totals["sets"] == 6
+
+    r = client.post(
+        "/batch",
+        json={
+            "atomic": True,
+            "requests": [
+                {"method": "POST", "path": "/workouts", "body": _workout("Kept")},
+                {
+                    "method": "PATCH",
+                    "path": "/workouts/$0.id",
+                    "body": [{"op": "replace", "path": "/title", "value": "Kept!"}],
+                },
+            ],
+        },
+        headers=h,
+    )
+    assert r.get_json()["committed"] is True
+    titles = [w["title"] for w in client.get("/workouts", headers=h).get_json()["workouts"]]
+    assert titles[0] == "Kept!" and len(titles) == 3
+
+
+def test_item_that_raises_answers_500_without_losing_earlier_items(client, login_as, monkeypatch):
+    h = auth_header(login_as("raises@example.com"))
+
+    def boom():
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr("src.reports._resolve_zone", boom)
+    r = client.post(
+        "/batch",
+        json={
+            "requests": [
+                {"method": "POST", "path": "/workouts", "body": _workout("Survives")},
+                {"path": "/reports/weekly"},
+                {"path": "/workouts/$0.id"},
+            ]
+        },
+        headers=h,
+    )
+    assert r.status_code == 200
+    assert [i["status"] for i in r.get_json()["responses"]] == [201, 500, 200]
+    assert _count(client, h) == 1
+
+    r = client.post(
+        "/batch",
+        json={
+            "atomic": True,
+            "requests": [
+                {"method": "POST", "path": "/workouts", "body": _workout("Rolled back")},
+                {"path": "/reports/weekly"},
+            ],
+        },
+        headers=h,
+    )
+    assert r.get_json()["committed"] is False
+    assert [i["status"] for i in r.get_json()["responses"]] == [201, 500]
+    assert _count(client, h) == 1
+
+
+def test_malformed_batches_are_rejected(app, client, login_as):
+    h = auth_header(login_as("badbatch@example.com"))
+    assert client.post("/batch", json={"requests": []}, headers=h).status_code == 400
+    relative = {"requests": [{"path": "workouts"}]}
+    assert client.post("/batch", json=relative, headers=h).status_code == 400
+    too_many = [{"path": "/reports/overview"}] * (app.config["BATCH_MAX_REQUESTS"] + 1)
+    assert client.post("/batch", json={"requests": too_many}, headers=h).status_code == 400
+    assert client.post("/batch", json={"requests": [{"path": "/workouts"}]}).status_code == 401
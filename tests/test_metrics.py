@@ -0,0 +1,43 @@
+# tests/test_metrics.py
+from prometheus_client.parser import text_string_to_metric_families
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def samples(client):
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    return {
+        (s.name, tuple(sorted(s.labels.items()))): s.value
+        for family in text_string_to_metric_families(r.get_data(as_text=True))
+        for s in family.samples
+    }
+
+
+def test_metrics_count_requests_by_route_and_status(client, login_as):
+    token = login_as("metrics@example.com")
+    route = (("blueprint", "workouts"), ("endpoint", "workouts.list_workouts"), ("method", "GET"))
+    before = samples(client)
+
+    client.get("/workouts", headers=auth_header(token))
+    client.get("/workouts")  # no token -> 401
+
+    after = samples(client)
+    ok = ("http_requests_total", tuple(sorted(route + (("status", "200"),))))
+    unauth = ("http_requests_total", tuple(sorted(route + (("status", "401"),))))
+    count = ("http_request_duration_seconds_count", route)
+    assert after[ok] - before.get(ok, 0) == 1
+    assert after[unauth] - before.get(unauth, 0) == 1
+    assert after[count] - before.get(count, 0) == 2
+    assert after[("db_pool_checkout_wait_seconds_count", ())] > 0
+
+
+def test_metrics_count_cache_lookups(client, login_as):
+    token = login_as("metrics@example.com")
+    hit = ("cache_lookups_total", (("cache", "report"), ("result", "hit")))
+    before = samples(client).get(hit, 0)
+    client.get("/reports/overview", headers=auth_header(token))
+    client.get("/reports/overview", headers=auth_header(token))
+    assert samples(client)[hit] - before >= 1
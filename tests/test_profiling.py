@@ -0,0 +1,57 @@
+# tests/test_profiling.py
+import logging
+
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+
+from src.model import db
+from src.profiling import RequestProfile
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture()
+def profiling(app):
+    app.config["SQL_PROFILING"] = True
+    yield app.config
+    app.config.update(
+        SQL_PROFILING=False, SQL_PROFILING_SLOW_MS=500, SQL_PROFILING_MAX_QUERIES=20
+    )
+
+
+def test_server_timing_reports_queries(client, login_as, profiling):
+    token = login_as("timing@example.com")
+    r = client.get("/workouts", headers=auth_header(token))
+    assert r.status_code == 200
+
+    metrics = {m.split(";")[0].strip(): m for m in r.headers["Server-Timing"].split(",")}
+    assert set(metrics) == {"db", "db-slowest", "app", "total"}
+    assert 'desc="' in metrics["db"] and "queries" in metrics["db"]
+
+
+def test_request_over_query_budget_is_logged(client, login_as, profiling, caplog):
+    token = login_as("timing@example.com")
+    profiling["SQL_PROFILING_MAX_QUERIES"] = 0
+    with caplog.at_level(logging.WARNING):
+        client.get("/workouts", headers=auth_header(token))
+    assert any("slow request GET /workouts" in m for m in caplog.messages)
+
+
+def test_no_header_when_disabled(client, login_as):
+    token = login_as("timing@example.com")
+    r = client.get("/workouts", headers=auth_header(token))
+    assert "Server-Timing" not in r.headers
+
+
+def test_failed_statement_leaves_no_timing_behind(app):
+    with app.test_request_context("/"):
+        g._sql_profile = profile = RequestProfile()
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM no_such_table")
+            conn.exec_driver_sql("SELECT 1")
+            assert "_profile_start" not in conn.info
+    assert profile.queries == 1
@@ -0,0 +1,181 @@
+# tests/test_query_budget.py
+"""
+SQL statement budgets per endpoint and index usage of the report queries.
+
+Budgets are for a user with several multi-exercise workouts, so a lazy
+load per workout or per entry (an N+1) blows them. If a change makes an
+endpoint legitimately cheaper, lower its budget; raising one needs a reason.
+"""
+import re
+
+import pytest
+
+from src.cache import get_cache
+from src.model import db, Exercise
+
+EXERCISES_PER_WORKOUT = 3
+DISTINCT_EXERCISES = 6
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _workout(i):
+    return {
+        "title": f"Budget {i}",
+        "exercises": [
+            {"exercise_id": 1, "sets": 3, "reps": 5 + j, "weight": 100 + i}
+            for j in range(EXERCISES_PER_WORKOUT)
+        ],
+    }
+
+
+def _varied_workout(weight):
+    # one entry per exercise, so per-exercise rollup/record upkeep would show up
+    return {
+        "title": "Varied",
+        "exercises": [
+            {"exercise_id": ex, "sets": 3, "reps": 5, "weight": weight}
+            for ex in range(1, DISTINCT_EXERCISES + 1)
+        ],
+    }
+
+
+@pytest.fixture()
+def history(client, login_as):
+    for n in range(db.session.query(Exercise).count(), DISTINCT_EXERCISES):
+        db.session.add(
+            Exercise(name=f"Budget {n}", description="", category="strength", muscle_group="legs")
+        )
+    db.session.commit()
+    token = login_as("budget@example.com")
+    h = auth_header(token)
+    ids = [
+        client.post("/workouts", json=_workout(i), headers=h).get_json()["id"] for i in range(4)
+    ]
+    # the heaviest of each exercise, so editing or deleting it recomputes every max
+    vid = client.post("/workouts", json=_varied_workout(500), headers=h).get_json()["id"]
+    sid = client.post(
+        f"/workouts/{ids[0]}/schedule", json={"scheduled_at": "2099-01-01T09:00:00"}, headers=h
+    ).get_json()["id"]
+    feed = client.get("/calendar/feed", headers=h).get_json()["url"]
+    client.get("/auth/me", headers=h)  # warm the identity cache
+    return {"h": h, "wid": ids[0], "vid": vid, "sid": sid, "feed": feed}
+
+
+# (method, path, body, max statements); {wid}/{vid}/{sid}/{feed} come from the fixture
+BUDGETS = [
+    ("GET", "/auth/me", None, 0),
+    ("PUT", "/auth/me", {"timezone": "UTC"}, 4),
+    ("GET", "/workouts", None, 3),
+    ("GET", "/workouts/{wid}", None, 2),
+    ("POST", "/workouts", _workout(99), 6),
+    ("PUT", "/workouts/{wid}", _workout(98), 15),
+    ("PUT", "/workouts/{vid}", _varied_workout(50), 16),
+    ("DELETE", "/workouts/{vid}", None, 11),
+    ("PATCH", "/workouts/{wid}", [{"op": "replace", "path": "/title", "value": "P"}], 6),
+    (
+        "PATCH",
+        "/workouts/{wid}",
+        [{"op": "add", "path": "/exercises/-", "value": _workout(97)["exercises"][0]}],
+        10,
+    ),
+    ("GET", "/workouts/export", None, 1),
+    ("GET", "/workouts/{wid}/schedule", None, 2),
+    ("POST", "/workouts/{wid}/schedule", {"scheduled_at": "2099-02-01T09:00:00"}, 4),
+    ("PUT", "/workouts/{wid}/schedule/{sid}", {"scheduled_at": "2099-03-01T09:00:00"}, 4),
+    ("GET", "/reports/overview", None, 3),
+    ("GET", "/reports/records", None, 1),
+    ("GET", "/reports/weekly", None, 2),
+    ("GET", "/reports/exercise/1/progress", None, 3),
+    ("GET", "/reports/exercise/1/progress?metrics=e1rm,pr", None, 3),
+    ("GET", "/reports/upcoming", None, 1),
+    ("GET", "/reports/upcoming?limit=1", None, 1),
+    ("GET", "{feed}", None, 2),
+    (
+        "POST",
+        "/batch",
+        {"requests": [{"path": "/reports/overview"}, {"path": "/reports/records"}]},
+        4,
+    ),
+    (
+        "POST",
+        "/batch",
+        {
+            "atomic": True,
+            "requests": [{"method": "POST", "path": "/workouts", "body": _workout(96)}],
+        },
+        9,  # POST /workouts plus the batch's BEGIN and each item's SAVEPOINT/RELEASE
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "method,path,body,budget", BUDGETS, ids=[f"{m} {p}" for m, p, *_ in BUDGETS]
+)
+def test_endpoint_query_budget(client, history, capture_sql, method, path, body, budget):
+    url = path.format(**{k: v for k, v in history.items() if k != "h"})
+    get_cache().backend.clear()  # measure the uncached path
+    with capture_sql() as statements:
+        r = client.open(url, method=method, json=body, headers=history["h"])
+        r.get_data()
+    assert r.status_code < 400, r.get_data(as_text=True)
+    assert len(statements) <= budget, "\n".join(s for s, _ in statements)
+
+
+# — Index usage —
+
+# tables that grow with history and must never be read in full
+LARGE_TABLES = {
+    "workouts",
+    "workout_exercises",
+    "scheduled_workouts",
+    "personal_records",
+    "user_exercise_stats",
+}
+
+EXPECTED_INDEXES = {
+    "/reports/overview": set(),
+    "/reports/records": set(),
+    "/reports/weekly": {"ix_workouts_user_id_created_at"},
+    "/reports/exercise/1/progress": {
+        "ix_workouts_user_id_created_at",
+        "ix_workout_exercises_exercise_id_workout_id",
+    },
+    "/reports/exercise/1/progress?metrics=e1rm": {"ix_workout_exercises_exercise_id_workout_id"},
+    "/reports/upcoming": {"ix_scheduled_workouts_user_id_scheduled_at"},
+    "/reports/upcoming?limit=1": {"ix_scheduled_workouts_user_id_scheduled_at"},
+}
+
+_FULL_SCAN = {
+    "sqlite": re.compile(r"^SCAN (\w+)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+def query_plan(statement, parameters):
+    """Plan lines for one captured statement (EXPLAIN QUERY PLAN / EXPLAIN)."""
+    with db.engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # tiny test tables make a seq scan cheapest; ask what the index path would be
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).all()
+            return [r[0] for r in rows]
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return [r[-1] for r in rows]
+
+
+@pytest.mark.parametrize("path", sorted(EXPECTED_INDEXES))
+def test_report_queries_use_indexes(client, history, capture_sql, path):
+    get_cache().backend.clear()
+    with capture_sql() as statements:
+        assert client.get(path, headers=history["h"]).status_code == 200
+
+    plan = [line for s, p in statements for line in query_plan(s, p)]
+    full_scan = _FULL_SCAN[db.engine.dialect.name]
+    scanned = {m.group(1) for line in plan if (m := full_scan.search(line))}
+    assert not scanned & LARGE_TABLES, "\n".join(plan)
+    used = " ".join(plan)
+    missing = {ix for ix in EXPECTED_INDEXES[path] if ix not in used}
+    assert not missing, "\n".join(plan)
@@ -0,0 +1,283 @@
+# tests/test_recurrence.py
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from werkzeug.http import http_date
+
+from src.model import db, User
+from src.recurrence import InvalidRule, format_rule, last_occurrence, occurrences, parse_rule
+
+NEW_YORK = ZoneInfo("America/New_York")
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_weekly_rule_expands_windows_like_the_full_series():
+    rule = parse_rule("RRULE:FREQ=WEEKLY;INTERVAL=2;BYDAY=FR,MO;COUNT=40")
+    assert format_rule(rule) == "FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,FR;COUNT=40"
+    start = datetime(2026, 10, 14, 11, 0)  # a Wednesday
+    full = list(occurrences(rule, start, NEW_YORK))
+    assert len(full) == 40
+    assert full[0] == datetime(2026, 10, 16, 11, 0)  # first matching day is Friday
+    assert last_occurrence(rule, start, NEW_YORK) == full[-1]
+
+    for days in range(0, 400, 9):
+        lo = start + timedelta(days=days, hours=5)
+        hi = lo + timedelta(days=23)
+        assert list(occurrences(rule, start, NEW_YORK, lo, hi)) == [
+            o for o in full if lo <= o < hi
+        ]
+
+
+def test_occurrences_keep_local_time_across_dst():
+    rule = parse_rule("FREQ=DAILY;UNTIL=20261110")
+    start = datetime(2026, 10, 30, 11, 0)  # 07:00 in New York (EDT)
+    times = list(occurrences(rule, start, NEW_YORK))
+    assert times[0].hour == 11 and times[-1].hour == 12  # still 07:00 after the switch
+    assert times[-1] == datetime(2026, 11, 10, 12, 0)
+
+
+def test_expansion_stops_at_the_end_of_datetime():
+    rule = parse_rule("FREQ=DAILY")
+    start = datetime(9999, 12, 30, 7, 0)
+    assert list(occurrences(rule, start, ZoneInfo("Pacific/Kiritimati"), end=datetime.max)) == [
+        start, start + timedelta(days=1)
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "FREQ=MONTHLY",
+        "FREQ=DAILY;BYDAY=MO",
+        "FREQ=WEEKLY;COUNT=0",
+        "FREQ=WEEKLY;COUNT=3;UNTIL=20270101",
+        "FREQ=WEEKLY;BYSETPOS=1",
+        "FREQ=WEEKLY;BYDAY=XX",
+        "FREQ=DAILY;UNTIL=99991231",
+        "FREQ=DAILY;INTERVAL=99999999",
+    ],
+)
+def test_unsupported_rules_are_rejected(text):
+    with pytest.raises(InvalidRule):
+        parse_rule(text)
+
+
+def test_series_with_exceptions(client, login_as):
+    h = auth_header(login_as("series@example.com"))
+    wid = client.post(
+        "/workouts",
+        json={"title": "MWF", "exercises": [{"exercise_id": 1, "sets": 3, "reps": 5}]},
+        headers=h,
+    ).get_json()["id"]
+    first = (datetime.utcnow() + timedelta(days=1)).replace(
+        hour=7, minute=0, second=0, microsecond=0
+    )
+    r = client.post(
+        f"/workouts/{wid}/schedule",
+        json={"scheduled_at": first.isoformat(), "recurrence": "FREQ=DAILY;COUNT=10",
+              "timezone": "UTC"},
+        headers=h,
+    )
+    assert r.status_code == 201
+    series = r.get_json()
+    assert series["ends_at"] == (first + timedelta(days=9)).isoformat()
+    sid = series["id"]
+
+    window = f"from={first.isoformat()}&to={(first + timedelta(days=5)).isoformat()}"
+    listed = client.get(f"/workouts/{wid}/schedule?{window}", headers=h).get_json()
+    assert [o["scheduled_at"] for o in listed] == [
+        (first + timedelta(days=i)).isoformat() for i in range(5)
+    ]
+
+    second, third = listed[1]["occurrence"], listed[2]["occurrence"]
+    url = f"/workouts/{wid}/schedule/{sid}/occurrences"
+    later = (first + timedelta(days=30)).isoformat()
+    assert client.put(f"{url}/{second}", json={"scheduled_at": later}, headers=h).status_code == 200
+    assert client.delete(f"{url}/{third}", headers=h).status_code == 200
+    off_rule = (first + timedelta(hours=3)).isoformat()
+    assert client.delete(f"{url}/{off_rule}", headers=h).status_code == 404
+
+    upcoming = [
+        o for o in client.get("/reports/upcoming", headers=h).get_json() if o["id"] == sid
+    ]
+    assert len(upcoming) == 9  # ten, minus the cancelled one
+    assert upcoming[-1] == {
+        "id": sid, "workout_id": wid, "title": "MWF", "scheduled_at": later,
+        "occurrence": second, "recurrence": "FREQ=DAILY;COUNT=10",
+    }
+
+    # editing the series drops its exceptions
+    r = client.put(
+        f"/workouts/{wid}/schedule/{sid}",
+        json={"scheduled_at": first.isoformat(), "recurrence": "FREQ=WEEKLY;COUNT=2"},
+        headers=h,
+    )
+    assert r.get_json()["recurrence"] == "FREQ=WEEKLY;COUNT=2"
+    listed = client.get(f"/workouts/{wid}/schedule", headers=h).get_json()
+    assert [o["scheduled_at"] for o in listed] == [
+        first.isoformat(), (first + timedelta(weeks=1)).isoformat()
+    ]
+
+    bad = {"scheduled_at": first.isoformat(), "recurrence": "FREQ=HOURLY"}
+    assert client.post(f"/workouts/{wid}/schedule", json=bad, headers=h).status_code == 400
+    bad = {"scheduled_at": first.isoformat(), "recurrence": "FREQ=DAILY", "timezone": 5}
+    assert client.post(f"/workouts/{wid}/schedule", json=bad, headers=h).status_code == 400
+    r = client.put(f"/workouts/{wid}/schedule/{sid}", json=bad, headers=h)
+    assert r.status_code == 400
+
+
+def _schedule(client, h, wid, when, **series):
+    r = client.post(
+        f"/workouts/{wid}/schedule", json={"scheduled_at": when.isoformat(), **series}, headers=h
+    )
+    assert r.status_code == 201, r.get_json()
+    return r.get_json()["id"]
+
+
+def test_schedule_times_with_offsets_are_converted_to_utc(client, login_as):
+    h = auth_header(login_as("offsets@example.com"))
+    wid = client.post(
+        "/workouts",
+        json={"title": "Offsets", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1}]},
+        headers=h,
+    ).get_json()["id"]
+    r = client.post(
+        f"/workouts/{wid}/schedule",
+        json={"scheduled_at": "2031-03-02T09:00:00+02:00", "recurrence": "FREQ=DAILY;COUNT=3",
+              "timezone": "UTC"},
+        headers=h,
+    )
+    assert r.get_json()["scheduled_at"] == "2031-03-02T07:00:00"
+    sid = r.get_json()["id"]
+
+    window = {"from": "2031-03-03T00:00:00Z", "to": "2031-03-03T12:00:00+04:00"}
+    listed = client.get(f"/workouts/{wid}/schedule", query_string=window, headers=h).get_json()
+    assert [o["scheduled_at"] for o in listed] == ["2031-03-03T07:00:00"]
+
+    url = f"/workouts/{wid}/schedule/{sid}/occurrences/2031-03-03T08:00:00+01:00"
+    r = client.put(url, json={"scheduled_at": "2031-03-05T10:00:00Z"}, headers=h)
+    assert r.get_json() == {
+        "id": sid, "occurrence": "2031-03-03T07:00:00", "scheduled_at": "2031-03-05T10:00:00"
+    }
+
+    far = {"from": "9999-12-31T00:00:00"}
+    assert client.get(f"/workouts/{wid}/schedule", query_string=far, headers=h).status_code == 200
+    far = {"from": "9999-12-31T23:00:00-05:00"}
+    assert client.get(f"/workouts/{wid}/schedule", query_string=far, headers=h).status_code == 400
+
+
+def test_upcoming_window_and_pages(client, login_as):
+    h = auth_header(login_as("pages@example.com"))
+    wid = client.post(
+        "/workouts",
+        json={"title": "Mixed", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1}]},
+        headers=h,
+    ).get_json()["id"]
+    base = datetime(2031, 3, 2, 8, 0)
+    for day in (0, 1, 1, 4, 9, 30):  # two one-offs at the same time
+        _schedule(client, h, wid, base + timedelta(days=day))
+    _schedule(client, h, wid, base, recurrence="FREQ=DAILY;INTERVAL=2", timezone="UTC")
+
+    window = {"from": base.isoformat(), "to": (base + timedelta(days=10)).isoformat()}
+    everything = client.get("/reports/upcoming", query_string=window, headers=h).get_json()
+    assert len(everything) == 5 + 5  # one-offs in the window, plus every second day
+    times = [o["scheduled_at"] for o in everything]
+    assert times == sorted(times)
+
+    pages, r = [], client.get(
+        "/reports/upcoming", query_string={**window, "limit": 3}, headers=h
+    )
+    while True:
+        pages.append(r.get_json())
+        if "Link" not in r.headers:
+            break
+        url = r.headers["Link"].split(">")[0][1:]
+        r = client.get(url, headers=h)
+    assert [len(p) for p in pages] == [3, 3, 3, 1]
+    assert [o for p in pages for o in p] == everything
+
+    # without `to`, one-offs stop at the same horizon as series
+    _schedule(client, h, wid, base + timedelta(days=100))
+    open_ended = client.get(
+        "/reports/upcoming", query_string={"from": base.isoformat(), "limit": 500}, headers=h
+    ).get_json()
+    horizon = (base + timedelta(days=90)).isoformat()
+    assert max(o["scheduled_at"] for o in open_ended) < horizon
+    assert sum(1 for o in open_ended if "recurrence" not in o) == 6
+
+    r = client.get("/reports/upcoming", query_string={"cursor": "nope"}, headers=h)
+    assert r.status_code == 400
+    r = client.get("/reports/upcoming", query_string={"from": "2031-01-02", "to": "2031-01-01"},
+                   headers=h)
+    assert r.status_code == 400
+
+
+def test_calendar_feed_is_conditional(app, client, login_as):
+    h = auth_header(login_as("ics@example.com"))
+    wid = client.post(
+        "/workouts",
+        json={"title": "Legs, heavy; long", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1}]},
+        headers=h,
+    ).get_json()["id"]
+    first = datetime(2031, 3, 2, 7, 0)  # a Sunday; 08:00 in Berlin
+    _schedule(client, h, wid, first)
+    sid = _schedule(client, h, wid, first, recurrence="FREQ=WEEKLY;BYDAY=MO,TH;COUNT=8",
+                    timezone="Europe/Berlin")
+    url = f"/workouts/{wid}/schedule/{sid}/occurrences"
+    assert client.delete(f"{url}/2031-03-06T07:00:00", headers=h).status_code == 200
+    r = client.put(f"{url}/2031-03-10T07:00:00", json={"scheduled_at": "2031-03-11T18:00:00"},
+                   headers=h)
+    assert r.status_code == 200
+
+    feed = client.get("/calendar/feed", headers=h).get_json()["url"]
+    user = User.query.filter_by(email="ics@example.com").one()
+    user.data_updated_at -= timedelta(seconds=2)  # the second of the last write is over
+    db.session.commit()
+    r = client.get(feed)
+    assert r.status_code == 200 and r.mimetype == "text/calendar"
+    body = r.get_data(as_text=True)
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert "SUMMARY:Legs\\, heavy\\; long\r\n" in body
+    assert "DTSTART:20310302T070000Z\r\n" in body
+    # the series starts on its first matching day, in local time
+    assert "DTSTART;TZID=Europe/Berlin:20310303T080000\r\n" in body
+    assert "RRULE:FREQ=WEEKLY;BYDAY=MO,TH;COUNT=8\r\n" in body
+    assert "EXDATE;TZID=Europe/Berlin:20310306T080000\r\n" in body
+    assert "RECURRENCE-ID;TZID=Europe/Berlin:20310310T080000\r\nDTSTART:20310311T180000Z" in body
+    assert body.count("BEGIN:VEVENT") == 3
+
+    etag, modified = r.headers["ETag"], r.headers["Last-Modified"]
+    assert client.get(feed, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(feed, headers={"If-Modified-Since": modified}).status_code == 304
+
+    # a write whose second is still open has no Last-Modified yet
+    user.data_updated_at = datetime.utcnow() + timedelta(seconds=5)
+    user.data_version += 1
+    db.session.commit()
+    r = client.get(feed, headers={"If-Modified-Since": http_date(user.data_updated_at)})
+    assert r.status_code == 200 and "Last-Modified" not in r.headers
+    r.get_data()
+    etag = r.headers["ETag"]
+
+    client.delete(f"/workouts/{wid}/schedule/{sid}", headers=h)
+    r = client.get(feed, headers={"If-None-Match": etag})
+    assert r.status_code == 200 and r.get_data(as_text=True).count("BEGIN:VEVENT") == 1
+
+    assert client.get(feed.replace("/calendar/", "/calendar/x")).status_code == 404
+
+
+def test_rotating_the_feed_url_revokes_the_old_one(app, client, login_as):
+    h = auth_header(login_as("rotate@example.com"))
+    old = client.get("/calendar/feed", headers=h).get_json()["url"]
+    assert client.get("/calendar/feed", headers=h).get_json()["url"] == old
+    assert client.get(old).status_code == 200
+
+    new = client.post("/calendar/feed/rotate", headers=h).get_json()["url"]
+    assert new != old
+    assert client.get(old).status_code == 404
+    assert client.get(new).status_code == 200
+    assert client.get("/calendar/feed", headers=h).get_json()["url"] == new
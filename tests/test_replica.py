@@ -0,0 +1,70 @@
+# tests/test_replica.py
+import sqlite3
+
+import pytest
+
+from src.app import create_app
+from src.model import db, Exercise
+
+
+@pytest.fixture()
+def replicated(tmp_path, monkeypatch):
+    """An app on two SQLite files standing in for a primary and its replica."""
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{primary}")
+    monkeypatch.setenv("DATABASE_REPLICA_URL", f"sqlite:///{replica}")
+    monkeypatch.setenv("PASSWORD_HASH_WORKERS", "0")
+    app = create_app()
+    app.config.update(TESTING=True)
+    with app.app_context():
+        db.create_all()
+        db.session.add(
+            Exercise(name="Squat", description="test", category="strength", muscle_group="legs")
+        )
+        db.session.commit()
+
+    def sync():
+        # "replication": copy the primary over the replica
+        with app.app_context():
+            db.engines["replica"].dispose()
+        src, dst = sqlite3.connect(primary), sqlite3.connect(replica)
+        src.backup(dst)
+        src.close()
+        dst.close()
+
+    sync()
+    yield app, sync
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # binds register their metadata on the shared db object; keep other apps' create_all clean
+    db.metadatas.pop("replica", None)
+
+
+def _workout():
+    return {"title": "Leg day", "exercises": [{"exercise_id": 1, "sets": 3, "reps": 5}]}
+
+
+def test_reads_use_replica_after_read_your_writes_window(replicated):
+    app, sync = replicated
+    client = app.test_client()
+    r = client.post("/auth/signup", json={"email": "r@example.com", "password": "pw"})
+    headers = {"Authorization": f"Bearer {r.get_json()['access_token']}"}
+    wid = client.post("/workouts", json=_workout(), headers=headers).get_json()["id"]
+
+    # the write pinned this user to the primary
+    assert len(client.get("/workouts", headers=headers).get_json()["workouts"]) == 1
+    assert client.get(f"/workouts/{wid}", headers=headers).status_code == 200
+
+    # once the window is over, reads go to the (lagging) replica
+    app.extensions["replica_writes"].clear()
+    assert client.get("/workouts", headers=headers).get_json()["workouts"] == []
+    assert client.get(f"/workouts/{wid}", headers=headers).status_code == 404
+
+    sync()
+    assert len(client.get("/workouts", headers=headers).get_json()["workouts"]) == 1
+    assert client.get("/reports/overview", headers=headers).status_code == 200
+
+
+def test_replica_is_off_without_url(app):
+    assert app.extensions["replica_writes"] is None
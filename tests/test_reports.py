@@ -0,0 +1,270 @@
+# tests/test_reports.py
+import json
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import literal, select, update
+from sqlalchemy.types import DateTime
+
+from src import records as records_index, rollups
+from src.cache import MemoryBackend, SQLiteBackend
+from src.identity import invalidate
+from src.model import db, Exercise, User
+from src.timebuckets import day_start, get_zone, week_start
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_overview_rollups_follow_writes(app, client, login_as):
+    token = login_as("rollups@example.com")
+    h = auth_header(token)
+
+    r = client.post(
+        "/workouts",
+        json={"title": "A", "exercises": [{"exercise_id": 1, "sets": 3, "reps": 5, "weight": 100}]},
+        headers=h,
+    )
+    heavy = r.get_json()["id"]
+    client.post(
+        "/workouts",
+        json={"title": "B", "exercises": [{"exercise_id": 1, "sets": 2, "reps": 10, "weight": 60}]},
+        headers=h,
+    )
+
+    body = client.get("/reports/overview", headers=h).get_json()
+    assert body["totals"] == {"workouts": 2, "sets": 5, "reps": 15, "volume": 2700.0}
+    assert body["top_weight_by_exercise"] == [{"exercise": "Squat", "max_weight": 100.0}]
+
+    # editing away the record-holding set must recompute the max
+    client.put(
+        f"/workouts/{heavy}",
+        json={"exercises": [{"exercise_id": 1, "sets": 1, "reps": 1, "weight": 50}]},
+        headers=h,
+    )
+    body = client.get("/reports/overview", headers=h).get_json()
+    assert body["totals"]["sets"] == 3
+    assert body["top_weight_by_exercise"][0]["max_weight"] == 60.0
+
+    client.delete(f"/workouts/{heavy}", headers=h)
+    body = client.get("/reports/overview", headers=h).get_json()
+    assert body["totals"] == {"workouts": 1, "sets": 2, "reps": 10, "volume": 1200.0}
+
+    with app.app_context():
+        assert rollups.check() == []
+
+
+def test_rollups_rebuild_and_check_cli(app, client, login_as):
+    token = login_as("rollups-cli@example.com")
+    client.post(
+        "/workouts",
+        json={"title": "A", "exercises": [{"exercise_id": 1, "sets": 3, "reps": 5, "weight": 80}]},
+        headers=auth_header(token),
+    )
+    with app.app_context():
+        db.session.execute(db.text("UPDATE user_stats SET sets = sets + 99"))
+        db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["rollups", "check"])
+    assert result.exit_code == 1
+
+    result = runner.invoke(args=["rollups", "rebuild"])
+    assert result.exit_code == 0
+    result = runner.invoke(args=["rollups", "check"])
+    assert result.exit_code == 0, result.output
+
+
+def test_rollup_writes_are_one_upsert_per_table(app, client, login_as, capture_sql, monkeypatch):
+    with app.app_context():
+        bench = Exercise(name="Bench")
+        db.session.add(bench)
+        db.session.commit()
+        bench_id = bench.id
+    h = auth_header(login_as("upsert@example.com"))
+    entry = {"exercise_id": 1, "sets": 3, "reps": 5, "weight": 100}
+    client.post("/workouts", json={"title": "A", "exercises": [entry]}, headers=h)
+
+    # one exercise already has a row, the other is first seen
+    body = {"title": "B", "exercises": [{**entry, "weight": 120}, {**entry, "exercise_id": bench_id}]}
+    with capture_sql() as statements:
+        assert client.post("/workouts", json=body, headers=h).status_code == 201
+    touched = [s.split()[:3] for s, _ in statements if "user_exercise_stats" in s]
+    assert touched == [["INSERT", "INTO", "user_exercise_stats"]]
+    assert "ON CONFLICT" in next(s for s, _ in statements if "user_exercise_stats" in s)
+    top = client.get("/reports/overview", headers=h).get_json()["top_weight_by_exercise"]
+    assert {t["exercise"]: t["max_weight"] for t in top} == {"Squat": 120.0, "Bench": 100.0}
+    with app.app_context():
+        assert rollups.check() == []
+
+    monkeypatch.setattr(rollups, "UPSERT_DIALECTS", {"postgresql": None})
+    with pytest.raises(RuntimeError, match="ON CONFLICT"):
+        rollups.init_app(app)
+
+
+def test_report_cache_hits_until_next_write(client, login_as):
+    token = login_as("cache@example.com")
+    h = auth_header(token)
+    payload = {"title": "A", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1, "weight": 10}]}
+    client.post("/workouts", json=payload, headers=h)
+
+    # the counters are operational data
+    assert client.get("/reports/cache/stats", headers=h).status_code == 403
+    user_id = client.get("/auth/me", headers=h).get_json()["id"]
+    db.session.execute(update(User).where(User.id == user_id).values(is_admin=True))
+    db.session.commit()
+    invalidate(user_id)
+
+    before = client.get("/reports/cache/stats", headers=h).get_json()
+    first = client.get("/reports/overview", headers=h).get_json()
+    second = client.get("/reports/overview", headers=h).get_json()
+    after = client.get("/reports/cache/stats", headers=h).get_json()
+    assert first == second
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+
+    client.post("/workouts", json=payload, headers=h)
+    third = client.get("/reports/overview", headers=h).get_json()
+    assert third["totals"]["workouts"] == first["totals"]["workouts"] + 1
+
+
+def test_sqlite_cache_backend_is_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    a, b = SQLiteBackend(path, ttl=60), SQLiteBackend(path, ttl=60)
+    a.set("k", b"payload")
+    assert b.get("k") == b"payload"
+    b.set("expired", b"x", ttl=-1)
+    assert a.get("expired") is None
+    b.set("uncached", b"x", ttl=0)  # an explicit 0 is not the default TTL
+    assert a.get("uncached") is None
+
+
+def test_memory_cache_honors_zero_ttl():
+    cache = MemoryBackend(ttl=60)
+    cache.set("k", b"x", ttl=0)
+    assert cache.get("k") is None
+
+
+def test_time_buckets_honor_timezone(app):
+    def run(expr):
+        with app.app_context():
+            return db.session.execute(select(expr)).scalar()
+
+    ts = literal(datetime(2024, 1, 1, 20, 0), DateTime)
+    assert run(day_start(ts, get_zone("UTC"))) == date(2024, 1, 1)
+    assert run(day_start(ts, get_zone("Asia/Tokyo"))) == date(2024, 1, 2)
+
+    sunday = literal(datetime(2024, 1, 7, 12, 0), DateTime)
+    assert run(week_start(sunday, get_zone("UTC"))) == date(2024, 1, 1)
+
+
+def test_weekly_is_zero_filled_window(client, login_as):
+    token = login_as("weekly@example.com")
+    h = auth_header(token)
+    client.post(
+        "/workouts",
+        json={"title": "Now", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1}]},
+        headers=h,
+    )
+
+    body = client.get("/reports/weekly?weeks=4&tz=Europe/Berlin", headers=h).get_json()
+    assert len(body) == 4
+    assert [w["count"] for w in body] == [0, 0, 0, 1]
+    assert body[-1]["week_start"] > body[0]["week_start"]
+
+    r = client.get("/reports/weekly?tz=Not/AZone", headers=h)
+    assert r.status_code == 400
+
+
+def test_report_cache_is_keyed_on_the_zone_it_used(client, login_as):
+    h = auth_header(login_as("zonekey@example.com"))
+    user_id = client.get("/auth/me", headers=h).get_json()["id"]
+    # another worker changes the timezone; this one's identity cache still has the old one
+    db.session.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(timezone="Pacific/Kiritimati", data_version=User.data_version + 1)
+    )
+    db.session.commit()
+    url = "/reports/exercise/1/progress?metrics=e1rm"
+    assert client.get(url, headers=h).get_json()["timezone"] == "UTC"  # computed in the old zone
+
+    invalidate(user_id)
+    assert client.get(url, headers=h).get_json()["timezone"] == "Pacific/Kiritimati"
+
+
+def test_personal_records_follow_edits_and_deletes(app, client, login_as):
+    token = login_as("records@example.com")
+    h = auth_header(token)
+
+    def log(weight, reps=5):
+        r = client.post(
+            "/workouts",
+            json={"title": "S", "exercises": [{"exercise_id": 1, "sets": 1, "reps": reps, "weight": weight}]},
+            headers=h,
+        )
+        return r.get_json()["id"]
+
+    log(100)
+    top = log(120)
+    log(90, reps=3)
+
+    def records():
+        return {
+            (r["reps"], r["weight"], r["workout_id"])
+            for r in client.get("/reports/records?exercise_id=1", headers=h).get_json()
+        }
+
+    assert (5, 120.0, top) in records()
+    assert {r[0] for r in records()} == {3, 5}
+
+    client.put(
+        f"/workouts/{top}",
+        json={"exercises": [{"exercise_id": 1, "sets": 1, "reps": 5, "weight": 110}]},
+        headers=h,
+    )
+    assert (5, 110.0, top) in records()
+
+    client.delete(f"/workouts/{top}", headers=h)
+    assert {r[:2] for r in records()} == {(3, 90.0), (5, 100.0)}
+
+    with app.app_context():
+        assert records_index.check() == []
+
+
+def test_record_upsert_keeps_the_better_lift(app, client, login_as, capture_sql):
+    h = auth_header(login_as("record-upsert@example.com"))
+
+    def log(weight, created_at):
+        body = {
+            "title": "S",
+            "created_at": created_at,
+            "exercises": [{"exercise_id": 1, "sets": 1, "reps": 7, "weight": weight}],
+        }
+        r = client.post(
+            "/workouts/import",
+            data=json.dumps(body),
+            headers={**h, "Content-Type": "application/x-ndjson"},
+        )
+        assert r.get_json()["workouts_created"] == 1
+
+    def record():
+        rows = client.get("/reports/records?exercise_id=1", headers=h).get_json()
+        return next((r["weight"], r["achieved_at"]) for r in rows if r["reps"] == 7)
+
+    with capture_sql() as statements:
+        log(100, "2024-03-05T10:00:00Z")
+    writes = [s for s, _ in statements if "personal_records" in s]
+    assert len(writes) == 1 and "ON CONFLICT" in writes[0]
+
+    log(90, "2024-03-01T10:00:00Z")  # lighter, even if earlier
+    assert record() == (100.0, "2024-03-05T10:00:00")
+    log(100, "2024-03-08T10:00:00Z")  # a later tie
+    assert record() == (100.0, "2024-03-05T10:00:00")
+    log(100, "2024-03-02T10:00:00Z")  # an earlier tie
+    assert record() == (100.0, "2024-03-02T10:00:00")
+    log(105, "2024-03-09T10:00:00Z")
+    assert record() == (105.0, "2024-03-09T10:00:00")
+    with app.app_context():
+        assert records_index.check() == []
@@ -28,7 +28,7 @@ def test_create_and_list_workout(client, token):
 
     r = client.get("/workouts", headers=auth_header(token))
     assert r.status_code == 200
-    ids = [w["id"] for w in r.get_json()]
+    ids = [w["id"] for w in r.get_json()["workouts"]]
     assert wid in ids
 
 
@@ -0,0 +1,109 @@
+# tests/test_sqlite.py
+import json
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+from src import importer
+from src.app import create_app
+from src.model import db, Exercise
+from src.sqlite import configure_engine, serialized_write
+
+
+def test_file_database_gets_wal_and_pragmas(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    configure_engine(engine, busy_timeout_ms=1234, mmap_size=1 << 20, cache_size_kib=2048)
+    with engine.connect() as conn:
+        pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()  # noqa: E731
+        assert pragma("journal_mode") == "wal"
+        assert pragma("synchronous") == 1  # NORMAL
+        assert pragma("busy_timeout") == 1234
+        assert pragma("cache_size") == -2048
+    engine.dispose()
+
+
+def _locked():
+    return OperationalError("INSERT ...", {}, sqlite3.OperationalError("database is locked"))
+
+
+def test_serialized_write_retries_locked_views(app):
+    calls = []
+
+    @serialized_write
+    def view():
+        calls.append(1)
+        if len(calls) < 3:
+            raise _locked()
+        return "ok"
+
+    with app.test_request_context("/workouts", method="POST"):
+        assert view() == "ok"
+    assert len(calls) == 3
+
+
+def test_serialized_write_gives_up_after_configured_retries(app):
+    calls = []
+
+    @serialized_write
+    def view():
+        calls.append(1)
+        raise _locked()
+
+    with app.test_request_context("/workouts", method="POST"):
+        with pytest.raises(OperationalError):
+            view()
+    assert len(calls) == app.config["SQLITE_WRITE_RETRIES"] + 1
+
+
+def test_import_retries_each_locked_chunk(client, login_as, monkeypatch):
+    h = {"Authorization": f"Bearer {login_as('import-lock@example.com')}"}
+    write_chunk, calls = importer._write_chunk, []
+
+    def flaky(user_id, chunk):
+        calls.append(len(chunk))
+        if len(calls) == 1:
+            raise _locked()
+        return write_chunk(user_id, chunk)
+
+    monkeypatch.setattr(importer, "_write_chunk", flaky)
+    ex = [{"exercise_id": 1, "sets": 1, "reps": 1}]
+    body = "\n".join(json.dumps({"title": f"W{i}", "exercises": ex}) for i in range(3))
+    r = client.post(
+        "/workouts/import", data=body, headers={**h, "Content-Type": "application/x-ndjson"}
+    )
+    assert r.get_json()["workouts_created"] == 3
+    assert calls == [3, 3]
+    assert len(client.get("/workouts", headers=h).get_json()["workouts"]) == 3
+
+
+def test_protected_write_begins_immediate_after_jwt_reads(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setenv("PASSWORD_HASH_WORKERS", "0")
+    monkeypatch.setenv("TOKEN_BLOCKLIST_REFRESH", "0")  # the blocklist reads on every request
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add(Exercise(name="Squat"))
+        db.session.commit()
+        engine = db.engine
+    client = app.test_client()
+    r = client.post("/auth/signup", json={"email": "w@example.com", "password": "pw"})
+    h = {"Authorization": f"Bearer {r.get_json()['access_token']}"}
+    app.extensions["identity_cache"].clear()  # and so does the identity lookup
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        body = {"title": "W", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1}]}
+        assert client.post("/workouts", json=body, headers=h).status_code == 201
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+        engine.dispose()
+    # the JWT reads ran in a deferred transaction, which ended before the write's began
+    reads = statements.index("BEGIN IMMEDIATE")
+    assert statements[0] == "BEGIN" and "FROM users" in statements[reads - 1]
+    assert [s for s in statements if s.startswith("BEGIN")] == ["BEGIN", "BEGIN IMMEDIATE"]
+    assert any(s.startswith("INSERT INTO workouts") for s in statements[reads:])
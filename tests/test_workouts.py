@@ -0,0 +1,338 @@
+# tests/test_workouts.py
+import csv
+import io
+import json
+
+from src import records as records_index, rollups
+
+
+def auth_header(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def create_workouts(client, token, n, n_exercises=1):
+    for i in range(n):
+        payload = {
+            "title": f"W{i}",
+            "exercises": [
+                {"exercise_id": 1, "sets": 3, "reps": 5, "weight": 100 + j}
+                for j in range(n_exercises)
+            ],
+        }
+        r = client.post("/workouts", json=payload, headers=auth_header(token))
+        assert r.status_code == 201, r.get_data(as_text=True)
+
+
+def test_list_workouts_keyset_pagination(client, login_as):
+    token = login_as("pager@example.com")
+    create_workouts(client, token, 5)
+
+    seen, cursor = [], None
+    while True:
+        url = "/workouts?limit=2" + (f"&cursor={cursor}" if cursor else "")
+        r = client.get(url, headers=auth_header(token))
+        assert r.status_code == 200
+        body = r.get_json()
+        assert len(body["workouts"]) <= 2
+        seen.extend(w["id"] for w in body["workouts"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_list_workouts_rejects_bad_cursor(client, login_as):
+    token = login_as("pager@example.com")
+    r = client.get("/workouts?cursor=not-a-cursor", headers=auth_header(token))
+    assert r.status_code == 400
+
+
+def test_list_workouts_query_count_is_constant(client, login_as, capture_sql):
+    token = login_as("nplusone@example.com")
+    create_workouts(client, token, 2, n_exercises=2)
+    with capture_sql() as small:
+        client.get("/workouts?limit=2", headers=auth_header(token))
+
+    create_workouts(client, token, 10, n_exercises=3)
+    with capture_sql() as large:
+        client.get("/workouts?limit=12", headers=auth_header(token))
+    assert len(small) == len(large)
+
+
+def test_export_streams_ndjson_and_csv(client, login_as):
+    token = login_as("export@example.com")
+    create_workouts(client, token, 3, n_exercises=2)
+
+    r = client.get("/workouts/export", headers=auth_header(token))
+    assert r.status_code == 200
+    assert r.is_streamed
+    lines = [json.loads(line) for line in r.get_data(as_text=True).splitlines()]
+    assert [w["title"] for w in lines] == ["W0", "W1", "W2"]
+    assert all(len(w["exercises"]) == 2 for w in lines)
+
+    r = client.get("/workouts/export?format=csv", headers=auth_header(token))
+    assert r.mimetype == "text/csv"
+    rows = list(csv.DictReader(io.StringIO(r.get_data(as_text=True))))
+    assert len(rows) == 6
+    assert rows[0]["exercise_name"] == "Squat"
+
+    r = client.get("/workouts/export?format=xml", headers=auth_header(token))
+    assert r.status_code == 400
+
+
+def test_import_ndjson_and_csv(app, client, login_as):
+    token = login_as("import@example.com")
+    h = auth_header(token)
+    body = "\n".join(
+        [
+            json.dumps({"title": "A", "exercises": [{"exercise_id": 1, "sets": 3, "reps": 5, "weight": 100}]}),
+            "{not json",
+            json.dumps({"title": "B", "exercises": [{"exercise_id": 999, "sets": 1, "reps": 1}]}),
+            json.dumps({"title": "C", "created_at": "2024-01-02T08:00:00", "exercises": [{"exercise_id": 1, "sets": 2, "reps": 2}]}),
+        ]
+    )
+    r = client.post(
+        "/workouts/import", data=body, headers={**h, "Content-Type": "application/x-ndjson"}
+    )
+    assert r.status_code == 201, r.get_data(as_text=True)
+    summary = r.get_json()
+    assert summary["workouts_created"] == 2
+    assert summary["exercises_created"] == 2
+    assert [e["line"] for e in summary["errors"]] == [2, 3]
+
+    csv_body = (
+        "workout_id,title,notes,created_at,exercise_id,sets,reps,weight\n"
+        "x,Legs,,2024-02-01T07:00:00,1,5,5,120\n"
+        "x,Legs,,2024-02-01T07:00:00,1,3,8,100\n"
+        "y,Bad,,,1,abc,8,100\n"
+    )
+    r = client.post("/workouts/import", data=csv_body, headers={**h, "Content-Type": "text/csv"})
+    summary = r.get_json()
+    assert summary["workouts_created"] == 1
+    assert summary["exercises_created"] == 2
+    assert summary["errors"][0]["line"] == 4
+
+    overview = client.get("/reports/overview", headers=h).get_json()
+    assert overview["totals"]["workouts"] == 3
+    assert overview["top_weight_by_exercise"][0]["max_weight"] == 120.0
+    with app.app_context():
+        assert rollups.check() == []
+
+
+def test_import_reports_unreadable_lines_and_normalizes_times(client, login_as):
+    h = auth_header(login_as("import-bad@example.com"))
+    ex = [{"exercise_id": 1, "sets": 1, "reps": 1}]
+    lines = [
+        json.dumps({"title": "Kept", "created_at": "2024-01-02T09:00:00+02:00", "exercises": ex}),
+        b'{"title": "\xff", "exercises": []}',
+        json.dumps({"title": 5, "exercises": ex}),
+        json.dumps({"title": "x" * 101, "exercises": ex}),
+        '{"title": "NaN", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1, "weight": NaN}]}',
+        json.dumps({"title": "Inf", "exercises": [{**ex[0], "weight": "inf"}]}),
+        json.dumps({"title": "Neg", "exercises": [{**ex[0], "reps": -1}]}),
+        json.dumps({"title": "Z", "created_at": "2024-01-03T07:00:00Z", "exercises": ex}),
+    ]
+    body = b"\n".join(line if isinstance(line, bytes) else line.encode() for line in lines)
+    r = client.post(
+        "/workouts/import", data=body, headers={**h, "Content-Type": "application/x-ndjson"}
+    )
+    summary = r.get_json()
+    assert summary["workouts_created"] == 2
+    assert [e["line"] for e in summary["errors"]] == [2, 3, 4, 5, 6, 7]
+    assert summary["errors"][0]["error"] == "invalid UTF-8"
+    workouts = client.get("/workouts", headers=h).get_json()["workouts"]
+    assert [w["created_at"] for w in workouts] == ["2024-01-03T07:00:00", "2024-01-02T07:00:00"]
+
+    csv_body = (
+        "workout_id,title,notes,created_at,exercise_id,sets,reps,weight\n"
+        f"x,{'x' * (csv.field_size_limit() + 1)},,,1,5,5,120\n"
+        "y,After,,,1,3,8,100\n"
+    )
+    r = client.post("/workouts/import", data=csv_body, headers={**h, "Content-Type": "text/csv"})
+    summary = r.get_json()
+    assert summary["workouts_created"] == 1
+    assert summary["errors"][0]["line"] == 2
+
+
+def test_import_inserts_a_chunks_workouts_in_one_statement(client, login_as, capture_sql):
+    h = auth_header(login_as("import-batch@example.com"))
+    body = "\n".join(
+        json.dumps({"title": f"I{i}", "exercises": [{"exercise_id": 1, "sets": 1, "reps": i + 1}]})
+        for i in range(50)
+    )
+    with capture_sql() as statements:
+        r = client.post(
+            "/workouts/import", data=body, headers={**h, "Content-Type": "application/x-ndjson"}
+        )
+    assert r.get_json()["workouts_created"] == 50
+    assert sum(s.startswith("INSERT INTO workouts ") for s, _ in statements) == 1
+    # ids map back to their own lines
+    workouts = client.get("/workouts?limit=50", headers=h).get_json()["workouts"]
+    assert all(w["exercises"][0]["reps"] == int(w["title"][1:]) + 1 for w in workouts)
+
+
+def test_conditional_get_returns_304_until_changed(client, login_as, capture_sql):
+    token = login_as("etag@example.com")
+    h = auth_header(token)
+    create_workouts(client, token, 1)
+
+    r = client.get("/workouts", headers=h)
+    list_etag = r.headers["ETag"]
+    wid = r.get_json()["workouts"][0]["id"]
+    r = client.get(f"/workouts/{wid}", headers=h)
+    item_etag = r.headers["ETag"]
+
+    r = client.get(f"/workouts/{wid}", headers={**h, "If-None-Match": item_etag})
+    assert r.status_code == 304
+    assert r.get_data() == b""
+    with capture_sql() as statements:
+        client.get(f"/workouts/{wid}", headers={**h, "If-None-Match": item_etag})
+    assert len(statements) == 1
+    assert client.get("/workouts", headers={**h, "If-None-Match": list_etag}).status_code == 304
+
+    client.put(f"/workouts/{wid}", json={"title": "Renamed"}, headers=h)
+    r = client.get(f"/workouts/{wid}", headers={**h, "If-None-Match": item_etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != item_etag
+    assert client.get("/workouts", headers={**h, "If-None-Match": list_etag}).status_code == 200
+
+
+def _entry_writes(statements):
+    return [
+        s.split()[0]
+        for s, _ in statements
+        if "workout_exercises" in s and s.split()[0] in ("INSERT", "UPDATE", "DELETE")
+    ]
+
+
+def test_put_diffs_entries_by_id(app, client, login_as, capture_sql):
+    h = auth_header(login_as("diff@example.com"))
+    body = {
+        "title": "Diff",
+        "exercises": [
+            {"exercise_id": 1, "sets": 3, "reps": 5, "weight": 100},
+            {"exercise_id": 1, "sets": 3, "reps": 8, "weight": 80},
+        ],
+    }
+    w = client.post("/workouts", json=body, headers=h).get_json()
+    first, second = w["exercises"]
+
+    # round-tripping the GET representation with one changed set writes one row
+    second["weight"] = 85
+    with capture_sql() as statements:
+        r = client.put(f"/workouts/{w['id']}", json={"exercises": [first, second]}, headers=h)
+    assert r.status_code == 200
+    assert _entry_writes(statements) == ["UPDATE"]
+    assert [e["id"] for e in r.get_json()["exercises"]] == [first["id"], second["id"]]
+    assert r.get_json()["exercises"][1]["weight"] == 85
+
+    # unlisted entries go, entries without an id are added
+    r = client.put(
+        f"/workouts/{w['id']}",
+        json={"exercises": [{"id": first["id"]}, {"exercise_id": 1, "sets": 1, "reps": 1}]},
+        headers=h,
+    )
+    entries = r.get_json()["exercises"]
+    assert [(e["reps"], e["weight"]) for e in entries] == [(5, 100), (1, 0)]
+    assert entries[0]["id"] == first["id"]
+
+    r = client.put(f"/workouts/{w['id']}", json={"exercises": [{"id": 10**9}]}, headers=h)
+    assert r.status_code == 400
+
+    with app.app_context():
+        assert rollups.check() == [] and records_index.check() == []
+
+
+def test_patch_edits_entries_in_place(app, client, login_as):
+    h = auth_header(login_as("patch@example.com"))
+    w = client.post(
+        "/workouts",
+        json={
+            "title": "Patch",
+            "exercises": [
+                {"exercise_id": 1, "sets": 3, "reps": 5, "weight": 100},
+                {"exercise_id": 1, "sets": 3, "reps": 8, "weight": 80},
+            ],
+        },
+        headers=h,
+    ).get_json()
+    keep, drop = (e["id"] for e in w["exercises"])
+    etag = client.get(f"/workouts/{w['id']}", headers=h).headers["ETag"]
+
+    r = client.patch(
+        f"/workouts/{w['id']}",
+        json=[
+            {"op": "replace", "path": "/title", "value": "Patched"},
+            {"op": "replace", "path": f"/exercises/{keep}/weight", "value": 110},
+            {"op": "remove", "path": f"/exercises/{drop}"},
+            {"op": "add", "path": "/exercises/-",
+             "value": {"exercise_id": 1, "sets": 2, "reps": 3, "weight": 120}},
+        ],
+        headers=h,
+    )
+    assert r.status_code == 200, r.get_data(as_text=True)
+    body = r.get_json()
+    assert body["title"] == "Patched"
+    assert [(e["reps"], e["weight"]) for e in body["exercises"]] == [(5, 110), (3, 120)]
+    assert body["exercises"][0]["id"] == keep
+    assert client.get(f"/workouts/{w['id']}", headers=h).headers["ETag"] != etag
+
+    for bad in (
+        [],
+        [{"op": "remove", "path": f"/exercises/{10**9}"}],
+        [{"op": "replace", "path": f"/exercises/{keep}/colour", "value": 1}],
+        [{"op": "move", "path": "/title"}],
+        [{"op": "add", "path": "/exercises/-", "value": {"exercise_id": 1}}],
+    ):
+        assert client.patch(f"/workouts/{w['id']}", json=bad, headers=h).status_code == 400
+
+    with app.app_context():
+        assert rollups.check() == [] and records_index.check() == []
+
+
+def test_create_validates_exercises_in_constant_statements(client, login_as, capture_sql):
+    token = login_as("create@example.com")
+    h = auth_header(token)
+    create_workouts(client, token, 1)  # warm the identity and exercise caches
+
+    def create(n):
+        body = {
+            "title": "Many",
+            "exercises": [{"exercise_id": 1, "sets": 1, "reps": i + 1} for i in range(n)],
+        }
+        with capture_sql() as statements:
+            r = client.post("/workouts", json=body, headers=h)
+        assert r.status_code == 201
+        return r.get_json(), len(statements)
+
+    one, small = create(1)
+    many, large = create(10)
+    assert small == large
+    assert [e["reps"] for e in many["exercises"]] == list(range(1, 11))
+    assert many["exercises"][0]["exercise_name"] == "Squat"
+    assert client.get(f"/workouts/{many['id']}", headers=h).get_json() == many
+
+    bad = {"title": "Bad", "exercises": [{"exercise_id": 999, "sets": 1, "reps": 1}]}
+    r = client.post("/workouts", json=bad, headers=h)
+    assert r.status_code == 400
+    assert "999" in r.get_json()["msg"]
+
+
+def test_create_rejects_non_finite_and_negative_values(app, client, login_as):
+    h = auth_header(login_as("finite@example.com"))
+    for entry in (
+        {"weight": "nan"},
+        {"weight": "inf"},
+        {"weight": "-Infinity"},
+        {"weight": -5},
+        {"sets": -1},
+        {"reps": -3},
+    ):
+        body = {"title": "Bad", "exercises": [{"exercise_id": 1, "sets": 1, "reps": 1, **entry}]}
+        r = client.post("/workouts", json=body, headers=h)
+        assert r.status_code == 400, entry
+    assert client.get("/workouts", headers=h).get_json()["workouts"] == []
+    with app.app_context():
+        assert rollups.check() == [] and records_index.check() == []